@@ -0,0 +1,344 @@
+# ==================================================================================================================
+# Main_Emulator.py
+# ==================================================================================================================
+# This program emulates the TD Ameritrade API used by Main_Trade.py, with prices of the Data/Stock_<SYMB> files.
+# ==================================================================================================================
+# Date      User         Remarks
+# 20261017  Oscar Saleh  Original program.
+#                        pricehistory, quotes, hours, orders list/get/post and oauth2 token; latency, errors and rate limit.
+#                        Symbols with unreadable Stock files are served without prices.
+#
+# ==================================================================================================================
+# Objective:
+# Run Main_Trade.py without live credentials (str_api_url = http://localhost:8080/v1) to measure the loop with many
+# symbols and slow or failing responses.
+#
+# ==================================================================================================================
+# Logic:
+# - Prices of each symbol are moved by whole weeks, so the newest stored price is less than a week before now.
+# - Symbols without a Stock file use the prices of a stored symbol (str_emulator_synthetic = Yes), e.g. for 500 symbols.
+# - Every response waits str_emulator_latency_ms (+/- 50%); str_emulator_error_rate of the responses are HTTP 500.
+# - Beyond str_emulator_requests_per_minute (token bucket, bursts up to the same number) responses are HTTP 429.
+# - Orders are kept in memory: LIMIT BUY fills when the last price is at or below its price, SELL at or above.
+#   Child orders of TRIGGER orders wait for the parent order to fill.
+#
+# ==================================================================================================================
+
+import configparser
+import http.server
+import itertools
+import json
+import numpy as np
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+import zlib
+
+from datetime import datetime, timedelta
+
+from Main_Feed import func_load_prices
+from Main_Trade import dict_history_close_offset
+
+
+class cls_EmulatorHandler(http.server.BaseHTTPRequestHandler):
+    # One request; routes of the API paths under /v1
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as cls_BrokerClient
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def handle_request(self, str_method):
+        try:
+            self.route(str_method)
+        except (ValueError, KeyError, IndexError, TypeError) as e:  # Invalid request; the connection is kept
+            func_display_info(20, 'Both', ['* * * ERROR * * * Invalid request ' + str_method + ' ' + self.path + ': ' + repr(e)])
+            self.send(400, {'error': repr(e)})
+
+    def log_message(self, format, *args):
+        func_display_info(80, 'Both', [self.address_string() + ' ' + (format % args)])
+
+    def route(self, str_method):
+        obj_url = urllib.parse.urlsplit(self.path)
+        lst_path = [str_part for str_part in obj_url.path.split('/') if (str_part != '')]
+        dict_params = dict(urllib.parse.parse_qsl(obj_url.query))
+        bytes_body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        obj_Emulator.count(str_method + ' ' + ((lst_path[-2] + '/{id}') if ((len(lst_path) > 1) and lst_path[-1].isdigit()) else '/'.join(lst_path[-1:])))  # Endpoint
+        time.sleep(float_emulator_latency * random.uniform(0.5, 1.5))
+        if ((lst_path[0:1] != ['v1']) or (len(lst_path) < 2)):
+            return (self.send(404, {'error': 'Not Found'}))
+        if not (obj_Emulator.acquire()):
+            return (self.send(429, {'error': 'Individual App\'s transactions per seconds restriction reached.'}))
+        if (random.random() < float_emulator_error_rate):
+            return (self.send(500, {'error': 'Emulated error'}))
+        lst_path = lst_path[1:]
+        if ((str_method == 'GET') and (lst_path[0] == 'marketdata') and (len(lst_path) == 3) and (lst_path[2] == 'pricehistory')):
+            return (self.send(200, obj_Emulator.price_history(lst_path[1], dict_params)))
+        if ((str_method == 'GET') and (lst_path == ['marketdata', 'quotes'])):
+            return (self.send(200, obj_Emulator.quotes(dict_params.get('symbol', '').split(','))))
+        if ((str_method == 'GET') and (lst_path[0] == 'marketdata') and (len(lst_path) == 3) and (lst_path[2] == 'hours')):
+            return (self.send(200, obj_Emulator.hours(dict_params.get('date', str(datetime.today()))[0:10])))
+        if ((str_method == 'POST') and (lst_path == ['oauth2', 'token'])):
+            return (self.send(200, obj_Emulator.token(dict(urllib.parse.parse_qsl(bytes_body.decode('utf-8'))))))
+        if ((lst_path[0] == 'accounts') and (len(lst_path) == 3) and (lst_path[2] == 'orders')):
+            if (str_method == 'GET'):
+                return (self.send(200, obj_Emulator.orders(lst_path[1])))
+            int_order_id = obj_Emulator.place_order(lst_path[1], json.loads(bytes_body))
+            return (self.send(201, None, {'Location': str_emulator_url + '/accounts/' + lst_path[1] + '/orders/' + str(int_order_id)}))
+        if ((str_method == 'GET') and (lst_path[0] == 'accounts') and (len(lst_path) == 4) and (lst_path[2] == 'orders')):
+            dict_order = obj_Emulator.order(lst_path[1], lst_path[3])
+            if (dict_order is None):
+                return (self.send(404, {'error': 'Order not found'}))
+            return (self.send(200, dict_order))
+        return (self.send(404, {'error': 'Not Found'}))
+
+    def send(self, int_status, data, dict_headers=None):
+        bytes_body = b'' if (data is None) else json.dumps(data).encode('utf-8')
+        self.send_response(int_status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(bytes_body)))
+        for str_header, str_value in (dict_headers or {}).items():
+            self.send_header(str_header, str_value)
+        self.end_headers()
+        self.wfile.write(bytes_body)
+
+class cls_Emulator:
+    # Prices, orders, rate limit and counters shared by all requests
+    def __init__(self, str_path_dir, float_rate, bool_synthetic):  # attributes
+        self.str_path_dir = str_path_dir
+        self.lst_symbols_stored = sorted(set([re.sub(r'(\.\d+\.seg|\.bin|\.txt)$', '', str_file_name[len('Stock_'):]) for str_file_name in os.listdir(str_path_dir)
+                                              if (str_file_name.startswith('Stock_') and re.search(r'(\.\d+\.seg|\.bin|\.txt)$', str_file_name))]))
+        self.bool_synthetic = bool_synthetic
+        self.dict_prices = {}                 # Prices by stored symbol: dates (moved to now), prices, frequency; oldest first
+        self.dict_orders = {}                 # Orders by orderId; child orders too
+        self.dict_account_orders = {}         # orderId of parent orders by account
+        self.iter_order_id = itertools.count(int(time.time()) * 10)
+        self.rate    = float_rate / 60        # Requests by second; 0 without limit
+        self.tokens  = float_rate
+        self.time_last = time.monotonic()
+        self.dict_requests = {}               # Requests by method and path
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Token bucket; False when the request exceeds the rate limit
+        with self.lock:
+            if (self.rate <= 0):
+                return (True)
+            float_now = time.monotonic()
+            self.tokens = min(self.rate * 60, self.tokens + ((float_now - self.time_last) * self.rate))
+            self.time_last = float_now
+            if (self.tokens < 1):
+                self.count('429')
+                return (False)
+            self.tokens = self.tokens - 1
+            return (True)
+
+    def add_order(self, str_account, dict_order, str_status):
+        # Order as returned by the orders list: ids, status and quantities added; children wait for the parent
+        dict_order = dict(dict_order)
+        dict_order['orderId'] = next(self.iter_order_id)
+        dict_order['accountId'] = int(str_account) if str_account.isdigit() else str_account
+        dict_order['status'] = str_status
+        dict_order['quantity'] = dict_order['orderLegCollection'][0]['quantity']
+        dict_order['filledQuantity'] = 0
+        dict_order['remainingQuantity'] = dict_order['quantity']
+        dict_order['enteredTime'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S+0000')
+        dict_order['orderLegCollection'] = [dict(dict_leg, orderLegType='EQUITY', legId=int_leg + 1, positionEffect='OPENING' if (dict_leg['instruction'] == 'BUY') else 'CLOSING')
+                                            for int_leg, dict_leg in enumerate(dict_order['orderLegCollection'])]
+        if ('childOrderStrategies' in dict_order):
+            dict_order['childOrderStrategies'] = [self.add_order(str_account, dict_child, 'AWAITING_PARENT_ORDER') for dict_child in dict_order['childOrderStrategies']]
+        self.dict_orders[dict_order['orderId']] = dict_order
+        return (dict_order)
+
+    def count(self, str_request):
+        self.dict_requests[str_request] = self.dict_requests.get(str_request, 0) + 1
+
+    def fill_orders(self, lst_order_id):
+        # Orders of the list (and their children) filled at the last price
+        for int_order_id in lst_order_id:
+            dict_order = self.dict_orders[int_order_id]
+            if (dict_order['status'] == 'WORKING'):
+                str_symbol = dict_order['orderLegCollection'][0]['instrument']['symbol']
+                float_price = self.last_price(str_symbol)
+                if (((dict_order['orderLegCollection'][0]['instruction'] == 'BUY') and (float_price is not None) and (float_price <= dict_order['price'])) or
+                    ((dict_order['orderLegCollection'][0]['instruction'] == 'SELL') and (float_price is not None) and (float_price >= dict_order['price']))):
+                    dict_order['status'] = 'FILLED'
+                    dict_order['filledQuantity'] = dict_order['quantity']
+                    dict_order['remainingQuantity'] = 0
+                    dict_order['closeTime'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S+0000')
+                    for dict_child in dict_order.get('childOrderStrategies', []):
+                        dict_child['status'] = 'WORKING'
+            self.fill_orders([dict_child['orderId'] for dict_child in dict_order.get('childOrderStrategies', [])])
+
+    def hours(self, str_date):
+        # Hours of EQUITY; closed on Saturday and Sunday
+        dt_date = datetime.strptime(str_date, '%Y-%m-%d')
+        if (dt_date.weekday() >= 5):
+            return ({'equity': {'equity': {'date': str_date, 'marketType': 'EQUITY', 'product': 'equity', 'isOpen': False}}})
+        dict_sessions = {}
+        for str_session, int_start, int_end in [('preMarket', 7 * 60, 9 * 60 + 30), ('regularMarket', 9 * 60 + 30, 16 * 60), ('postMarket', 16 * 60, 20 * 60)]:
+            dict_sessions[str_session] = [{'start': (dt_date + timedelta(minutes=int_start)).strftime('%Y-%m-%dT%H:%M:%S'),
+                                           'end':   (dt_date + timedelta(minutes=int_end)).strftime('%Y-%m-%dT%H:%M:%S')}]
+        return ({'equity': {'EQ': {'date': str_date, 'marketType': 'EQUITY', 'exchange': 'NULL', 'category': 'NULL', 'product': 'EQ',
+                                   'productName': 'equity', 'isOpen': True, 'sessionHours': dict_sessions}}})
+
+    def last_price(self, str_symbol):
+        # Last stored price at or before now; None without prices
+        arr_dates, arr_prices, arr_frequency = self.prices(str_symbol)
+        int_index = int(np.searchsorted(arr_dates, int(round(time.time() * 1000, 0)), side='right'))
+        if (int_index == 0):
+            return (None)
+        return (float(arr_prices[int_index - 1]))
+
+    def order(self, str_account, str_order_id):
+        with self.lock:
+            dict_order = self.dict_orders.get(int(str_order_id)) if str_order_id.isdigit() else None
+            if ((dict_order is None) or (str(dict_order['accountId']) != str_account)):
+                return (None)
+            self.fill_orders([dict_order['orderId']])
+            return (dict_order)
+
+    def orders(self, str_account):
+        with self.lock:
+            lst_order_id = self.dict_account_orders.get(str_account, [])
+            self.fill_orders(lst_order_id)
+            return ([self.dict_orders[int_order_id] for int_order_id in lst_order_id])
+
+    def place_order(self, str_account, dict_order):
+        with self.lock:
+            dict_order = self.add_order(str_account, dict_order, 'WORKING')
+            self.dict_account_orders.setdefault(str_account, []).append(dict_order['orderId'])
+            return (dict_order['orderId'])
+
+    def price_history(self, str_symbol, dict_params):
+        # Candles of the requested frequency between startDate and endDate; begin of period as datetime
+        int_frequency = 1440 if (dict_params.get('frequencyType') == 'daily') else int(dict_params.get('frequency', 1))
+        arr_dates, arr_prices, arr_frequency = self.prices(str_symbol)
+        int_offset = dict_history_close_offset.get(int_frequency, 0)
+        arr_keep = ((arr_frequency == int_frequency) &
+                    (arr_dates - int_offset >= int(float(dict_params.get('startDate', 0)))) &
+                    (arr_dates - int_offset <= int(float(dict_params.get('endDate', time.time() * 1000)))))
+        lst_candles = [{'open': float_price, 'high': float_price, 'low': float_price, 'close': float_price, 'volume': 0, 'datetime': int_date - int_offset}
+                       for int_date, float_price in zip(arr_dates[arr_keep].tolist(), arr_prices[arr_keep].tolist())]
+        return ({'candles': lst_candles, 'symbol': str_symbol, 'empty': (len(lst_candles) == 0)})
+
+    def prices(self, str_symbol):
+        # Stored prices of a symbol, oldest first; dates moved by whole weeks so the newest is less than a week before now
+        str_symbol_stored = str_symbol
+        if ((str_symbol not in self.lst_symbols_stored) and self.bool_synthetic and (len(self.lst_symbols_stored) > 0)):
+            str_symbol_stored = self.lst_symbols_stored[zlib.crc32(str_symbol.encode('utf-8')) % len(self.lst_symbols_stored)]
+        arr_prices_symbol = self.dict_prices.get(str_symbol_stored)
+        if (arr_prices_symbol is None):
+            arr_records = np.zeros(0, dtype=[('date', '<i8'), ('price', '<f8'), ('frequency', '<i2')])
+            if (str_symbol_stored in self.lst_symbols_stored):
+                try:
+                    arr_records = np.unique(func_load_prices(self.str_path_dir, str_symbol_stored))
+                except ValueError as e:  # Stored prices cannot be read; symbol without prices
+                    func_display_info(0, 'Both', ['* * * ERROR * * * ' + str(e) + '; symbol skipped: ' + str_symbol_stored])
+            arr_records = arr_records[arr_records['price'] != 0]
+            arr_records = arr_records[np.argsort(arr_records['date'], kind='stable')]
+            int_week  = 7 * 24 * 60 * 60 * 1000
+            int_shift = 0 if (len(arr_records) == 0) else ((int(round(time.time() * 1000, 0)) - int(arr_records['date'][-1])) // int_week) * int_week
+            arr_prices_symbol = (arr_records['date'] + int_shift, np.ascontiguousarray(arr_records['price']), np.ascontiguousarray(arr_records['frequency']))
+            self.dict_prices[str_symbol_stored] = arr_prices_symbol
+            func_display_info(50, 'Both', ['Prices loaded: ' + str_symbol_stored + ' ' + str(len(arr_records))])
+        return (arr_prices_symbol)
+
+    def print(self):
+        return ('Requests: ' + ' '.join([str_request + ' ' + str(int_requests) for str_request, int_requests in sorted(self.dict_requests.items())]))
+
+    def quotes(self, lst_symbols):
+        # lastPrice of symbols with prices; others are left out as by the API
+        dict_quotes = {}
+        for str_symbol in lst_symbols:
+            float_price = self.last_price(str_symbol)
+            if (float_price is not None):
+                dict_quotes[str_symbol] = {'symbol': str_symbol, 'lastPrice': float_price, 'quoteTimeInLong': int(round(time.time() * 1000, 0))}
+        return (dict_quotes)
+
+    def token(self, dict_form):
+        # New Token Access; new Token Refresh too with access_type offline
+        dict_token = {'access_token': 'Emulator' + uuid.uuid4().hex, 'token_type': 'Bearer', 'expires_in': 1800, 'scope': 'PlaceTrades AccountAccess MoveMoney'}
+        if (dict_form.get('access_type') == 'offline'):
+            dict_token['refresh_token'] = 'Emulator' + uuid.uuid4().hex
+            dict_token['refresh_token_expires_in'] = 7776000
+        return (dict_token)
+
+class cls_EmulatorServer(http.server.ThreadingHTTPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def func_display_info(int_debug_value, strPrintLocation, ListLine):
+    # Same levels as Main_Trade.py; printed only, the log file belongs to Main_Trade.py
+    if (int_debug >= int_debug_value):
+        with obj_lock_display:
+            for objLine in ListLine:
+                print(str(objLine))
+        if (int_debug_value == -1):  # Last message prior to Exit
+            sys.exit(-1)
+
+
+if __name__ == "__main__":
+
+    obj_lock_display = threading.Lock()
+    int_debug = 20
+
+    # set path of working directories and files
+    str_path_dir_Config = os.getcwd() + "\Config"
+    str_path_dir_Data = os.getcwd() + "\Data"
+
+    # read Trade_Config.ini file to get parameters
+    io_read_file_Config = configparser.ConfigParser()
+    io_read_file_Config.read(str_path_dir_Config + "\Trade_Config.ini")
+
+    #global int_debug
+    str_debug = io_read_file_Config.get("App Config", "str_debug", fallback="20")
+    int_debug = int(str_debug)
+    func_display_info(50, "Both", ["str_debug >>>" + str_debug + "<<<"])
+
+    #global str_emulator_url
+    str_emulator_port = io_read_file_Config.get("App Config", "str_emulator_port", fallback="8080")
+    str_emulator_url = "http://localhost:" + str_emulator_port + "/v1"
+    func_display_info(50, "Both", ["str_emulator_port >>>" + str_emulator_port + "<<<"])
+
+    #global float_emulator_latency
+    str_emulator_latency_ms = io_read_file_Config.get("App Config", "str_emulator_latency_ms", fallback="100")
+    float_emulator_latency = float(str_emulator_latency_ms) / 1000
+    func_display_info(50, "Both", ["str_emulator_latency_ms >>>" + str_emulator_latency_ms + "<<<"])
+
+    #global float_emulator_error_rate
+    str_emulator_error_rate = io_read_file_Config.get("App Config", "str_emulator_error_rate", fallback="0")
+    float_emulator_error_rate = float(str_emulator_error_rate)
+    func_display_info(50, "Both", ["str_emulator_error_rate >>>" + str_emulator_error_rate + "<<<"])
+
+    str_emulator_requests_per_minute = io_read_file_Config.get("App Config", "str_emulator_requests_per_minute", fallback="120")
+    func_display_info(50, "Both", ["str_emulator_requests_per_minute >>>" + str_emulator_requests_per_minute + "<<<"])
+
+    str_emulator_synthetic = io_read_file_Config.get("App Config", "str_emulator_synthetic", fallback="Yes")
+    func_display_info(50, "Both", ["str_emulator_synthetic >>>" + str_emulator_synthetic + "<<<"])
+
+    #global obj_Emulator
+    obj_Emulator = cls_Emulator(str_path_dir_Data, float(str_emulator_requests_per_minute), (str_emulator_synthetic == 'Yes'))
+    obj_EmulatorServer = cls_EmulatorServer(('localhost', int(str_emulator_port)), cls_EmulatorHandler)
+    func_display_info(0, 'Both', ['Emulator listening on ' + str_emulator_url + ' since ' + str(datetime.today()) + ' symbols stored: ' + str(len(obj_Emulator.lst_symbols_stored))])
+    threading.Thread(target=obj_EmulatorServer.serve_forever, name='EmulatorServer', daemon=True).start()
+    try:
+        while True:  # Counters every minute
+            time.sleep(60)
+            func_display_info(20, 'Both', [str(datetime.today()) + ' ' + obj_Emulator.print()])
+    except KeyboardInterrupt:
+        pass
+    obj_EmulatorServer.shutdown()
+    obj_EmulatorServer.server_close()
+    func_display_info(0, 'Both', ['The End'])
+    sys.exit()   # Final exit
+# "__main__"
+# Main_Emulator.py
+# The End
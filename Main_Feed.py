@@ -0,0 +1,181 @@
+# ==================================================================================================================
+# Main_Feed.py
+# ==================================================================================================================
+# This program replays stored stock prices as a streaming price feed for Main_Trade.py (str_feed = Yes).
+# ==================================================================================================================
+# Date      User         Remarks
+# 20261017  Oscar Saleh  Original program.
+#                        Replay 1 min prices and last prices of Data/Stock_<SYMB> files to subscribed clients.
+#                        Stored prices read with the file readers of Main_Trade.py; symbols with unreadable files are skipped.
+#
+# ==================================================================================================================
+# Objective:
+# Stand-in of a streaming market data server, so the feed mode of Main_Trade.py can be built and tested offline.
+#
+# ==================================================================================================================
+# Protocol: TCP, one JSON message by line (UTF-8). Dates in Epoch TDA format (milliseconds).
+#   client -> server  {"command": "SUBS", "keys": ["AAPL", "BP"]}
+#   server -> client  {"service": "CHART", "key": "AAPL", "datetime": <begin of 1 min bar>, "close": 149.26}
+#                     {"service": "QUOTE", "key": "AAPL", "datetime": <time of quote>, "lastPrice": 149.3}
+#                     {"service": "HEARTBEAT", "datetime": <now>}
+#
+# Logic:
+# - The last str_feed_replay_days days of stored prices of the subscribed symbols are replayed, oldest first.
+# - Dates are moved by whole weeks, so the replay starts less than a week before now on the same weekday and time.
+# - Messages are sent str_feed_replay_speed times faster than recorded; the connection is closed at the end.
+#
+# ==================================================================================================================
+
+import configparser
+import json
+import numpy as np
+import os
+import socketserver
+import sys
+import threading
+import time
+
+from datetime import datetime
+
+from Main_Trade import dtype_prices_record, dict_history_close_offset
+from Main_Trade import func_list_prices_segments, func_load_prices_binary, func_load_prices_segment, func_load_prices_text
+
+
+class cls_FeedHandler(socketserver.StreamRequestHandler):
+    # One client: subscription line, then the replay of its symbols
+    def handle(self):
+        try:
+            dict_command = json.loads(self.rfile.readline())
+            lst_symbols = [str(str_symbol) for str_symbol in dict_command.get('keys', [])]
+        except ValueError:
+            func_display_info(0, 'Both', ['* * * ERROR * * * Invalid subscription from ' + str(self.client_address)])
+            return
+        func_display_info(20, 'Both', ['Subscription from ' + str(self.client_address) + ' symbols: ' + str(len(lst_symbols))])
+        arr_dates, arr_prices, arr_frequency, arr_symbol = func_load_replay(lst_symbols)
+        if (len(arr_dates) == 0):
+            func_display_info(20, 'Both', ['No prices to replay for ' + str(self.client_address)])
+            return
+        int_week  = 7 * 24 * 60 * 60 * 1000
+        int_shift = ((int(round(time.time() * 1000, 0)) - int(arr_dates[0])) // int_week) * int_week
+        float_time_start = time.time()
+        float_time_sent  = float_time_start
+        try:
+            for int_date, float_price, int_frequency, int_symbol in zip(arr_dates.tolist(), arr_prices.tolist(), arr_frequency.tolist(), arr_symbol.tolist()):
+                float_wait = float_time_start + ((int_date - int(arr_dates[0])) / 1000 / float_feed_replay_speed) - time.time()
+                while (float_wait > 0):  # Heartbeats every 10 seconds while waiting
+                    if (time.time() - float_time_sent >= 10):
+                        self.send({'service': 'HEARTBEAT', 'datetime': int(round(time.time() * 1000, 0))})
+                        float_time_sent = time.time()
+                    time.sleep(min(float_wait, 10))
+                    float_wait = float_time_start + ((int_date - int(arr_dates[0])) / 1000 / float_feed_replay_speed) - time.time()
+                if (int_frequency == 1):  # Stored at close time; the feed sends the begin of the bar
+                    self.send({'service': 'CHART', 'key': lst_symbols[int_symbol], 'datetime': int_date + int_shift - dict_history_close_offset[1], 'close': float_price})
+                else:
+                    self.send({'service': 'QUOTE', 'key': lst_symbols[int_symbol], 'datetime': int_date + int_shift, 'lastPrice': float_price})
+                float_time_sent = time.time()
+        except OSError as e:  # Client disconnected
+            func_display_info(20, 'Both', ['Client ' + str(self.client_address) + ' disconnected: ' + str(e)])
+            return
+        func_display_info(20, 'Both', ['Replay ended for ' + str(self.client_address) + ' messages: ' + str(len(arr_dates))])
+
+    def send(self, dict_message):
+        self.wfile.write((json.dumps(dict_message) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+class cls_FeedServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def func_display_info(int_debug_value, strPrintLocation, ListLine):
+    # Same levels as Main_Trade.py; printed only, the log file belongs to Main_Trade.py
+    if (int_debug >= int_debug_value):
+        with obj_lock_display:
+            for objLine in ListLine:
+                print(str(objLine))
+        if (int_debug_value == -1):  # Last message prior to Exit
+            sys.exit(-1)
+
+def func_load_prices(str_path_dir, str_symbol):
+    # Stored prices of a symbol: binary file, old text file and segment files, read as Main_Trade.py does; records in any order
+    str_file = str_path_dir + '\Stock_' + str_symbol
+    lst_columns = []
+    if (os.path.isfile(str_file + '.bin')):
+        lst_columns.append(func_load_prices_binary(str_file + '.bin'))
+    elif (os.path.isfile(str_file + '.txt')):
+        lst_columns.append(func_load_prices_text(str_file + '.txt'))
+    for int_generation, str_file_segment in func_list_prices_segments(str_path_dir, str_symbol):
+        lst_columns.append(func_load_prices_segment(str_file_segment))
+    arr_records = np.zeros(sum(len(tup_columns[0]) for tup_columns in lst_columns), dtype=dtype_prices_record)
+    if (len(lst_columns) > 0):
+        arr_records['date']      = np.concatenate([tup_columns[0] for tup_columns in lst_columns])
+        arr_records['price']     = np.concatenate([tup_columns[1] for tup_columns in lst_columns])
+        arr_records['frequency'] = np.concatenate([tup_columns[2] for tup_columns in lst_columns])
+    return (arr_records)
+
+def func_load_replay(lst_symbols):
+    # 1 min prices and last prices of the last str_feed_replay_days days of the symbols, oldest first; arr_symbol indexes lst_symbols
+    lst_records, lst_symbol = [], []
+    for int_symbol, str_symbol in enumerate(lst_symbols):
+        try:
+            arr_records = func_load_prices(str_path_dir_Data, str_symbol)
+        except ValueError as e:  # Stored prices cannot be read; symbol not replayed
+            func_display_info(0, 'Both', ['* * * ERROR * * * ' + str(e) + '; symbol skipped: ' + str_symbol])
+            arr_records = np.zeros(0, dtype=dtype_prices_record)
+        arr_records = np.unique(arr_records[((arr_records['frequency'] == 0) | (arr_records['frequency'] == 1)) & (arr_records['price'] != 0)])
+        lst_records.append(arr_records)
+        lst_symbol.append(np.full(len(arr_records), int_symbol, dtype='<i4'))
+        func_display_info(50, 'Both', ['Prices to replay: ' + str_symbol + ' ' + str(len(arr_records))])
+    arr_records = np.concatenate(lst_records) if (len(lst_records) > 0) else np.zeros(0, dtype=dtype_prices_record)
+    arr_symbol  = np.concatenate(lst_symbol) if (len(lst_symbol) > 0) else np.zeros(0, dtype='<i4')
+    if (len(arr_records) > 0):
+        arr_keep = arr_records['date'] > (arr_records['date'].max() - int(float_feed_replay_days * 24 * 60 * 60 * 1000))
+        arr_records, arr_symbol = arr_records[arr_keep], arr_symbol[arr_keep]
+        arr_order = np.argsort(arr_records['date'], kind='stable')
+        arr_records, arr_symbol = arr_records[arr_order], arr_symbol[arr_order]
+    return (arr_records['date'], arr_records['price'], arr_records['frequency'], arr_symbol)
+
+
+if __name__ == "__main__":
+
+    obj_lock_display = threading.Lock()
+    int_debug = 20
+
+    # set path of working directories and files
+    str_path_dir_Config = os.getcwd() + "\Config"
+    str_path_dir_Data = os.getcwd() + "\Data"
+
+    # read Trade_Config.ini file to get parameters
+    io_read_file_Config = configparser.ConfigParser()
+    io_read_file_Config.read(str_path_dir_Config + "\Trade_Config.ini")
+
+    #global int_debug
+    str_debug = io_read_file_Config.get("App Config", "str_debug", fallback="20")
+    int_debug = int(str_debug)
+    func_display_info(50, "Both", ["str_debug >>>" + str_debug + "<<<"])
+
+    #global int_feed_port
+    str_feed_port = io_read_file_Config.get("App Config", "str_feed_port", fallback="8765")
+    func_display_info(50, "Both", ["str_feed_port >>>" + str_feed_port + "<<<"])
+
+    #global float_feed_replay_days
+    str_feed_replay_days = io_read_file_Config.get("App Config", "str_feed_replay_days", fallback="1")
+    float_feed_replay_days = float(str_feed_replay_days)
+    func_display_info(50, "Both", ["str_feed_replay_days >>>" + str_feed_replay_days + "<<<"])
+
+    #global float_feed_replay_speed
+    str_feed_replay_speed = io_read_file_Config.get("App Config", "str_feed_replay_speed", fallback="60")
+    float_feed_replay_speed = float(str_feed_replay_speed)
+    func_display_info(50, "Both", ["str_feed_replay_speed >>>" + str_feed_replay_speed + "<<<"])
+
+    obj_FeedServer = cls_FeedServer(('localhost', int(str_feed_port)), cls_FeedHandler)
+    func_display_info(0, 'Both', ['Feed listening on localhost:' + str_feed_port + ' since ' + str(datetime.today())])
+    try:
+        obj_FeedServer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    obj_FeedServer.server_close()
+    func_display_info(0, 'Both', ['The End'])
+    sys.exit()   # Final exit
+# "__main__"
+# Main_Feed.py
+# The End
@@ -32,6 +32,40 @@
 # 20211129  Oscar Saleh  Validated Post Market hours during holiday, Thanksgiving.
 # 20220501  Oscar Saleh  Enable trades from multiple accounts.
 # 20220518  Oscar Saleh  Use alias on account numbers to improve security.
+# 20261017  Oscar Saleh  Store historical prices in binary columnar files (Stock_<SYMB>.bin); text files still readable.
+#                        Save only new prices to append-only segment files; compact segments in background.
+#                        Keep prices in arrays; merge new prices and cleanse records in linear time.
+#                        Calculate RSI with NumPy; several series in one call.
+#                        Keep RSI state of closed bars by symbol and period; update when bars close.
+#                        Resample prices into bars of all periods in one pass.
+#                        Bounded RSI lookback by period; warm-up from tolerance, convergence error reported.
+#                        Session calendar: day boundaries, weekdays and market sessions looked up by binary search.
+#                        Get last prices of all symbols in batched quote requests, once per cycle.
+#                        Get historical prices of all symbols concurrently; API requests of all threads spaced by delay.
+#                        Broker client with keep-alive connection pool, timeouts and compressed responses for all API requests.
+#                        Token bucket rate limiter for API requests instead of fixed delay; throttled time counters.
+#                        Keep tokens in memory; refresh them ahead of expiry in background and save Trade_Config.ini atomically.
+#                        Cache historical prices of closed windows on disk; windows aligned so requests repeat.
+#                        Request historical prices only for gaps of stored prices; 1 min prices since the newest one.
+#                        Build 15 min and daily closes from 1 min prices; request coarse prices only where they are missing.
+#                        Streaming price feed (str_feed = Yes): 1 min bars and last prices pushed by Main_Feed.py; RSI updated on new bars.
+#                        Base URL of the API in str_api_url, e.g. Main_Emulator.py for offline load and latency tests.
+#                        Market hours of the next trading days cached in MarketHours.json; session flags switched by a timer.
+#                        Decode datetime and close of historical prices straight into arrays; no JSON tree of candles.
+#                        Order index by (symbol, period, type): market indicators and prior order buy price without nested scans.
+#                        BuySell status rows grouped by symbol; repetitions and Buy/Sell 'Yes' counts kept as statuses change.
+#                        RSI triggers of all orders and BuySell rows evaluated at once against the RSI matrix of the symbols.
+#                        Order statuses read from a snapshot of the orders of each account, taken once per cycle.
+#                        Order numbers of placed orders taken from the Location of the response; orders of the day listed only without it.
+#                        RSI sampling selected by str_rsi_sampling: Chain (default) samples prices back from the newest price as always;
+#                        Bars uses calendar and trading-time bars with RSI state kept incrementally. Bars moves RSI up to a few points
+#                        from Chain, which changes the orders placed by the triggers; use it only once the trigger levels are reviewed.
+#                        Connection errors and timeouts of API requests retried like failed responses; order placement not sent again.
+#                        Token errors of the background thread retried there; only the main thread exits on them.
+#                        Last prices of the streaming feed cleared when it drops; requested by api_GetLastPrices meanwhile.
+#                        Threads of historical prices do not exit; the main thread exits when a request exhausts its retries.
+#                        RSI convergence error measured against all prices of the same sampling, after history is loaded or backfilled.
+#                        Readers of price files raise ValueError on unreadable files; load_from_file exits on it.
 #
 # ==================================================================================================================
 # Pending items:
@@ -83,12 +117,20 @@
 #
 # ==================================================================================================================
 
+import bisect
+import concurrent.futures
 import configparser
+import copy
 import datetime
+import hashlib
 import json
+import numpy as np
 import os
+import re
 import requests
+import socket
 import sys
+import threading
 import time
 
 # from configparser import SafeConfigParser
@@ -96,21 +138,58 @@ from datetime import datetime, timedelta
 from operator import attrgetter
 from shutil import copyfile
 
-
-def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, StartDate, EndDate):
+# Binary columnar layout of Data/Stock_<SYMB>.bin (little-endian):
+#   header    magic 'ATPX', version uint32, records uint64 (16 bytes)
+#   column 1  date      int64   [records]  Epoch date in TDA format (milliseconds)
+#   column 2  price     float64 [records]  Stock price
+#   column 3  frequency int16   [records]  0 last price, 1 1min, 15 15min, 1440 1day
+# New prices are appended to Data/Stock_<SYMB>.<generation>.seg as packed records (date, price, frequency); 18 bytes each.
+# Compaction rewrites Stock_<SYMB>.bin from memory and deletes the segments of older generations.
+str_prices_file_magic   = b'ATPX'
+int_prices_file_version = 1
+dtype_prices_header     = np.dtype([('magic', 'S4'), ('version', '<u4'), ('records', '<u8')])
+dtype_prices_record     = np.dtype([('date', '<i8'), ('price', '<f8'), ('frequency', '<i2')])  # Segment record; also old Stock_<SYMB>.txt line
+
+# RSI Periods; intraday bars count trading time only, 6 AM to 7 PM on weekdays
+lst_rsi_periods = ['week', 'day', '4hr', '1hr', '30min', '15min']
+lst_rsi_columns = ['wk', 'day', '4hr', '1hr', '30m', '15m']  # Suffix of attributes rsi_, trigger_buy_rsi_ and trigger_sell_rsi_; lst_rsi_periods order
+dict_rsi_period_delta = {'4hr': (4 * 60 * 60 * 1000), '1hr': (1 * 60 * 60 * 1000), '30min': (30 * 60 * 1000), '15min': (15 * 60 * 1000)}
+float_rsi_tolerance   = 0.01  # RSI points; sets warm-up bars when RSI is calculated again, 0 uses all bars
+dict_rsi_lookback     = {}    # Closed bars by Period when RSI is calculated again; overrides float_rsi_tolerance
+str_rsi_sampling      = 'Chain'  # 'Chain': prices sampled back from the newest price; 'Bars': calendar and trading-time bars
+
+int_quotes_max_symbols = 200  # Symbols by quotes request
+
+# Close time of historical prices by Range, from begin of period: daily 3 PM New York Time, 15 min 14 min, 1 min 50 sec
+dict_history_close_offset = {1440: (15 * 60 * 60 * 1000), 15: (14 * 60 * 1000), 1: (50 * 1000)}
+
+# Fields of candles in pricehistory responses; values are numbers, so they are read without decoding JSON
+re_candle_datetime = re.compile(rb'"datetime"\s*:\s*(-?\d+)')
+re_candle_close    = re.compile(rb'"close"\s*:\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)')
+re_candle_empty    = re.compile(rb'"empty"\s*:\s*(true|false)')
+
+# Historical prices by Range: kept from/to (milliseconds before now), request window and a gap between prices worth a request
+dict_history_ranges = {1440: {'start': (3 * 365 * 24 * 60 * 60 * 1000), 'end': (3 * 30 * 24 * 60 * 60 * 1000), 'window': (3 * 30 * 24 * 60 * 60 * 1000), 'gap': (5 * 24 * 60 * 60 * 1000)},
+                         15: {'start': (3 * 30 * 24 * 60 * 60 * 1000),  'end': (5 * 24 * 60 * 60 * 1000),      'window': (5 * 24 * 60 * 60 * 1000),      'gap': (4 * 24 * 60 * 60 * 1000)},
+                          1: {'start': (5 * 24 * 60 * 60 * 1000),       'end': 0,                              'window': (5 * 24 * 60 * 60 * 1000),      'gap': (1 * 60 * 1000)}}
+
+
+
+def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, StartDate, EndDate, MinRecords=11, bool_exit_on_error=True):  # MinRecords 0 accepts any response, even empty
+    # Exits when retries are exhausted, or returns None if not bool_exit_on_error (threads of func_get_historical_prices)
     global str_token_access, str_consumer_key
 
     int_cnt_retry = 0
     int_cntr = 0
     str_api_status = 'No OK'  # Default value. Loop until Historical Prices are retrieved.
 
-    HistoricalPrices = []
+    HistoricalPrices = np.zeros(0, dtype=dtype_prices_record)
 
     while (str_api_status == 'No OK'):
 
         func_check_token()
 
-        url = r"https://api.tdameritrade.com/v1/marketdata/{}/pricehistory".format(Symb)
+        url = str_api_url + r"/marketdata/{}/pricehistory".format(Symb)
         params = {'apikey': str_consumer_key,
                   'periodType': PeriodType,
                   'frequencyType':  FrequencyType,
@@ -119,9 +198,12 @@ def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, S
                   'startDate': StartDate,
                   'needExtendedHoursData': 'true'}
         headers = {"Content-Type": "application/json", "Authorization": "Bearer " + str_token_access}
-        content = requests.get(url=url, headers=headers, params=params)  # make request
+        try:
+            content = obj_BrokerClient.get(url=url, headers=headers, params=params)  # make request
+        except requests.exceptions.RequestException as e:  # Connection error or timeout; retried as a failed response
+            content = "No Response: " + str(e)
 
-        if (content.status_code != 200):  # Display error if api not successful
+        if ((isinstance(content, str)) or (content.status_code != 200)):  # Display error if api not successful
             func_display_info(0, 'Both', ['-' * 128])
             int_cnt_retry = int_cnt_retry + 1
             func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
@@ -134,13 +216,20 @@ def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, S
             if (int_cnt_retry > int_max_retries):
                 func_display_info(0, 'Both', ['-' * 128])
                 func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetHistoricalPrices'])
+                if not (bool_exit_on_error):
+                    func_display_info(0, 'Both', ['-' * 128])
+                    return (None)
                 func_display_info(-1, 'Both', ['-' * 128])
 
-        if (content.status_code == 200):  # Process values if api-call successful
-            data = content.json()  # convert to python dictionary
-            func_display_info(90, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
+        elif (content.status_code == 200):  # Process values if api-call successful
+            if (int_debug >= 90):  # Response is converted to text only to be displayed
+                func_display_info(90, 'Both', ['data: ' + '>>>' + content.text + '<<<'])
+            bool_empty, arr_records = func_decode_price_history(content.content, Range)
 
-            if (data["empty"]):
+            if (bool_empty and (MinRecords == 0)):
+                func_display_info(80, 'Both', ['No new History Prices from api_GetHistoricalPrices: ' + Symb])
+                str_api_status = 'Ok'
+            elif (bool_empty):
                 func_display_info(0, 'Both', ['-' * 128])
                 int_cnt_retry = int_cnt_retry + 1
                 func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
@@ -157,15 +246,12 @@ def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, S
                     func_display_info(0, 'Both', ['-' * 128])
                     return (HistoricalPrices)
 
-            if (not data["empty"]):
-                for p in data['candles']:
-                    int_cntr = int_cntr + 1
-                    if (Range == 1440): HistoricalPrices.append([p['datetime'] + (15 * 60 * 60 * 1000), p['close'], Range])  # Default is 0 hours; Close time is 3 PM New York Time; need to add 15 hours
-                    if (Range ==   15): HistoricalPrices.append([p['datetime'] + (     14 * 60 * 1000), p['close'], Range])  # Default is begin-of-period; Close time is 14 min into the future; need to add 14 min
-                    if (Range ==    1): HistoricalPrices.append([p['datetime'] + (          50 * 1000), p['close'], Range])  # Default is begin-of-period; Close time is 50 sec into the future; need to add 50 sec
+            if (not bool_empty):
+                HistoricalPrices = arr_records
+                int_cntr = len(arr_records)
 
                 func_display_info(50, 'Both', ['Records retrieved from api_GetHistoricalPrices: ' + str(len(HistoricalPrices))])
-                if (int_cntr > 10):
+                if (int_cntr >= MinRecords):
                     str_api_status = 'Ok'
                 else:
                     func_display_info(0, 'Both', ['-' * 128])
@@ -175,75 +261,99 @@ def api_GetHistoricalPrices(Symb, Range, PeriodType, FrequencyType, Frequency, S
                     func_display_info(0, 'Both', [params])
                     func_display_info(0, 'Both', [headers])
                     func_display_info(0, 'Both', [content])
-                    func_display_info(0, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
+                    func_display_info(0, 'Both', ['data: ' + '>>>' + content.text + '<<<'])
                     func_display_info(0, 'Both', ['* * * ERROR * * * Less than 10 records received from api_GetHistoricalPrices.'])
                     func_display_info(0, 'Both', ['-' * 128])
                     if (int_cnt_retry > int_max_retries):
                         func_display_info(0, 'Both', ['-' * 128])
                         func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetHistoricalPrices'])
+                        if not (bool_exit_on_error):
+                            func_display_info(0, 'Both', ['-' * 128])
+                            return (None)
                         func_display_info(-1, 'Both', ['-' * 128])
 
     return(HistoricalPrices)
 
 def api_GetLastPrice(Symb):
+    return (api_GetLastPrices([Symb])[Symb])
+
+def api_GetLastPrices(lst_Symb):
     global str_token_access, str_consumer_key
     global int_max_retries
 
-    LastPrice = -1.23456789  # Default value. Loop until real LastPrice is retrieved.
+    dict_LastPrice = {}  # Last Price by Symbol. Loop until real LastPrice of all symbols is retrieved.
     int_cnt_retry = 0
 
-    while (LastPrice ==  -1.23456789):
+    while (len(dict_LastPrice) < len(set(lst_Symb))):
 
-        func_check_token()
+        lst_Symb_missing = [Symb for Symb in dict.fromkeys(lst_Symb) if Symb not in dict_LastPrice]
+        for int_first in range(0, len(lst_Symb_missing), int_quotes_max_symbols):
+            lst_Symb_request = lst_Symb_missing[int_first:(int_first + int_quotes_max_symbols)]
 
-        url = r"https://api.tdameritrade.com/v1/marketdata/{}/quotes".format(Symb)
-        params = {'apikey': str_consumer_key}
-        headers = {"Content-Type": "application/json", "Authorization": "Bearer " + str_token_access}
+            func_check_token()
 
-        #content = requests.get(url=url, headers=headers, params=params)  # make request
+            url = str_api_url + "/marketdata/quotes"
+            params = {'apikey': str_consumer_key, 'symbol': ','.join(lst_Symb_request)}
+            headers = {"Content-Type": "application/json", "Authorization": "Bearer " + str_token_access}
 
-        try:
-            content = requests.get(url=url, headers=headers, params=params)  # make request
+            try:
+                content = obj_BrokerClient.get(url=url, headers=headers, params=params)  # make request
+
+                if (content.status_code != 200):  # Display values if not successful
+                    func_display_info(0, 'Both', ['-' * 128])
+                    int_cnt_retry = int_cnt_retry + 1
+                    func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
+                    func_display_info(0, 'Both', [url])
+                    func_display_info(0, 'Both', [params])
+                    func_display_info(0, 'Both', [headers])
+                    func_display_info(0, 'Both', [content])
+                    func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get latest prices in api_GetLastPrices'])
+                    func_display_info(0, 'Both', ['-' * 128])
+                    if (int_cnt_retry> int_max_retries):
+                        func_display_info(0, 'Both', ['-' * 128])
+                        func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetLastPrices'])
+                        func_display_info(-1, 'Both', ['-' * 128])
+
+                if (content.status_code == 200):  # Process values if successful
+                    data = content.json()         # convert to python dictionary
+                    func_display_info(80, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
+
+                    for Symb in lst_Symb_request:  # Get value from selected records
+                        if ((Symb in data) and (data[Symb].get("lastPrice") is not None)):
+                            dict_LastPrice[Symb] = float(data[Symb].get("lastPrice"))
+
+                    if (len([Symb for Symb in lst_Symb_request if Symb not in dict_LastPrice]) > 0):
+                        func_display_info(0, 'Both', ['-' * 128])
+                        int_cnt_retry = int_cnt_retry + 1
+                        func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
+                        func_display_info(0, 'Both', [url])
+                        func_display_info(0, 'Both', [params])
+                        func_display_info(0, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
+                        func_display_info(0, 'Both', ['* * * ERROR * * * Missing latest prices in api_GetLastPrices'])
+                        func_display_info(0, 'Both', ['-' * 128])
+                        if (int_cnt_retry> int_max_retries):
+                            func_display_info(0, 'Both', ['-' * 128])
+                            func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetLastPrices'])
+                            func_display_info(-1, 'Both', ['-' * 128])
 
-            if (content.status_code != 200):  # Display values if not successful
+                    func_display_info(80, 'Both', ['LastPrice: ' + '>>>' + str(dict_LastPrice) + '<<<'])
+
+            except requests.exceptions.RequestException as e:  # Connection error or timeout
                 func_display_info(0, 'Both', ['-' * 128])
                 int_cnt_retry = int_cnt_retry + 1
                 func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
                 func_display_info(0, 'Both', [url])
                 func_display_info(0, 'Both', [params])
                 func_display_info(0, 'Both', [headers])
-                func_display_info(0, 'Both', [content])
-                func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get latest price in api_GetLastPrice'])
+                func_display_info(0, 'Both', [str(e)])
+                func_display_info(0, 'Both', ['* * * ERROR * * * Connection error to get latest prices in api_GetLastPrices'])
                 func_display_info(0, 'Both', ['-' * 128])
                 if (int_cnt_retry> int_max_retries):
                     func_display_info(0, 'Both', ['-' * 128])
-                    func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetLastPrice'])
+                    func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetLastPrices'])
                     func_display_info(-1, 'Both', ['-' * 128])
 
-            if (content.status_code == 200):  # Process values if successful
-                data = content.json()         # convert to python dictionary
-                func_display_info(80, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
-
-                for p in data.values(): LastPrice = float(p.get("lastPrice"))  # Get value from selected record
-
-                func_display_info(80, 'Both', ['LastPrice: ' + '>>>' + str(LastPrice) + '<<<'])
-
-        except requests.exceptions.ConnectionError:
-            func_display_info(0, 'Both', ['-' * 128])
-            int_cnt_retry = int_cnt_retry + 1
-            func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
-            func_display_info(0, 'Both', [url])
-            func_display_info(0, 'Both', [params])
-            func_display_info(0, 'Both', [headers])
-            #func_display_info(0, 'Both', [content])
-            func_display_info(0, 'Both', ['* * * ERROR * * * Connection error to get latest price in api_GetLastPrice'])
-            func_display_info(0, 'Both', ['-' * 128])
-            if (int_cnt_retry> int_max_retries):
-                func_display_info(0, 'Both', ['-' * 128])
-                func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetLastPrice'])
-                func_display_info(-1, 'Both', ['-' * 128])
-
-    return(LastPrice)
+    return(dict_LastPrice)
 
 def api_GetMarketHours(dt_trading_timestamp):
     global str_token_access, str_consumer_key
@@ -257,12 +367,15 @@ def api_GetMarketHours(dt_trading_timestamp):
 
         func_check_token()
 
-        url = r"https://api.tdameritrade.com/v1/marketdata/{}/hours".format('EQUITY')
+        url = str_api_url + r"/marketdata/{}/hours".format('EQUITY')
         params = {'apikey': str_consumer_key, 'date': dt_trading_timestamp}
         headers = {"Content-Type": "application/json", "Authorization": "Bearer " + str_token_access}
-        content = requests.get(url=url, headers=headers, params=params)  # make request
+        try:
+            content = obj_BrokerClient.get(url=url, headers=headers, params=params)  # make request
+        except requests.exceptions.RequestException as e:  # Connection error or timeout; retried as a failed response
+            content = "No Response: " + str(e)
 
-        if (content.status_code != 200):  # Display error if api not successful
+        if ((isinstance(content, str)) or (content.status_code != 200)):  # Display error if api not successful
             func_display_info(0, 'Both', ['-' * 128])
             int_cnt_retry = int_cnt_retry + 1
             func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
@@ -277,7 +390,7 @@ def api_GetMarketHours(dt_trading_timestamp):
                 func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetMarketHours'])
                 func_display_info(-1, 'Both', ['-' * 128])
 
-        if (content.status_code == 200):  # Process values if api-call successful
+        elif (content.status_code == 200):  # Process values if api-call successful
             data = content.json()         # convert to python dictionary
             func_display_info(80, 'Both', ['data: ' + '>>>' + str(data) + '<<<'])
 
@@ -286,6 +399,7 @@ def api_GetMarketHours(dt_trading_timestamp):
                 if (bool_isOpen == False):  # Market is close
                     str_isOpen = 'False'
                     func_display_info(0, 'Both', ['str_isOpen             : ' + str_isOpen])
+                    obj_SessionCalendar.set_market_hours(func_ny_time_to_epoch(dt_trading_timestamp), [])
                     str_api_status = 'Ok'
                 if (bool_isOpen == True):  # Market should not be open
                     if (bool_isOpen):
@@ -333,10 +447,15 @@ def api_GetMarketHours(dt_trading_timestamp):
                         dt_regularMarket_end   = datetime.strptime(str_regularMarket_end[0:19], '%Y-%m-%dT%H:%M:%S')
                         dt_postMarket_start    = datetime.strptime(str_postMarket_start[0:19], '%Y-%m-%dT%H:%M:%S')
                         dt_postMarket_end      = datetime.strptime(str_postMarket_end[0:19], '%Y-%m-%dT%H:%M:%S')
+                        obj_SessionCalendar.set_market_hours(func_ny_time_to_epoch(dt_trading_timestamp),
+                                                             [func_ny_time_to_epoch(dt_preMarket_start), func_ny_time_to_epoch(dt_preMarket_end),
+                                                              func_ny_time_to_epoch(dt_regularMarket_start), func_ny_time_to_epoch(dt_regularMarket_end),
+                                                              func_ny_time_to_epoch(dt_postMarket_start), func_ny_time_to_epoch(dt_postMarket_end)])
                         str_api_status = 'Ok'
                     else:
                         str_isOpen = 'False'
                         func_display_info(0, 'Both', ['str_isOpen             : ' + str_isOpen])
+                        obj_SessionCalendar.set_market_hours(func_ny_time_to_epoch(dt_trading_timestamp), [])
                         str_api_status = 'Ok'
                 else:
                     func_display_info(0, 'Both', ['-' * 128])
@@ -357,11 +476,33 @@ def api_GetMarketHours(dt_trading_timestamp):
 
     return()
 
+def api_GetOrder(str_account, OrderNumber):
+    # Order of the account by number, with its child orders; None if not available
+    global str_token_access
+    func_check_token()
+
+    url = str_api_url + r"/accounts/{}/orders/{}".format(str_account, OrderNumber)
+    headers = {"HTTP_HOST": "http://localhost", "Authorization": "Bearer " + str_token_access}
+
+    try:
+        content = obj_BrokerClient.get(url=url, params={}, headers=headers)  # make a request
+    except requests.exceptions.RequestException as e:  # Connection error or timeout; func_place_order lists the orders of the day
+        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get order ' + str(OrderNumber) + ' in api_GetOrder: ' + str(e)])
+        return (None)
+
+    if (content.status_code != 200):
+        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get order ' + str(OrderNumber) + ' in api_GetOrder: ' + str(content)])
+        return (None)
+
+    data = content.json()  # convert to python dictionary
+    func_display_info(90, 'Both', [data])
+    return (data)
+
 def api_GetOrderByPath(OrderType, BuySell, obj_LineOrderStatus):  # OrderType is 'Single' or 'Conditional'
     global str_token_access, obj_ListLineOrderStatus
-    func_check_token()
+    global int_max_retries
 
-    url = r"https://api.tdameritrade.com/v1/accounts/{}/orders".format(func_get_account(obj_LineOrderStatus.acct_desc))
+    url = str_api_url + r"/accounts/{}/orders".format(func_get_account(obj_LineOrderStatus.acct_desc))
 
     params = {'maxResults': 500,
               'fromEnteredTime': datetime.now().strftime("%Y-%m-%d"),
@@ -369,20 +510,37 @@ def api_GetOrderByPath(OrderType, BuySell, obj_LineOrderStatus):  # OrderType is
               'status': ''  # No value because it could be FILLED already
               }
 
-    headers = {"HTTP_HOST": "http://localhost", "Authorization": "Bearer " + str_token_access}
+    int_cnt_retry = 0
+    str_api_status = 'No OK'  # Default value. Loop until the list of orders is retrieved.
 
-    content = requests.get(url=url, params=params, headers=headers)  # make a request
+    while (str_api_status == 'No OK'):
+        func_check_token()
 
-    if (content.status_code != 200):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['OrderType = ' + OrderType])
-        func_display_info(0, 'Both', ['BuySell = ' + BuySell])
-        func_display_info(0, 'Both', [url])
-        func_display_info(0, 'Both', [params])
-        func_display_info(0, 'Both', [headers])
-        func_display_info(0, 'Both', [content])
-        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get list of orders in api_GetOrderByPath'])
-        func_display_info(-1, 'Both', ['-' * 128])
+        headers = {"HTTP_HOST": "http://localhost", "Authorization": "Bearer " + str_token_access}
+
+        try:
+            content = obj_BrokerClient.get(url=url, params=params, headers=headers)  # make a request
+        except requests.exceptions.RequestException as e:  # Connection error or timeout; retried as a failed response
+            content = "No Response: " + str(e)
+
+        if ((isinstance(content, str)) or (content.status_code != 200)):
+            func_display_info(0, 'Both', ['-' * 128])
+            int_cnt_retry = int_cnt_retry + 1
+            func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
+            func_display_info(0, 'Both', ['OrderType = ' + OrderType])
+            func_display_info(0, 'Both', ['BuySell = ' + BuySell])
+            func_display_info(0, 'Both', [url])
+            func_display_info(0, 'Both', [params])
+            func_display_info(0, 'Both', [headers])
+            func_display_info(0, 'Both', [content])
+            func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get list of orders in api_GetOrderByPath'])
+            func_display_info(0, 'Both', ['-' * 128])
+            if (int_cnt_retry > int_max_retries):
+                func_display_info(0, 'Both', ['-' * 128])
+                func_display_info(0, 'Both', ['* * * ERROR * * * Max number of retries exhausted in api_GetOrderByPath'])
+                func_display_info(-1, 'Both', ['-' * 128])
+        else:
+            str_api_status = 'Ok'
 
     data = content.json()  # convert to python dictionary
     func_display_info(90, 'Both', [data])
@@ -515,11 +673,11 @@ def api_GetOrderByPath(OrderType, BuySell, obj_LineOrderStatus):  # OrderType is
         # Eliminate orders already in use
         for obj_LineOrderStatusOrderSearch in obj_ListLineOrderStatus.List:
             if (obj_LineOrderStatusOrderSearch.order_buy_number in ListOrderSubmittedBuy):
-                index = ListOrderSubmitted.index(obj_LineOrderStatusOrderSearch.order_buy_number)
+                index = ListOrderSubmittedBuy.index(obj_LineOrderStatusOrderSearch.order_buy_number)
                 ListOrderSubmittedBuy.pop(index)
                 ListOrderSubmittedSell.pop(index)
             if (obj_LineOrderStatusOrderSearch.order_sell_number in ListOrderSubmittedSell):
-                index = ListOrderSubmitted.index(obj_LineOrderStatusOrderSearch.order_sell_number)
+                index = ListOrderSubmittedSell.index(obj_LineOrderStatusOrderSearch.order_sell_number)
                 ListOrderSubmittedBuy.pop(index)
                 ListOrderSubmittedSell.pop(index)
 
@@ -544,25 +702,30 @@ def api_GetOrderStatus(BuySell, obj_LineOrderStatus):
 
     OrderStatus = 'No OK'  # Default value. Loop until Order Status is retrieved.
 
+    if (BuySell == 'BUY'):
+        OrderNumber = obj_LineOrderStatus.order_buy_number
+    if (BuySell == 'SELL'):
+        OrderNumber = obj_LineOrderStatus.order_sell_number
+
+    data = obj_OrderSnapshot.get(func_get_account(obj_LineOrderStatus.acct_desc), OrderNumber)  # Orders of the account in this cycle
+    if (data is not None):
+        OrderStatus = 'OK'
+        url, params, headers, content = 'Order snapshot', {}, {}, 'Order snapshot'  # Displayed on errors below
+
     int_cnt_retry = 0
     while (OrderStatus == 'No OK'):
         func_check_token()
 
-        if (BuySell == 'BUY'):
-            OrderNumber = obj_LineOrderStatus.order_buy_number
-        if (BuySell == 'SELL'):
-            OrderNumber = obj_LineOrderStatus.order_sell_number
-
-        url = r"https://api.tdameritrade.com/v1/accounts/{}/orders/{}".format(func_get_account(obj_LineOrderStatus.acct_desc), OrderNumber)
+        url = str_api_url + r"/accounts/{}/orders/{}".format(func_get_account(obj_LineOrderStatus.acct_desc), OrderNumber)
         params = {}
         headers = {"HTTP_HOST": "http://localhost", "Authorization": "Bearer " + str_token_access}
         
         try:  # error received: port=443): requests.exceptions.ConnectionError: HTTPSConnectionPool(host='api.tdameritrade.com', port=443): Max retries exceeded with url: /v1/accounts/870491859/orders/2225244376 (Caused by NewConnectionError('<urllib3.connection.VerifiedHTTPSConnection object at 0x000000F9A324C370>: Failed to establish a new connection: [Errno 11001] getaddrinfo failed'))
-            content = requests.get(url=url, params=params, headers=headers)  # make a request
-        except requests.exceptions.ConnectionError as e:
-            content = "No Response"
+            content = obj_BrokerClient.get(url=url, params=params, headers=headers)  # make a request
+        except requests.exceptions.RequestException as e:  # Connection error or timeout; retried as a failed response
+            content = "No Response: " + str(e)
 
-        if ((content.status_code != 200) or (content == "No Response")):
+        if ((isinstance(content, str)) or (content.status_code != 200)):
             func_display_info(0, 'Both', ['-' * 128])
             int_cnt_retry = int_cnt_retry + 1
             func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
@@ -579,8 +742,8 @@ def api_GetOrderStatus(BuySell, obj_LineOrderStatus):
                 func_display_info(-1, 'Both', ['-' * 128])
         else:
             OrderStatus = 'OK'
+            data = content.json()  # convert to python dictionary
 
-    data = content.json()  # convert to python dictionary
     func_display_info(90, 'Both', [data])
 
     ListOrderSubmitted = []
@@ -655,10 +818,41 @@ def api_GetOrderStatus(BuySell, obj_LineOrderStatus):
     else:
         return ("Not_Found")
 
-def api_GetTokenAuthorization(TokenType):
+def api_GetOrders(str_account, int_days):
+    # Orders of the account entered in the last int_days days, with their child orders; None if not available
+    global str_token_access
+    func_check_token()
+
+    url = str_api_url + r"/accounts/{}/orders".format(str_account)
+
+    params = {'maxResults': 500,
+              'fromEnteredTime': (datetime.now() - timedelta(days=int_days)).strftime("%Y-%m-%d"),
+              'toEnteredTime': datetime.now().strftime("%Y-%m-%d"),
+              'status': ''  # All statuses
+              }
+
+    headers = {"HTTP_HOST": "http://localhost", "Authorization": "Bearer " + str_token_access}
+
+    try:
+        content = obj_BrokerClient.get(url=url, params=params, headers=headers)  # make a request
+    except requests.exceptions.RequestException as e:  # Connection error or timeout; order statuses are requested one by one
+        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get orders of account ' + str(str_account) + ' in api_GetOrders: ' + str(e)])
+        return (None)
+
+    if (content.status_code != 200):
+        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get orders of account ' + str(str_account) + ' in api_GetOrders: ' + str(content)])
+        return (None)
+
+    data = content.json()  # convert to python dictionary
+    func_display_info(90, 'Both', [data])
+    return (data)
+
+def api_GetTokenAuthorization(TokenType, bool_exit_on_error=True):
+    # 'Ok' when the token is renewed. On errors exits, or returns 'No OK' if not bool_exit_on_error (background thread of cls_TokenManager)
     global str_token_access, str_token_refresh, str_consumer_key
+    global int_max_retries
 
-    url = "https://api.tdameritrade.com/v1/oauth2/token"
+    url = str_api_url + "/oauth2/token"
 
     # define data
     dataTokenAccess =  {
@@ -677,17 +871,35 @@ def api_GetTokenAuthorization(TokenType):
 
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-    content = requests.post(url=url, headers=headers, data=data)  # make a request
+    int_cnt_retry = 0
+    str_api_status = 'No OK'  # Default value. Loop until the token is retrieved.
 
-    if (content.status_code != 200):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['TokenType = ' + TokenType])
-        func_display_info(0, 'Both', [url])
-        func_display_info(0, 'Both', [data])
-        func_display_info(0, 'Both', [headers])
-        func_display_info(0, 'Both', [content])
-        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get token authorization for TokenType: ' + TokenType + ' in api_GetTokenAuthorization'])
-        func_display_info(-1, 'Both', ['-' * 128])
+    while (str_api_status == 'No OK'):
+        try:
+            content = obj_BrokerClient.post(url=url, headers=headers, data=data)  # make a request
+        except requests.exceptions.RequestException as e:  # Connection error or timeout; retried as a failed response
+            content = "No Response: " + str(e)
+
+        if ((isinstance(content, str)) or (content.status_code != 200)):
+            func_display_info(0, 'Both', ['-' * 128])
+            int_cnt_retry = int_cnt_retry + 1
+            func_display_info(0, 'Both', ['int_cnt_retry: ' + str(int_cnt_retry)])
+            func_display_info(0, 'Both', ['TokenType = ' + TokenType])
+            func_display_info(0, 'Both', [url])
+            func_display_info(0, 'Both', [data])
+            func_display_info(0, 'Both', [headers])
+            func_display_info(0, 'Both', [content])
+            func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get token authorization for TokenType: ' + TokenType + ' in api_GetTokenAuthorization'])
+            func_display_info(0, 'Both', ['-' * 128])
+            if ((not isinstance(content, str)) or (int_cnt_retry > int_max_retries)):  # Token refused exits; no response retried up to int_max_retries
+                func_display_info(0, 'Both', ['-' * 128])
+                func_display_info(0, 'Both', ['* * * ERROR * * * No token authorization in api_GetTokenAuthorization'])
+                if not (bool_exit_on_error):
+                    func_display_info(0, 'Both', ['-' * 128])
+                    return ('No OK')
+                func_display_info(-1, 'Both', ['-' * 128])
+        else:
+            str_api_status = 'Ok'
 
     data = content.json()  # convert to python dictionary
     func_display_info(50, 'Both', [str(data)])
@@ -705,6 +917,8 @@ def api_GetTokenAuthorization(TokenType):
         #DisplayInfo(10, 'Both', ['TokenRefresh:', data])
         str_token_refresh = data['refresh_token']
 
+    return ('Ok')
+
 def api_PlaceOrder(OrderType, BuySell, obj_LineOrderStatus):
     # OrderType is 'Single' or 'Conditional'
     global str_token_access
@@ -716,7 +930,7 @@ def api_PlaceOrder(OrderType, BuySell, obj_LineOrderStatus):
     else:
         SessionValue = "SEAMLESS"   # place order anytime
 
-    url = r"https://api.tdameritrade.com/v1/accounts/{}/orders".format(func_get_account(obj_LineOrderStatus.acct_desc))
+    url = str_api_url + r"/accounts/{}/orders".format(func_get_account(obj_LineOrderStatus.acct_desc))
 
     if (OrderType == 'Single'):
         if (BuySell == 'BUY'):
@@ -804,7 +1018,19 @@ def api_PlaceOrder(OrderType, BuySell, obj_LineOrderStatus):
 
     headers = {"Content-Type": "application/json", "Authorization": "Bearer " + str_token_access}
 
-    content = requests.post( url=url, headers=headers, json=json)  # make a request
+    try:
+        content = obj_BrokerClient.post(url=url, headers=headers, json=json)  # make a request
+    except requests.exceptions.RequestException as e:
+        # Not sent again: the order may be placed even with no response. func_place_order looks it up in the orders of the day.
+        func_display_info(0, 'Both', ['-' * 128])
+        func_display_info(0, 'Both', ['OrderType = ' + OrderType])
+        func_display_info(0, 'Both', ['BuySell = ' + BuySell])
+        func_display_info(0, 'Both', [url])
+        func_display_info(0, 'Both', [json])
+        func_display_info(0, 'Both', [str(e)])
+        func_display_info(0, 'Both', ['* * * ERROR * * * No response to place order in api_PlaceOrder; order looked up in the orders of the day'])
+        func_display_info(0, 'Both', ['-' * 128])
+        return("Transition", None)
 
     if (content.status_code != 201):
         func_display_info(0, 'Both', ['-' * 128])
@@ -818,10 +1044,148 @@ def api_PlaceOrder(OrderType, BuySell, obj_LineOrderStatus):
         func_display_info(-1, 'Both', ['-' * 128])
 
     # data = content.json() # convert to python dictionary - there is no data returned, except status_code below
+    # The Location header is the url of the new order: .../accounts/{account}/orders/{orderId}
+    obj_match_order = re.search(r'/orders/(\d+)/?$', content.headers.get('Location', ''))
+    OrderNumber = int(obj_match_order.group(1)) if (obj_match_order is not None) else None
+
+    func_display_info(10, 'Both', ['Placed Order. Order Info: ' + str(obj_LineOrderStatus.symbol) + ' ' + str(OrderType) + ' ' + str(BuySell) + ' ' + str(OrderNumber)])
+
+    return("Transition", OrderNumber)
+
+class cls_BrokerClient:
+    # HTTP requests of all api_* functions and threads; keep-alive connections to the broker, compressed responses
+    def __init__(self, float_timeout, int_connections):  # attributes
+        self.timeout = float_timeout          # Seconds to connect and to wait for response
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=int_connections, pool_block=True))  # int_connections by host
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=int_connections, pool_block=True))   # Local emulator
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+    def get(self, url, headers, params):
+        return (self.session.get(url=url, headers=headers, params=params, timeout=self.timeout))
+
+    def post(self, url, headers, data=None, json=None):
+        return (self.session.post(url=url, headers=headers, data=data, json=json, timeout=self.timeout))
+
+class cls_FeedClient:
+    # Streaming price feed: one JSON message by line over TCP (see Main_Feed.py). A background thread keeps 1 min bars and
+    # last prices of the subscribed symbols until they are taken by cls_ListLineMarketIndicators.load; reconnects if dropped.
+    def __init__(self, str_host, int_port):  # attributes
+        self.str_host = str_host
+        self.int_port = int_port
+        self.lst_symbols = []
+        self.dict_bars = {}                # 1 min prices [date, close, 1] by symbol; not taken yet
+        self.dict_last_price = {}          # Last price (date, price) by symbol; cleared when the feed drops
+        self.int_messages = 0
+        self.lock = threading.Lock()
+        self.event_bar = threading.Event() # Set when 1 min bars are waiting
+        self.event_stop = threading.Event()
+        self.obj_socket = None
+        self.obj_thread = None
 
-    func_display_info(10, 'Both', ['Placed Order. Order Info: ' + str(obj_LineOrderStatus.symbol) + ' ' + str(OrderType) + ' ' + str(BuySell)])
-
-    return("Transition")
+    def print(self):
+        return ('Feed messages: ' + str(self.int_messages))
+
+    def receive(self, dict_message):
+        with self.lock:
+            self.int_messages = self.int_messages + 1
+            if (dict_message.get('service') == 'CHART'):  # Begin of 1 min bar; close time as api_GetHistoricalPrices
+                self.dict_bars.setdefault(dict_message['key'], []).append([int(dict_message['datetime']) + dict_history_close_offset[1], float(dict_message['close']), 1])
+                self.event_bar.set()
+            elif (dict_message.get('service') == 'QUOTE'):
+                self.dict_last_price[dict_message['key']] = (int(dict_message['datetime']), float(dict_message['lastPrice']))
+
+    def run(self):
+        while not (self.event_stop.is_set()):
+            try:
+                self.obj_socket = socket.create_connection((self.str_host, self.int_port), timeout=60)  # Heartbeats every 10 seconds
+                with self.obj_socket, self.obj_socket.makefile('rwb') as io_feed:
+                    io_feed.write((json.dumps({'command': 'SUBS', 'keys': self.lst_symbols}) + '\n').encode('utf-8'))
+                    io_feed.flush()
+                    func_display_info(20, 'Both', ['Feed connected: ' + self.str_host + ':' + str(self.int_port) + ' symbols: ' + str(len(self.lst_symbols))])
+                    for bytes_line in io_feed:
+                        self.receive(json.loads(bytes_line))
+                func_display_info(20, 'Both', ['Feed closed: ' + self.str_host + ':' + str(self.int_port)])
+            except (OSError, ValueError, KeyError) as e:  # Prices missed meanwhile are requested as 1 min historical prices
+                if not (self.event_stop.is_set()):
+                    func_display_info(0, 'Both', ['* * * ERROR * * * Feed dropped in cls_FeedClient: ' + str(e)])
+            with self.lock:  # Last prices are not updated while disconnected; requested by api_GetLastPrices until new quotes arrive
+                self.dict_last_price = {}
+            self.event_stop.wait(5)
+
+    def start(self, lst_symbols):
+        self.lst_symbols = list(lst_symbols)
+        self.obj_thread = threading.Thread(target=self.run, name='FeedClient', daemon=True)
+        self.obj_thread.start()
+
+    def stop(self):
+        self.event_stop.set()
+        if (self.obj_socket is not None):
+            try:
+                self.obj_socket.shutdown(socket.SHUT_RDWR)  # Unblock the read of the background thread
+            except OSError:
+                pass
+
+    def take(self):
+        # 1 min bars received since the last call and the last price of each symbol
+        with self.lock:
+            dict_bars, self.dict_bars = self.dict_bars, {}
+            self.event_bar.clear()
+            return (dict_bars, dict(self.dict_last_price))
+
+    def wait(self, float_timeout):
+        # Wait until 1 min bars arrive; True if any
+        return (self.event_bar.wait(float_timeout))
+
+class cls_HistoryCache:
+    # Historical prices of windows closed before today, which never change: a file by request of api_GetHistoricalPrices,
+    # named by hash of the request (symbol, frequency, start, end). Files not used for int_max_days or beyond
+    # int_max_bytes (least recently used first) are removed.
+    def __init__(self, str_path_dir, int_max_bytes, int_max_days):  # attributes
+        self.path_dir   = str_path_dir
+        self.max_bytes  = int_max_bytes
+        self.max_days   = int_max_days
+        self.int_hits   = 0
+        self.int_misses = 0
+        os.makedirs(str_path_dir, exist_ok=True)
+
+    def evict(self):
+        lst_files = []
+        for obj_entry in os.scandir(self.path_dir):
+            if (obj_entry.name.endswith('.bin')):
+                lst_files.append((obj_entry.stat().st_mtime, obj_entry.stat().st_size, obj_entry.path))
+        lst_files.sort(reverse=True)  # Most recently used first
+        float_time_oldest = time.time() - (self.max_days * 24 * 60 * 60)
+        int_bytes = 0
+        for float_time_used, int_size, str_file in lst_files:
+            int_bytes = int_bytes + int_size
+            if ((int_bytes > self.max_bytes) or (float_time_used < float_time_oldest)):
+                os.remove(str_file)
+        func_display_info(60, 'Both', ['History cache hits: ' + str(self.int_hits) + ' misses: ' + str(self.int_misses) + ' files: ' + str(len(lst_files))])
+
+    def file(self, tup_request):
+        return (self.path_dir + '\History_' + hashlib.sha1('|'.join([str(objValue) for objValue in tup_request]).encode()).hexdigest() + '.bin')
+
+    def get(self, tup_request):
+        str_file = self.file(tup_request)
+        if not (os.path.isfile(str_file)):
+            self.int_misses = self.int_misses + 1
+            return (None)
+        arr_records = np.fromfile(str_file, dtype=dtype_prices_record)
+        os.utime(str_file)  # Last used
+        self.int_hits = self.int_hits + 1
+        return (arr_records)
+
+    def is_closed(self, tup_request, int_date_today):
+        # 1 min prices are requested up to now; daily and 15 min windows ending before today are closed.
+        # Requests accepting any response (MinRecords given) may be incomplete and are not cached.
+        return ((tup_request[1] != 1) and (tup_request[6] <= int_date_today) and (len(tup_request) == 7))
+
+    def put(self, tup_request, arr_records):
+        str_file = self.file(tup_request)
+        with open(str_file + '.tmp', 'wb') as outF:
+            outF.write(arr_records.tobytes())
+        os.replace(str_file + '.tmp', str_file)
 
 class cls_LineBuySellStatus:
     def __init__(self, obj_LineOrderStatus):  # attributes
@@ -886,31 +1250,16 @@ class cls_LineBuySellStatus:
         if ((self.buy_percentage != 0) or (self.sell_percentage != 0)):
            func_display_info(20, 'Both', [str_line])
 
-    def update(self, obj_LineMarketIndicators):  
+    def update(self, obj_LineMarketIndicators, bool_buy_trigger, bool_sell_trigger):
+        # Triggers evaluated by func_eval_triggers for all rows
         self.current_rsi_wk  = obj_LineMarketIndicators.rsi_wk
         self.current_rsi_day = obj_LineMarketIndicators.rsi_day
         self.current_rsi_4hr = obj_LineMarketIndicators.rsi_4hr
         self.current_rsi_1hr = obj_LineMarketIndicators.rsi_1hr
         self.current_rsi_30m = obj_LineMarketIndicators.rsi_30m
         self.current_rsi_15m = obj_LineMarketIndicators.rsi_15m
-        if ((self.trigger_buy_rsi_wk  > self.current_rsi_wk ) and
-            (self.trigger_buy_rsi_day > self.current_rsi_day) and
-            (self.trigger_buy_rsi_4hr > self.current_rsi_4hr) and
-            (self.trigger_buy_rsi_1hr > self.current_rsi_1hr) and
-            (self.trigger_buy_rsi_30m > self.current_rsi_30m) and
-            (self.trigger_buy_rsi_15m > self.current_rsi_15m )):
-            self.buy_status = 'Yes'
-        else:
-            self.buy_status = 'No '
-        if ((self.trigger_sell_rsi_wk  < self.current_rsi_wk ) and
-            (self.trigger_sell_rsi_day < self.current_rsi_day) and
-            (self.trigger_sell_rsi_4hr < self.current_rsi_4hr) and
-            (self.trigger_sell_rsi_1hr < self.current_rsi_1hr) and
-            (self.trigger_sell_rsi_30m < self.current_rsi_30m) and
-            (self.trigger_sell_rsi_15m < self.current_rsi_15m)):
-            self.sell_status = 'Yes'
-        else:
-            self.sell_status = 'No '
+        self.buy_status  = 'Yes' if (bool_buy_trigger ) else 'No '
+        self.sell_status = 'Yes' if (bool_sell_trigger) else 'No '
 
 class cls_LineMarketIndicators:
     def __init__(self, symbol):  # attributes
@@ -918,20 +1267,35 @@ class cls_LineMarketIndicators:
         self.symbol      = symbol
         self.last_update = 0            # Seconds since last update
         self.need_load_from_file = 'Yes'     # Set to load prices from file
-        self.list_prices =  [
-                                # {
-                                #     'date':  0,    Epoch date
-                                #     'price': 0,    Stock price
-                                #     'frequency': 0 0 - last price,
-                                #                    1 1min,
-                                #                    5 5min,
-                                #                   15 15min,
-                                #                   30 30min
-                                #                   60 60min
-                                #       24 * 60 = 1440 1day
-                                #  7 * 24 * 60 = 10087 1wk
-                                # }
-                            ]
+        self.need_gap_scan = 'Yes'           # Set to search holes of stored prices; otherwise only after the newest price
+        self.set_history_requested = set()   # Windows of historical prices requested in this run, not repeated for holes without prices
+        self.need_compaction = 'No'          # Set to rewrite binary file with all prices on next save
+        self.list_prices_unsaved = []        # Prices not yet appended to the segment file
+        self.dict_date_saved = {}            # Most recent date saved (or queued to save) by frequency
+        self.int_records_base = 0            # Records in binary file
+        self.int_records_segment = 0         # Records in segment files
+        self.int_generation = 1              # Generation of the segment file receiving appends
+        self.obj_thread_compaction = None    # Background compaction
+        self.need_normalization = 'No'       # Set to cleanse all prices, not only the most recent ones
+        self.need_convergence_check = 'No'   # Set when history is loaded or backfilled; RSI error of bounded lookback reported (int_debug 60)
+        self.list_prices_new = []            # Prices received since last cleansing; merged into the arrays below
+        # Prices sorted newest first; one array per column
+        #     arr_dates:     Epoch date
+        #     arr_prices:    Stock price
+        #     arr_frequency: 0 - last price,
+        #                    1 1min,
+        #                    5 5min,
+        #                   15 15min,
+        #                   30 30min
+        #                   60 60min
+        #       24 * 60 = 1440 1day
+        #  7 * 24 * 60 = 10087 1wk
+        self.arr_dates     = np.zeros(0, dtype='<i8')
+        self.arr_prices    = np.zeros(0, dtype='<f8')
+        self.arr_frequency = np.zeros(0, dtype='<i2')
+        self.dict_rsi_state = {}             # RSI state of closed bars by Period
+        for Period in lst_rsi_periods:
+            self.dict_rsi_state[Period] = cls_RsiState(Period)
         self.rsi_wk     = 0.0
         self.rsi_day    = 0.0
         self.rsi_4hr    = 0.0
@@ -940,319 +1304,220 @@ class cls_LineMarketIndicators:
         self.rsi_15m    = 0.0
         self.last_price = 0.0
 
+    def add_prices(self, list_prices_new):
+        # Prices newer than the last saved price of the same frequency are queued for the segment file
+        dict_date_saved = dict(self.dict_date_saved)
+        for objPrice in list_prices_new:
+            if ((objPrice[1] != 0) and (objPrice[0] > dict_date_saved.get(objPrice[2], 0))):
+                self.list_prices_unsaved.append(objPrice)
+                if (objPrice[0] > self.dict_date_saved.get(objPrice[2], 0)):
+                    self.dict_date_saved[objPrice[2]] = objPrice[0]
+        self.list_prices_new.extend(list_prices_new)
+
     def load_from_file(self, DateTimeNow_UnixEpoch_TDAFormat):
         if (self.need_load_from_file == 'Yes'):
             self.need_load_from_file = 'No'
-            if (os.path.isfile('Stock_' + self.symbol.strip() + '.txt')):                                # History already exists
+            str_file = str_path_dir_Data + '\Stock_' + self.symbol.strip()
+            lst_segments = func_list_prices_segments(str_path_dir_Data, self.symbol.strip())
+            if (os.path.isfile(str_file + '.bin') or os.path.isfile(str_file + '.txt') or (len(lst_segments) > 0)):  # History already exists
                 func_display_info(20, 'Both', ['Load from file Historical Prices ' + self.symbol.strip()])
-                self.last_update = int(os.path.getctime('Stock_' + self.symbol.strip() + '.txt') * 1000)
-                with open('Stock_' + self.symbol.strip() + '.txt') as file:
-                    for str_line in file:
-                        str_line = str_line.strip()
-                        #print(line + ' ' + str(len(self.list_prices)))
-                        self.list_prices.append([int(str_line[0:15].strip()), float(str_line[16:31].strip()), int(str_line[32:42].strip())])
-                if (len(self.list_prices) < 100):  # If no records - or little records on file -, load prices from Online
+                try:
+                    lst_arr_dates, lst_arr_prices, lst_arr_frequency = [], [], []
+                    if (os.path.isfile(str_file + '.bin')):                                                 # Binary columnar file; memory-mapped
+                        self.last_update = int(os.path.getmtime(str_file + '.bin') * 1000)
+                        arr_dates, arr_prices, arr_frequency = func_load_prices_binary(str_file + '.bin')
+                        self.int_records_base = len(arr_dates)
+                    elif (os.path.isfile(str_file + '.txt')):                                               # Old fixed-width text file
+                        self.last_update = int(os.path.getmtime(str_file + '.txt') * 1000)
+                        arr_dates, arr_prices, arr_frequency = func_load_prices_text(str_file + '.txt')
+                        self.need_compaction = 'Yes'
+                    else:                                                                                   # Segments only; binary file not written yet
+                        self.last_update = 0
+                        arr_dates, arr_prices, arr_frequency = np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<f8'), np.zeros(0, dtype='<i2')
+                        self.need_compaction = 'Yes'
+                    lst_arr_dates.append(arr_dates)
+                    lst_arr_prices.append(arr_prices)
+                    lst_arr_frequency.append(arr_frequency)
+                    for int_generation, str_file_segment in lst_segments:                                  # Segments from prior runs, oldest generation first
+                        arr_dates, arr_prices, arr_frequency = func_load_prices_segment(str_file_segment)
+                        lst_arr_dates.append(arr_dates)
+                        lst_arr_prices.append(arr_prices)
+                        lst_arr_frequency.append(arr_frequency)
+                        self.last_update = max(self.last_update, int(os.path.getmtime(str_file_segment) * 1000))
+                        self.int_records_segment = self.int_records_segment + len(arr_dates)
+                        self.int_generation = int_generation + 1                                            # Appends of this run go to a new segment
+                        self.need_compaction = 'Yes'                                                        # Fold segments of prior runs into binary file
+                    if (len(lst_arr_dates) == 1):                                                           # Binary file only; keep memory-mapped arrays
+                        self.arr_dates, self.arr_prices, self.arr_frequency = lst_arr_dates[0], lst_arr_prices[0], lst_arr_frequency[0]
+                    else:
+                        self.arr_dates     = np.concatenate(lst_arr_dates)
+                        self.arr_prices    = np.concatenate(lst_arr_prices)
+                        self.arr_frequency = np.concatenate(lst_arr_frequency)
+                except ValueError as e:                                                                 # Stored prices cannot be read
+                    func_display_info(0, 'Both', ['-' * 128])
+                    func_display_info(0, 'Both', ['* * * ERROR * * * ' + str(e)])
+                    func_display_info(0, 'Both', ['* * * ERROR * * * Unable to load Historical Prices ' + self.symbol.strip() + ' in load_from_file'])
+                    func_display_info(-1, 'Both', ['-' * 128])
+                del lst_arr_dates, lst_arr_prices, lst_arr_frequency, arr_dates, arr_prices, arr_frequency
+                if ((self.need_compaction == 'Yes') or np.any(self.arr_dates[:-1] < self.arr_dates[1:])):  # Segments or text file; not cleansed
+                    self.need_normalization = 'Yes'
+                for int_frequency in np.unique(self.arr_frequency).tolist():
+                    self.dict_date_saved[int_frequency] = int(self.arr_dates[self.arr_frequency == int_frequency].max())
+                self.need_convergence_check = 'Yes'
+                if (len(self.arr_dates) < 100):  # If no records - or little records on file -, load prices from Online
                     self.last_update = DateTimeNow_UnixEpoch_TDAFormat - (3 * 365 * 24 * 60 * 60 * 1000)
             else:                                                                                       # History does not exist; set Last Update to 3 years
                 self.last_update = DateTimeNow_UnixEpoch_TDAFormat - (3 * 365 * 24 * 60 * 60 * 1000)
-        func_display_info(60, 'Both', ['Historical records loaded from file: ' + str(len(self.list_prices))])
+        func_display_info(60, 'Both', ['Historical records loaded from file: ' + str(len(self.arr_dates))])
 
-    def load_from_online(self, DateTimeNow_UnixEpoch_TDAFormat):
+    def load_from_online(self, DateTimeNow_UnixEpoch_TDAFormat, lst_HistoricalPrices, LastPrice, LastPrice_UnixEpoch_TDAFormat):
         global bool_isOpen, bool_preMarket, bool_regularMarket, bool_postMarket
         global lst_stock_regularMarketOnly_OTCOnly_OTC  # list of stocks with restrictions to place single orders
 
-        func_display_info(50, 'Both', ['Last Update: ' + str(self.last_update)])
-        if (self.last_update < (DateTimeNow_UnixEpoch_TDAFormat - (365 * 24 * 60 * 60 * 1000))):    # If Last Update older than 1 year, get Daily Prices for the last 3 years
-            StartDate = DateTimeNow_UnixEpoch_TDAFormat - (3 * 365 * 24 * 60 * 60 * 1000)           # Start Date is 3 years ago
-            while (StartDate < (DateTimeNow_UnixEpoch_TDAFormat - (3 * 30 * 24 * 60 * 60 * 1000))): # Process until 3 months earlier from now
-                EndDate = StartDate + (3 * 30 * 24 * 60 * 60 * 1000)                                # Process 3 months
-                self.list_prices.extend(api_GetHistoricalPrices(self.symbol, 1440, 'month', 'daily', 1, StartDate, EndDate))
-                StartDate = EndDate
-        if (self.last_update < (DateTimeNow_UnixEpoch_TDAFormat - (3 * 30 * 24 * 60 * 60 * 1000))):  # If Last Update older than 3 months, get 15 min Prices for the last 3 months
-            StartDate = DateTimeNow_UnixEpoch_TDAFormat - (3 * 30 * 24 * 60 * 60 * 1000)             # Start Date is 3 months ago
-
-            if ((datetime.fromtimestamp(StartDate / 1000).strftime("%A")) == 'Saturday'):
-                StartDate = StartDate - (1 * 24 * 60 * 60 * 1000)  # Subtract 1 day to move to Friday
-            if ((datetime.fromtimestamp(StartDate / 1000).strftime("%A")) == 'Sunday'):
-                StartDate = StartDate - (2 * 24 * 60 * 60 * 1000)  # Subtract 2 days to move to Friday
-
-            while (StartDate < (DateTimeNow_UnixEpoch_TDAFormat - (5 * 24 * 60 * 60 * 1000))):      # Process until 5 days earlier from now
-                EndDate = StartDate + (5 * 24 * 60 * 60 * 1000)                                     # Process 5 days
-
-                if ((datetime.fromtimestamp(EndDate / 1000).strftime("%A")) == 'Saturday'):
-                    EndDate = EndDate - (1 * 24 * 60 * 60 * 1000)  # Subtract 1 day to move to Friday
-                if ((datetime.fromtimestamp(EndDate / 1000).strftime("%A")) == 'Sunday'):
-                    EndDate = EndDate - (2 * 24 * 60 * 60 * 1000)  # Subtract 2 days to move to Friday
-
-                self.list_prices.extend(api_GetHistoricalPrices(self.symbol, 15, 'day', 'minute', 15, StartDate, EndDate))
-                StartDate = EndDate
-        if ((self.last_update < (DateTimeNow_UnixEpoch_TDAFormat - (5 * 24 * 60 * 60 * 1000))) or     # If Last Update older than 5 days, get 1 min Prices for the last 5 days
-            (self.last_update < (DateTimeNow_UnixEpoch_TDAFormat - (          5 * 60 * 1000))) or     # or if Last Update older than 5 minutes
-            (self.last_update < (DateTimeNow_UnixEpoch_TDAFormat - (          1 * 60 * 1000))) or     # or if Last Update older than 1 minutes
-            ( 1 != 1)):                                                                               # or always (maybe) - if delay in processing orders too long.
-            func_display_info(80, 'Both', ['Getting historical prices because last update is greater than 5 minutes mark'])
-            StartDate = DateTimeNow_UnixEpoch_TDAFormat - (5 * 24 * 60 * 60 * 1000)                   # Start Date is 5 days ago
-            EndDate = DateTimeNow_UnixEpoch_TDAFormat                                                 # Process till today
-            self.list_prices.extend(api_GetHistoricalPrices(self.symbol, 1, 'day', 'minute', 1, StartDate, EndDate))
-
-        # Load Last Price
+        # Historical prices of the requests of plan_history, in the same order; records of dtype_prices_record
+        for HistoricalPrices in lst_HistoricalPrices:
+            self.add_prices(HistoricalPrices.tolist())
+
+        # Load Last Price; quotes of all symbols are retrieved once per cycle
         func_check_market_hours()
 
         DateTimeNow_UnixEpoch_TDAFormat = int(round(time.time() * 1000, 0))  # current EPOCH time in TDA format
         if (self.symbol in lst_stock_regularMarketOnly_OTC_list):
             if (bool_regularMarket):  # Check if current NY time is regularMarket
-                self.list_prices.append([DateTimeNow_UnixEpoch_TDAFormat, api_GetLastPrice(self.symbol), 0])  # Get Latest price
-                func_display_info(80, 'Both', ['DateTimeNow_UnixEpoch_TDAFormat: ' + str(DateTimeNow_UnixEpoch_TDAFormat)])
+                self.add_prices([[LastPrice_UnixEpoch_TDAFormat, LastPrice, 0]])  # Latest price
+                func_display_info(80, 'Both', ['LastPrice_UnixEpoch_TDAFormat: ' + str(LastPrice_UnixEpoch_TDAFormat)])
         else:
             if (bool_preMarket or bool_regularMarket or bool_postMarket):  # Check if current NY time is preMarket, regularMarket or postMarket
-               self.list_prices.append([DateTimeNow_UnixEpoch_TDAFormat, api_GetLastPrice(self.symbol), 0])  # Get Latest price
-               func_display_info(80, 'Both', ['DateTimeNow_UnixEpoch_TDAFormat: ' + str(DateTimeNow_UnixEpoch_TDAFormat)])
+               self.add_prices([[LastPrice_UnixEpoch_TDAFormat, LastPrice, 0]])  # Latest price
+               func_display_info(80, 'Both', ['LastPrice_UnixEpoch_TDAFormat: ' + str(LastPrice_UnixEpoch_TDAFormat)])
         self.last_update = DateTimeNow_UnixEpoch_TDAFormat  # Prices updated
-        func_display_info(80, 'Both', ['Total of Prices loaded from online: ' + str(len(self.list_prices))])
-
-        # Delete records with price 0
-        for objPrice in self.list_prices:
-            if (objPrice[1] == 0):    # if price is zero, remove
-                self.list_prices.remove(objPrice)
-        func_display_info(80, 'Both', ['Total of Prices after deleting price zero: ' + str(len(self.list_prices))])
-
-        # Sort records; oldest records first
-        self.list_prices = sorted(self.list_prices, reverse = True)
-        func_display_info(80, 'Both', ['Total of Records after sorting: ' + str(len(self.list_prices))])
-
-        #for objPrice in self.list_prices:
-        #    print('Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]))
-
-        # Remove duplicate records; change to Tuples
-        self.list_prices = set(tuple(x) for x in self.list_prices)  # convert inner lists to tuples so they are hashable
-        self.list_prices = [list(x) for x in self.list_prices]      # convert tuples back into lists
-
-        func_display_info(80, 'Both', ['Total of Records after deleting duplicates: ' + str(len(self.list_prices))])
-
-        #for objPrice in self.list_prices:
-        #    print('Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]))
-
-        # Sort records; oldest records first
-        self.list_prices = sorted(self.list_prices, reverse = True)
-        func_display_info(80, 'Both', ['Total of Records after sorting: ' + str(len(self.list_prices))])
-
-        # Delete mixed Range records, first pass
-        int_cntr = 0
-        for objPrice in self.list_prices:
-
-            func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]) + ' ---(value)'])
-
-            int_cntr = int_cntr + 1
-            if (int_cntr == 1):
-                objPricePPPP = objPrice
-                objPricePPP  = objPrice
-                objPricePP   = objPrice
-                objPriceP    = objPrice
-            # PriorPriorPriorPrior PPPP ==   1    1   1
-            # PriorPriorPrior      PPP  !=  15    1   1
-            # PriorPrior           PP   !=  15   15   1
-            # Prior                P    !=  15   15  15  <-- delete when different
-            # Current                        1    1   1
-            if (objPricePPPP[2] == objPrice[2]):
-                if ((objPricePPP[2] != objPrice[2]) and (objPricePP[2] != objPrice[2]) and  (objPriceP[2] != objPrice[2])):  # 3 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)  # skip for Ranges 0 or 1 only
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2)) + ' Range: ' + str(objPriceP[2]) + ' -- (remove P)'])
-                        objPriceP = objPrice
-                    if (objPricePP[2] > 1):
-                        self.list_prices.remove(objPricePP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePP[1], 2)) + ' Range: ' + str(objPricePP[2]) + ' -- (remove PP)'])
-                        objPricePP = objPrice
-                    if (objPricePPP[2] > 1):
-                        self.list_prices.remove(objPricePPP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePPP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePPP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePPP[1], 2)) + ' Range: ' + str(objPricePPP[2]) + ' -- (remove PPP)'])
-                        objPricePPP = objPrice
-            if (objPricePPP[2] == objPrice[2]):
-                if ((objPricePP[2] != objPrice[2]) and (objPriceP[2] != objPrice[2])):  # 2 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2)) + ' Range: ' + str(objPriceP[2]) + ' -- (remove P'])
-                        objPriceP = objPrice
-                    if (objPricePP[2] > 1):
-                        self.list_prices.remove(objPricePP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePP[1], 2)) + ' Range: ' + str(objPricePP[2]) + ' -- (remove PP)'])
-                        objPricePP = objPrice
-            if (objPricePP[2] == objPrice[2]):
-                if (objPriceP[2] != objPrice[2]):  # 1 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0)))   + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2))   + ' Range: ' + str(objPriceP[2]) + ' -- (remove P)'])
-                        objPriceP = objPrice
-
-            objPricePPPP = objPricePPP
-            objPricePPP = objPricePP
-            objPricePP = objPriceP
-            objPriceP = objPrice
-
-        #DisplayInfo(80, 'Both', ['Selected - Symb: ' + self.symbol + ' Date: ' + str(objPricePrior[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePrior[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePrior[1], 2)) + ' Range: ' + str(objPricePrior[2]) + ' ---(remove)'])
-
-        func_display_info(80, 'Both', ['Total of Records after deleting records with mix ranges, first pass: ' + str(len(self.list_prices))])
-
-        # Sort records again; oldest records first
-        self.list_prices = sorted(self.list_prices, reverse = True)
-        func_display_info(80, 'Both', ['Total of Records after sorting: ' + str(len(self.list_prices))])
-
-        # Delete mixed Range records, second pass
-        int_cntr = 0
-        for objPrice in self.list_prices:
-
-            func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]) + ' ---(value)'])
-
-            int_cntr = int_cntr + 1
-            if (int_cntr == 1):
-                objPricePPPP = objPrice
-                objPricePPP  = objPrice
-                objPricePP   = objPrice
-                objPriceP    = objPrice
-            # PriorPriorPriorPrior PPPP ==   1    1   1
-            # PriorPriorPrior      PPP  !=  15    1   1
-            # PriorPrior           PP   !=  15   15   1
-            # Prior                P    !=  15   15  15  <-- delete when different
-            # Current                        1    1   1
-            if (objPricePPPP[2] == objPrice[2]):
-                if ((objPricePPP[2] != objPrice[2]) and (objPricePP[2] != objPrice[2]) and  (objPriceP[2] != objPrice[2])):  # 3 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)  # skip for Ranges 0 or 1 only
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2)) + ' Range: ' + str(objPriceP[2]) + ' -- (remove P)'])
-                        objPriceP = objPrice
-                    if (objPricePP[2] > 1):
-                        self.list_prices.remove(objPricePP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePP[1], 2)) + ' Range: ' + str(objPricePP[2]) + ' -- (remove PP)'])
-                        objPricePP = objPrice
-                    if (objPricePPP[2] > 1):
-                        self.list_prices.remove(objPricePPP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePPP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePPP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePPP[1], 2)) + ' Range: ' + str(objPricePPP[2]) + ' -- (remove PPP)'])
-                        objPricePPP = objPrice
-            if (objPricePPP[2] == objPrice[2]):
-                if ((objPricePP[2] != objPrice[2]) and (objPriceP[2] != objPrice[2])):  # 2 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2)) + ' Range: ' + str(objPriceP[2]) + ' -- (remove P'])
-                        objPriceP = objPrice
-                    if (objPricePP[2] > 1):
-                        self.list_prices.remove(objPricePP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPricePP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePP[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePP[1], 2)) + ' Range: ' + str(objPricePP[2]) + ' -- (remove PP)'])
-                        objPricePP = objPrice
-            if (objPricePP[2] == objPrice[2]):
-                if (objPriceP[2] != objPrice[2]):  # 1 out of sequence
-                    if (objPriceP[2] > 1):
-                        self.list_prices.remove(objPriceP)
-                        func_display_info(80, 'Both', ['Symb: ' + self.symbol + ' Date: ' + str(objPriceP[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPriceP[0] / 1000, 0)))   + ' Price: ' + '{:.8f}'.format(round(objPriceP[1], 2))   + ' Range: ' + str(objPriceP[2]) + ' -- (remove P)'])
-                        objPriceP = objPrice
-
-            objPricePPPP = objPricePPP
-            objPricePPP = objPricePP
-            objPricePP = objPriceP
-            objPriceP = objPrice
-
-        #DisplayInfo(80, 'Both', ['Selected - Symb: ' + self.symbol + ' Date: ' + str(objPricePrior[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPricePrior[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPricePrior[1], 2)) + ' Range: ' + str(objPricePrior[2]) + ' ---(remove)'])
-
-        func_display_info(80, 'Both', ['Total of Records after deleting records with mix ranges, second pass: ' + str(len(self.list_prices))])
-
-        # Sort records again; oldest records first
-        self.list_prices = sorted(self.list_prices, reverse = True)
-        func_display_info(80, 'Both', ['Total of Records after sorting: ' + str(len(self.list_prices))])
-
-        func_display_info(50, 'Both', ['Total of Records after sorting: ' + str(self.symbol) + ' ' + str(len(self.list_prices))])
+        func_display_info(80, 'Both', ['Total of Prices loaded from online: ' + str(len(self.list_prices_new))])
+
+        # Merge new prices; delete records with price 0, duplicate records and mixed Range records
+        if (self.need_normalization == 'Yes'):  # Older prices added; RSI of closed bars is calculated again
+            for obj_RsiState in self.dict_rsi_state.values():
+                obj_RsiState.need_recompute = 'Yes'
+            self.need_convergence_check = 'Yes'
+        self.arr_dates, self.arr_prices, self.arr_frequency = func_normalize_prices(self.arr_dates, self.arr_prices, self.arr_frequency,
+                                                                                   self.list_prices_new, (self.need_normalization == 'Yes'))
+        self.list_prices_new = []
+        self.need_normalization = 'No'
+
+        func_display_info(50, 'Both', ['Total of Records after sorting: ' + str(self.symbol) + ' ' + str(len(self.arr_dates))])
+
+    def plan_history(self, DateTimeNow_UnixEpoch_TDAFormat):
+        # Requests of historical prices (arguments of api_GetHistoricalPrices) for the gaps of the stored prices, oldest first.
+        # Daily prices are kept for 3 years to 3 months ago, 15 min prices for 3 months to 5 days ago, 1 min prices for 5 days.
+        # Holes are searched in all prices once per run; later only the time since the newest price of each Range.
+        lst_history_requests = []
+        func_display_info(50, 'Both', ['Last Update: ' + str(self.last_update)])
+        for Range, dict_range in dict_history_ranges.items():
+            int_start = DateTimeNow_UnixEpoch_TDAFormat - dict_range['start']
+            int_end   = DateTimeNow_UnixEpoch_TDAFormat - dict_range['end']
+            if (Range == 1):  # 1 min prices since the newest one; all 5 days if there are none
+                int_date_last = self.dict_date_saved.get(Range, 0)
+                if (int_date_last <= int_start):
+                    lst_history_requests.append((self.symbol, 1, 'day', 'minute', 1, int_start, int_end))
+                elif ((int_end - int_date_last) > dict_range['gap']):
+                    lst_history_requests.append((self.symbol, 1, 'day', 'minute', 1, int_date_last - (50 * 1000), int_end, 0))  # From begin of newest period
+                continue
+            if (self.need_gap_scan == 'Yes'):  # Prices of Range and closes built from finer prices
+                arr_dates = np.concatenate((self.arr_dates[self.arr_frequency == Range],
+                                            func_aggregate_prices(self.arr_dates, self.arr_prices, self.arr_frequency, Range)[0]))
+                arr_dates = np.sort(arr_dates[(arr_dates > int_start) & (arr_dates < int_end)])
+                lst_gaps = func_find_gaps(arr_dates, int_start, int_end, dict_range['gap'])
+                tup_min_records = () if (len(arr_dates) == 0) else (0,)  # Holes may have no prices (e.g. before IPO); one request each
+            else:                              # Newest price of Range or newest close built from finer prices since
+                int_date_last = self.dict_date_saved.get(Range, 0)
+                int_newer = int(np.searchsorted(-self.arr_dates, -int_date_last, side='left'))
+                arr_dates = func_aggregate_prices(self.arr_dates[:int_newer], self.arr_prices[:int_newer], self.arr_frequency[:int_newer], Range)[0]
+                if (len(arr_dates) > 0):
+                    int_date_last = max(int_date_last, int(arr_dates[-1]))
+                if ((int_end - max(int_date_last, int_start)) > dict_range['gap']):
+                    lst_gaps = [(max(int_date_last, int_start), int_end)]
+                else:
+                    lst_gaps = []
+                tup_min_records = (0,)
+            for int_gap_start, int_gap_end in lst_gaps:  # Windows of dict_range['window'] since 1970 over the gap, so requests repeat and are cached
+                StartDate = int_gap_start - (int_gap_start % dict_range['window'])
+                while (StartDate < int_gap_end):
+                    EndDate = StartDate + dict_range['window']
+                    if (Range == 1440):
+                        tup_request = (self.symbol, 1440, 'month', 'daily', 1, StartDate, EndDate) + tup_min_records
+                    else:
+                        tup_request = (self.symbol, 15, 'day', 'minute', 15,
+                                       StartDate - (max(obj_SessionCalendar.weekday(StartDate) - 4, 0) * 24 * 60 * 60 * 1000),  # Saturday and Sunday move to Friday
+                                       EndDate - (max(obj_SessionCalendar.weekday(EndDate) - 4, 0) * 24 * 60 * 60 * 1000)) + tup_min_records
+                    if ((tup_request[:7] not in self.set_history_requested) and (tup_request not in lst_history_requests)):
+                        lst_history_requests.append(tup_request)
+                        self.need_compaction = 'Yes'                                                # Older prices loaded; rewrite binary file
+                        self.need_normalization = 'Yes'
+                    StartDate = EndDate
+        self.need_gap_scan = 'No'
+        self.set_history_requested.update([tup_request[:7] for tup_request in lst_history_requests])
+        lst_history_requests.sort(key=lambda tup_request: (tup_request[1] == 1, -tup_request[1], tup_request[5]))  # Daily, 15 min, then 1 min; oldest first
+        func_display_info(60, 'Both', ['Requests of historical prices: ' + self.symbol + ' ' + str(len(lst_history_requests))])
+        return (lst_history_requests)
 
     def calc_last_price(self, LastPrice):
         self.last_price = LastPrice
 
-    def calc_rsi(self, Period, DateMark):
-        if (Period == 'week'):
-            TimeDelta = (7 * 24 * 60 * 60 * 1000)
-        if (Period == 'day'):
-            TimeDelta = (24 * 60 * 60 * 1000)
-        if (Period == '4hr'):
-            TimeDelta = (4 * 60 * 60 * 1000)
-        if (Period == '1hr'):
-            TimeDelta = (1 * 60 * 60 * 1000)
-        if (Period == '30min'):
-            TimeDelta = (30 * 60 * 1000)
-        if (Period == '15min'):
-            TimeDelta = (15 * 60 * 1000)
-        func_display_info(70, 'Both', ['Period: ' + Period])
-        ListValues = []
-        for objPrice in self.list_prices:  # ListPrices sorted already; oldest first
-
-            if ((Period == 'week') or (Period == 'day')):
-                if ((objPrice[0] <= DateMark) and (len(ListValues) > -1)):
-                    ListValues.append(objPrice[1])
-
-                    #print('Selected - Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]))
-
-                    # DateMark = DateMark - TimeDelta
-                    DateMark = objPrice[0] - TimeDelta
-                    # Week - Move DateMark to prior stock price reading to skip holidays; over 24 hours period
-                    # Day  - Move DateMark to prior stock price reading to skip weekends and holidays; 24 hour period
-
-            if ((Period == '4hr') or (Period == '1hr') or (Period == '30min') or (Period == '15min')):
-                if ((objPrice[0] <= DateMark) and (len(ListValues) > -1)):
-                    ListValues.append(objPrice[1])
-
-                    if ((Period == '15min') and (len(ListValues) < 40)):
-                       func_display_info(80, 'Both', ['Selected - Symb: ' + self.symbol + ' Period: ' + Period + ' Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2])])
-
-                    MovingDate = objPrice[0]  # it could be DateMark or objPrice[0]. Keeping objPrice[0] to compensate with non-tradeing after hours
-                    func_display_info(82, 'Both', ['MovingDate: ' + str(MovingDate)])
-
-                    # Calcualte 6 AM Date, current day
-                    DateAt6AM_Basic = datetime(datetime.fromtimestamp(MovingDate / 1000).year,
-                                               datetime.fromtimestamp(MovingDate / 1000).month,
-                                               datetime.fromtimestamp(MovingDate / 1000).day, 6, 0)
-                    func_display_info(82, 'Both', ['DateAt6AM_Basic: ' + str(DateAt6AM_Basic)])
-
-                    DateAt6AM_UnixEpoch = time.mktime(DateAt6AM_Basic.timetuple())
-                    func_display_info(82, 'Both', ['DateAt6AM_UnixEpoch: ' + str(DateAt6AM_UnixEpoch)])
-
-                    DateAt6AM_UnixEpoch_TDAFormat = DateAt6AM_UnixEpoch * 1000
-                    func_display_info(82, 'Both', ['DateAt6AM_UnixEpoch_TDAFormat: ' + str(DateAt6AM_UnixEpoch_TDAFormat)])
-
-                    # Calcualte 7 PM Date, prior day
-                    DateAt7PM_UnixEpoch_TDAFormat = DateAt6AM_UnixEpoch_TDAFormat - (11 * 60 * 60 * 1000)  # 6AM -> 7PM, 11 hours
-                    func_display_info(82, 'Both', ['DateAt7PM_UnixEpoch_TDAFormat: ' + str(DateAt7PM_UnixEpoch_TDAFormat)])
-
-                    if ((MovingDate - DateAt6AM_UnixEpoch_TDAFormat) < TimeDelta):  # No space for delta; need to compensate for dead zone
-                        AdjustTime_TDAFormat = TimeDelta - (MovingDate - DateAt6AM_UnixEpoch_TDAFormat)
-                        MovingDate = DateAt7PM_UnixEpoch_TDAFormat - AdjustTime_TDAFormat
-                        func_display_info(82, 'Both', ['AdjustTime_TDAFormat: ' + str(AdjustTime_TDAFormat)])
-                    else:                                                            # There is space for delta
-                         MovingDate = MovingDate - TimeDelta
-                    func_display_info(82, 'Both', ['MovingDate: ' + str(MovingDate)])
-
-                    if ((datetime.fromtimestamp(MovingDate / 1000).strftime("%A")) == 'Sunday'):
-                        MovingDate = MovingDate - (2 * 24 * 60 * 60 * 1000)  # if Sunday, subtract 2 day
-
-                    if ((datetime.fromtimestamp(MovingDate / 1000).strftime("%A")) == 'Saturday'):
-                        MovingDate = MovingDate - (1 * 24 * 60 * 60 * 1000)  # if Saturday, subtract 1 day
-                    func_display_info(82, 'Both', ['MovingDate: ' + str(MovingDate)])
-
-                    DateMark = MovingDate
-
+    def calc_rsi(self, DateTimeNow_UnixEpoch_TDAFormat):
+        if (str_rsi_sampling == 'Chain'):  # Prices sampled back from the newest price up to now, by Period
+            lst_rsi = func_calc_rsi_batch([func_sample_chain(self.arr_dates, self.arr_prices, Period, DateTimeNow_UnixEpoch_TDAFormat, func_rsi_lookback(Period)) for Period in lst_rsi_periods])
+        else:
+            # Prices newer than the oldest last closed bar are resampled once for all Periods; bars calculated again only need the lookback
+            int_newer = 0
+            bool_recompute = False
+            for obj_RsiState in self.dict_rsi_state.values():
+                int_newer_state = obj_RsiState.count_newer(self.arr_dates)
+                if (obj_RsiState.int_closes == 0):  # Calculated again
+                    bool_recompute = True
                 else:
-                    if ((Period == '15min') and (len(ListValues) < 40)):
-                       func_display_info(80, 'Both', ['Selected - Symb: ' + self.symbol + ' Period: ' + Period + ' Date: ' + str(objPrice[0]) + ' Format: ' + time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(round(objPrice[0] / 1000, 0))) + ' Price: ' + '{:.8f}'.format(round(objPrice[1], 2)) + ' Range: ' + str(objPrice[2]) + ' ---(skip)'])
-
-        func_display_info(70, 'Both', ['len(ListValues): ' + str(len(ListValues))])
-        ListValues.reverse()  # Oldest prices first
-
-        if (Period == 'week'):
-            self.rsi_wk = func_calc_rsi(ListValues)
-        if (Period == 'day'):
-            self.rsi_day = func_calc_rsi(ListValues)
-        if (Period == '4hr'):
-            self.rsi_4hr = func_calc_rsi(ListValues)
-        if (Period == '1hr'):
-            self.rsi_1hr = func_calc_rsi(ListValues)
-        if (Period == '30min'):
-            self.rsi_30m = func_calc_rsi(ListValues)
-        if (Period == '15min'):
-            self.rsi_15m = func_calc_rsi(ListValues)
+                    int_newer = max(int_newer, int_newer_state)
+            if (bool_recompute):
+                dict_bars = func_resample_prices_lookback(self.arr_dates, self.arr_prices, self.arr_frequency, int_newer)
+            else:
+                dict_bars = func_resample_prices(self.arr_dates[:int_newer], self.arr_prices[:int_newer], self.arr_frequency[:int_newer])
+            lst_rsi_state_retry = []
+            for Period in lst_rsi_periods:
+                if not (self.dict_rsi_state[Period].add_bars(*dict_bars[Period])):
+                    lst_rsi_state_retry.append(self.dict_rsi_state[Period])
+            if (len(lst_rsi_state_retry) > 0):  # Price received for a closed bar; calculate all bars again
+                dict_bars = func_resample_prices_lookback(self.arr_dates, self.arr_prices, self.arr_frequency, 0)
+                for obj_RsiState in lst_rsi_state_retry:
+                    obj_RsiState.reset()
+                    obj_RsiState.add_bars(*dict_bars[obj_RsiState.period])
+            for obj_RsiState in self.dict_rsi_state.values():
+                obj_RsiState.int_records = len(self.arr_dates) - int(np.searchsorted(-self.arr_dates, -obj_RsiState.date_last, side='left'))
+
+            lst_rsi = func_calc_rsi_open_bars([self.dict_rsi_state[Period] for Period in lst_rsi_periods])
+        self.rsi_wk  = lst_rsi[0]
+        self.rsi_day = lst_rsi[1]
+        self.rsi_4hr = lst_rsi[2]
+        self.rsi_1hr = lst_rsi[3]
+        self.rsi_30m = lst_rsi[4]
+        self.rsi_15m = lst_rsi[5]
+        func_display_info(70, 'Both', ['RSI: ' + self.symbol + ' ' + str(lst_rsi)])
+        if ((self.need_convergence_check == 'Yes') and (int_debug >= 60)):
+            self.calc_rsi_convergence(DateTimeNow_UnixEpoch_TDAFormat)
+        self.need_convergence_check = 'No'
+
+    def calc_rsi_convergence(self, DateTimeNow_UnixEpoch_TDAFormat):
+        # Difference between RSI of bounded lookback and RSI of all prices of the same sampling (str_rsi_sampling), by Period
+        if (str_rsi_sampling == 'Chain'):
+            lst_values = [func_sample_chain(self.arr_dates, self.arr_prices, Period, DateTimeNow_UnixEpoch_TDAFormat, 0) for Period in lst_rsi_periods]
+        else:
+            dict_bars = func_resample_prices(self.arr_dates, self.arr_prices, self.arr_frequency)
+            lst_values = [dict_bars[Period][2] for Period in lst_rsi_periods]
+        lst_rsi_full = func_calc_rsi_batch(lst_values)
+        lst_rsi = [self.rsi_wk, self.rsi_day, self.rsi_4hr, self.rsi_1hr, self.rsi_30m, self.rsi_15m]
+        dict_error = {}
+        for int_period, Period in enumerate(lst_rsi_periods):
+            dict_error[Period] = abs(lst_rsi[int_period] - lst_rsi_full[int_period])
+            func_display_info(60, 'Both', ['RSI convergence: ' + self.symbol + ' ' + Period + ' values: ' + str(len(lst_values[int_period])) +
+                                           ' lookback: ' + str(func_rsi_lookback(Period)) + ' error: ' + str(dict_error[Period])])
+        return (dict_error)
 
     def print(self):
         str_line = str(self.symbol + "      ")[0:6]
@@ -1265,20 +1530,37 @@ class cls_LineMarketIndicators:
         str_line = str_line + str("{:7.2f}".format(round(self.last_price ,2))) + " "
         return(str_line)
 
+    def compact(self):
+        # Rewrite binary file with all prices in background; segments of older generations are deleted afterwards
+        self.wait_compaction()
+        func_display_info(20, 'Both', ['Compact file with Historical Prices ' + self.symbol.strip() + ' (segments: ' + str(self.int_records_segment) + ' records)'])
+        self.arr_dates     = np.array(self.arr_dates)      # Copy; release memory-mapped binary file before it is replaced
+        self.arr_prices    = np.array(self.arr_prices)     # Arrays are replaced, never modified; no further copy needed
+        self.arr_frequency = np.array(self.arr_frequency)
+        lst_segments = func_list_prices_segments(str_path_dir_Data, self.symbol.strip())
+        self.int_generation = self.int_generation + 1  # Later appends go to a new segment, kept after compaction
+        self.int_records_base = len(self.arr_dates)
+        self.int_records_segment = 0
+        self.need_compaction = 'No'
+        self.obj_thread_compaction = threading.Thread(target=func_compact_prices,
+                                                      args=(str_path_dir_Data + '\Stock_' + self.symbol.strip() + '.bin', self.arr_dates, self.arr_prices, self.arr_frequency, lst_segments),
+                                                      name='Compaction_' + self.symbol.strip())
+        self.obj_thread_compaction.start()
+
     def save(self):
-        func_display_info(20, 'Both', ['Delete and rewrite file with Historical Prices ' + self.symbol.strip()])
-        if os.path.exists(str_path_dir_Data + '\Stock_' + self.symbol.strip() + '.txt'):
-            os.remove(str_path_dir_Data +'\Stock_' + self.symbol.strip() + '.txt')
-            time.sleep(float_time_delay_io)  # Delay given to remove/delete file
-        outF = open(str_path_dir_Data + '\Stock_' + self.symbol.strip() + '.txt', "a")
-        for objPrice in self.list_prices:
-            str_line =            ("               " + str(objPrice[0]))[-15:]                  + " "
-            str_line = str_line + ("               " + str("{:.6f}".format(objPrice[1])))[-15:] + " "
-            str_line = str_line + ("          "      + str(objPrice[2]))[-10:]
-            outF.write(str_line)
-            outF.write("\n")
-        time.sleep(float_time_delay_io)  # Delay given to write file
-        outF.close()
+        if (len(self.list_prices_unsaved) > 0):
+            func_display_info(50, 'Both', ['Append to file with Historical Prices ' + self.symbol.strip() + ' records: ' + str(len(self.list_prices_unsaved))])
+            func_append_prices_segment(str_path_dir_Data + '\Stock_' + self.symbol.strip() + '.' + str(self.int_generation) + '.seg', self.list_prices_unsaved)
+            self.int_records_segment = self.int_records_segment + len(self.list_prices_unsaved)
+            self.list_prices_unsaved = []
+        if ((self.need_compaction == 'Yes') or
+            (self.int_records_segment > ((self.int_records_base * int_prices_compact_percent) / 100))):
+            self.compact()
+
+    def wait_compaction(self):
+        if (self.obj_thread_compaction is not None):
+            self.obj_thread_compaction.join()
+            self.obj_thread_compaction = None
 
 class cls_LineOrderStatus:
     def __init__(self, str_from_file, str_line):   # attributes
@@ -1353,7 +1635,8 @@ class cls_LineOrderStatus:
                 self.order_sell_price   = 0.0
                 self.order_sell_status  = ""
 
-    def place_order(self, float_prior_order_buy_price, obj_LineMarketIndicators):
+    def place_order(self, float_prior_order_buy_price, obj_LineMarketIndicators, bool_buy_trigger, bool_sell_trigger):
+        # RSI triggers evaluated by func_eval_triggers for all orders; prices are checked here
         global bool_preMarket, bool_regularMarket, bool_postMarket
         global lst_stock_regularMarketOnly_OTC_list
         func_check_market_hours()
@@ -1362,12 +1645,7 @@ class cls_LineOrderStatus:
                 if (((self.symbol     in lst_stock_regularMarketOnly_OTC_list) and ((self.type == 'Single') and (bool_regularMarket))) or                                       # Check if stock     in regularMarket and single order during regularMarket
                     ((self.symbol not in lst_stock_regularMarketOnly_OTC_list) and ((self.type == 'Single') and (bool_preMarket or bool_regularMarket or bool_postMarket))) or  # Check if stock not in regularMarket and single order during preMarket, regularMarket and postMarket
                     ((self.type == 'Conditional') and (bool_regularMarket))):                                                                                              # Check if conditional order during regularMarket
-                    if ((self.trigger_buy_rsi_wk  > obj_LineMarketIndicators.rsi_wk ) and  # Check for triggers to place Buy Order
-                        (self.trigger_buy_rsi_day > obj_LineMarketIndicators.rsi_day) and
-                        (self.trigger_buy_rsi_4hr > obj_LineMarketIndicators.rsi_4hr) and
-                        (self.trigger_buy_rsi_1hr > obj_LineMarketIndicators.rsi_1hr) and
-                        (self.trigger_buy_rsi_30m > obj_LineMarketIndicators.rsi_30m) and
-                        (self.trigger_buy_rsi_15m > obj_LineMarketIndicators.rsi_15m) and
+                    if ((bool_buy_trigger) and  # Check for triggers to place Buy Order
                         (((float_prior_order_buy_price > 0.0) and (((1 - (self.trigger_buy_gap / 1000)) * (float_prior_order_buy_price)) > obj_LineMarketIndicators.last_price)) or (float_prior_order_buy_price == 0))):  # Prior order buy price adjustment condition
                         # Place New Buy Order
                         self.order_buy_rsi_wk  = round(obj_LineMarketIndicators.rsi_wk )  # Save Buy Order RSI Indicators
@@ -1384,30 +1662,23 @@ class cls_LineOrderStatus:
                         self.order_buy_price = (self.trigger_buy_adj_price * obj_LineMarketIndicators.last_price)         # Save Buy Order Price
                         self.order_buy_price = float(f"{self.order_buy_price:.2f}")                                       # Truncate Buy Order Price
                         if (self.type == 'Single'):       # If Single Order
-                            self.order_buy_status = api_PlaceOrder('Single', 'BUY', func_get_account(self.acct_desc), self)                    # default status Transition
-                            self.order_buy_number = api_GetOrderByPath('Single', 'BUY', func_get_account(self.acct_desc), self)                # Buy Order Number received
-                            self.order_buy_status = api_GetOrderStatus('BUY', func_get_account(self.acct_desc), self)                          # actual status
+                            self.order_buy_status, self.order_buy_number = func_place_order('Single', 'BUY', self)                            # default status Transition; Buy Order Number received
+                            self.order_buy_status = api_GetOrderStatus('BUY', self)                                                           # actual status
                             obj_ListLineOrderStatus.save()                                                                # Save Order Status file as contingency
                         if (self.type == 'Conditional'):  # If Conditional Order
                             self.order_sell_number = 0                                   # Save Sell Order Number (Temp)
                             self.order_sell_status = 'New_Order'                         # Save Sell Order Status (Temp)
                             self.order_sell_shares = self.order_buy_shares               # Number of shares
                             self.order_sell_price = round((self.order_buy_price * self.trigger_sell_adj_price), 2)  # Save Sell Order Price
-                            self.order_buy_status = api_PlaceOrder('Conditional', 'BUY', func_get_account(self.acct_desc), self)         # default status Transition
-                            OrderNumbers = api_GetOrderByPath('Conditional', 'BUY', func_get_account(self.acct_desc), self)              # Buy and Sell Order Numbers received
+                            self.order_buy_status, OrderNumbers = func_place_order('Conditional', 'BUY', self)                      # default status Transition; Buy and Sell Order Numbers received
                             self.order_buy_number = OrderNumbers[0]
                             self.order_sell_number = OrderNumbers[1]
-                            self.order_buy_status = api_GetOrderStatus('BUY', func_get_account(self.acct_desc), self)   #ofsofs I do not need this parm                 # actual status
+                            self.order_buy_status = api_GetOrderStatus('BUY', self)                                                 # actual status
                             obj_ListLineOrderStatus.save()                                                          # Save Order Status file as contingency
 
         if ((self.order_buy_status.strip() == 'FILLED') and (self.order_sell_status.strip() == '')):        # Check if Sell Order is already in place; Conditional Order not apply
             if ((self.type == 'Single') and (bool_preMarket or bool_regularMarket or bool_postMarket)):     # Check if single order during preMarket, regularMarket and postMarket
-                if ((self.trigger_sell_rsi_wk  < obj_LineMarketIndicators.rsi_wk ) and                      # Check for triggers to place Sell Order
-                    (self.trigger_sell_rsi_day < obj_LineMarketIndicators.rsi_day) and
-                    (self.trigger_sell_rsi_4hr < obj_LineMarketIndicators.rsi_4hr) and
-                    (self.trigger_sell_rsi_1hr < obj_LineMarketIndicators.rsi_1hr) and
-                    (self.trigger_sell_rsi_30m < obj_LineMarketIndicators.rsi_30m) and
-                    (self.trigger_sell_rsi_15m < obj_LineMarketIndicators.rsi_15m) and
+                if ((bool_sell_trigger) and                                                                 # Check for triggers to place Sell Order
                     ((self.order_buy_price * 1.01) < obj_LineMarketIndicators.last_price) and                       # Minimum 1% profit
                     ((self.order_buy_price * self.trigger_sell_adj_price) < obj_LineMarketIndicators.last_price)):  # Minimun sell adjustment price
                     # Place New Sell Order
@@ -1421,8 +1692,7 @@ class cls_LineOrderStatus:
                     self.order_sell_status = 'New_Order'                                                           # Save Buy Order Status (Temp)
                     self.order_sell_shares = self.order_buy_shares                                                 # Save Sell Order Number of Shares
                     self.order_sell_price = round((1.001 * obj_LineMarketIndicators.last_price), 2)                # Save Sell Order Price; Round Sell Order Price
-                    self.order_sell_status = api_PlaceOrder('Single', 'SELL', self)                                # default status Transition
-                    self.order_sell_number = api_GetOrderByPath('Single', 'SELL', self)
+                    self.order_sell_status, self.order_sell_number = func_place_order('Single', 'SELL', self)      # default status Transition; Sell Order Number received
                     self.order_sell_status = api_GetOrderStatus('SELL', self)                                      # actual status
                     obj_ListLineOrderStatus.save()                                                                 # Save Order Status file as contingency
 
@@ -1475,62 +1745,58 @@ class cls_LineOrderStatus:
     def reset_order(self):
         if ((self.order_buy_status == 'FILLED') and (self.order_sell_status == 'FILLED')):                      # Initialize order cycle.
             func_display_info(30, 'Both', [ 'Reset: ' + str(self.print())])
-            obj_LineOrderStatus.order_buy_rsi_wk = 0
-            obj_LineOrderStatus.order_buy_rsi_day = 0
-            obj_LineOrderStatus.order_buy_rsi_4hr = 0
-            obj_LineOrderStatus.order_buy_rsi_1hr = 0
-            obj_LineOrderStatus.order_buy_rsi_30m = 0
-            obj_LineOrderStatus.order_buy_rsi_15m = 0
-            obj_LineOrderStatus.order_buy_number = 0
-            obj_LineOrderStatus.order_buy_shares = 0.0
-            obj_LineOrderStatus.order_buy_price = 0
-            obj_LineOrderStatus.order_buy_status = ''
-            obj_LineOrderStatus.order_sell_rsi_wk = 0
-            obj_LineOrderStatus.order_sell_rsi_day = 0
-            obj_LineOrderStatus.order_sell_rsi_4hr = 0
-            obj_LineOrderStatus.order_sell_rsi_1hr = 0
-            obj_LineOrderStatus.order_sell_rsi_30m = 0
-            obj_LineOrderStatus.order_sell_rsi_15m = 0
-            obj_LineOrderStatus.order_sell_number = 0
-            obj_LineOrderStatus.order_sell_shares = 0
-            obj_LineOrderStatus.order_sell_price = 0.0
-            obj_LineOrderStatus.order_sell_status = ''
+            self.order_buy_rsi_wk = 0
+            self.order_buy_rsi_day = 0
+            self.order_buy_rsi_4hr = 0
+            self.order_buy_rsi_1hr = 0
+            self.order_buy_rsi_30m = 0
+            self.order_buy_rsi_15m = 0
+            self.order_buy_number = 0
+            self.order_buy_shares = 0.0
+            self.order_buy_price = 0
+            self.order_buy_status = ''
+            self.order_sell_rsi_wk = 0
+            self.order_sell_rsi_day = 0
+            self.order_sell_rsi_4hr = 0
+            self.order_sell_rsi_1hr = 0
+            self.order_sell_rsi_30m = 0
+            self.order_sell_rsi_15m = 0
+            self.order_sell_number = 0
+            self.order_sell_shares = 0
+            self.order_sell_price = 0.0
+            self.order_sell_status = ''
             obj_ListLineOrderStatus.save()                                                                               # Save Order Status file as contingency
 
     def update_order_status(self):
         if ((self.order_buy_status.strip() != '') and (self.order_buy_status != 'FILLED')):                     # Buy Order in Transition
-            self.order_buy_status = api_GetOrderStatus('BUY', func_get_account(obj_LineOrderStatus.acct_desc), self)
+            self.order_buy_status = api_GetOrderStatus('BUY', self)
         if ((self.order_buy_status == 'FILLED') and (self.order_sell_status.strip() != '') and (self.order_sell_status != 'FILLED')):    # Sell Order in Transition
-            self.order_sell_status = api_GetOrderStatus('SELL', func_get_account(obj_LineOrderStatus.acct_desc), self)
+            self.order_sell_status = api_GetOrderStatus('SELL', self)
 
 class cls_ListLineBuySellStatus:
     def __init__(self):  # attributes
         self.List = []
+        self.dict_groups = {}  # Symbol: [cls_LineBuySellStatus] by period
+        self.dict_counts = {}  # Symbol: [Buy 'Yes' count, Sell 'Yes' count]
+        self.arr_trigger_buy  = np.zeros((0, len(lst_rsi_columns)))  # Triggers of the rows of List by column of lst_rsi_columns
+        self.arr_trigger_sell = np.zeros((0, len(lst_rsi_columns)))
 
     def initial_load(self, obj_ListLineOrderStatus):
-        # add new records
+        # add new records; a record by symbol and period of the Single orders
+        set_seen = set()
         for obj_LineOrderStatus in obj_ListLineOrderStatus.List:
             if (obj_LineOrderStatus.type.strip() == 'Single'):
-                bool_symbol_found = False
-                for obj_LineBuySellStatus in self.List:
-                    if ((obj_LineOrderStatus.symbol == obj_LineBuySellStatus.symbol) and
-                        (obj_LineOrderStatus.period == obj_LineBuySellStatus.period)):
-                        bool_symbol_found = True
-                if (bool_symbol_found == False):
-                    self.List.append(cls_LineBuySellStatus(obj_LineOrderStatus))
+                if ((obj_LineOrderStatus.symbol, obj_LineOrderStatus.period) not in set_seen):
+                    set_seen.add((obj_LineOrderStatus.symbol, obj_LineOrderStatus.period))
+                    obj_LineBuySellStatus = cls_LineBuySellStatus(obj_LineOrderStatus)
+                    self.List.append(obj_LineBuySellStatus)
+                    self.dict_groups.setdefault(obj_LineBuySellStatus.symbol, []).append(obj_LineBuySellStatus)
+        self.arr_trigger_buy, self.arr_trigger_sell = func_trigger_columns(self.List)
         # count repetitions
-        for obj_LineBuySellStatus in self.List:
-            str_symbol = ''
-            for obj_LineBuySellStatus_Nested in self.List:
-                if (str_symbol == ''):
-                    if (obj_LineBuySellStatus_Nested.repetitions == 0):
-                        str_symbol = obj_LineBuySellStatus_Nested.symbol.strip()
-                        int_cntr_repetitions = 0
-                if (obj_LineBuySellStatus_Nested.symbol.strip() == str_symbol):
-                    int_cntr_repetitions = int_cntr_repetitions + 1
-            for obj_LineBuySellStatus_Nested in self.List:
-                if (obj_LineBuySellStatus_Nested.symbol == str_symbol):
-                    obj_LineBuySellStatus_Nested.repetitions = int_cntr_repetitions
+        for str_symbol, lst_group in self.dict_groups.items():
+            self.dict_counts[str_symbol] = [0, 0]
+            for obj_LineBuySellStatus in lst_group:
+                obj_LineBuySellStatus.repetitions = len(lst_group)
         func_display_info(80, 'Both', ['BuySell monitored: '])
         for obj_LineBuySellStatus in self.List:
             func_display_info(80, 'Both', [str(obj_LineBuySellStatus.symbol) + ' ' + str(obj_LineBuySellStatus.period) + ' ' + str(obj_LineBuySellStatus.repetitions)])
@@ -1541,33 +1807,28 @@ class cls_ListLineBuySellStatus:
             obj_LineBuySellStatus.print()
 
     def update_market_indicators(self, obj_ListLineMarketIndicators):
+        # Buy/Sell 'Yes' counts of the symbol follow the statuses flipped by update
+        arr_rsi, dict_rows = obj_ListLineMarketIndicators.rsi_matrix()
+        arr_row = np.array([dict_rows.get(obj_LineBuySellStatus.symbol, -1) for obj_LineBuySellStatus in self.List], dtype='<i8')
+        arr_buy, arr_sell = func_eval_triggers(self.arr_trigger_buy, self.arr_trigger_sell, arr_rsi, arr_row)
+        dict_position = {id(obj_LineBuySellStatus): int_position for int_position, obj_LineBuySellStatus in enumerate(self.List)}
         for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List:
-            for obj_LineBuySellStatus in self.List:
-                if (obj_LineMarketIndicators.symbol == obj_LineBuySellStatus.symbol):
-                    obj_LineBuySellStatus.update(obj_LineMarketIndicators)
+            lst_counts = self.dict_counts.get(obj_LineMarketIndicators.symbol)
+            for obj_LineBuySellStatus in self.dict_groups.get(obj_LineMarketIndicators.symbol, []):
+                str_buy_status, str_sell_status = obj_LineBuySellStatus.buy_status, obj_LineBuySellStatus.sell_status
+                int_position = dict_position[id(obj_LineBuySellStatus)]
+                obj_LineBuySellStatus.update(obj_LineMarketIndicators, bool(arr_buy[int_position]), bool(arr_sell[int_position]))
+                if (obj_LineBuySellStatus.buy_status != str_buy_status):
+                    lst_counts[0] = lst_counts[0] + (1 if (obj_LineBuySellStatus.buy_status == 'Yes') else 0) - (1 if (str_buy_status == 'Yes') else 0)
+                if (obj_LineBuySellStatus.sell_status != str_sell_status):
+                    lst_counts[1] = lst_counts[1] + (1 if (obj_LineBuySellStatus.sell_status == 'Yes') else 0) - (1 if (str_sell_status == 'Yes') else 0)
 
     def update_repetitions(self):
-        str_symbol = ''
-        for obj_LineBuySellStatus in self.List:
-            if (str_symbol == ''):  # Select symbol
-                str_symbol = obj_LineBuySellStatus.symbol
-            else:
-                if (obj_LineBuySellStatus.symbol != str_symbol):
-                    str_symbol = obj_LineBuySellStatus.symbol
-                else:
-                    continue
-            int_cntr_buys = 0
-            int_cntr_sells = 0
-            for obj_LineBuySellStatus_Nested in self.List:
-                if (obj_LineBuySellStatus_Nested.symbol == str_symbol):
-                    if (obj_LineBuySellStatus_Nested.buy_status.strip() == 'Yes'):
-                        int_cntr_buys = int_cntr_buys + 1
-                    if (obj_LineBuySellStatus_Nested.sell_status.strip() == 'Yes'):
-                        int_cntr_sells = int_cntr_sells + 1
-            for obj_LineBuySellStatus_Nested in self.List:
-                if (obj_LineBuySellStatus_Nested.symbol == str_symbol):
-                    obj_LineBuySellStatus_Nested.repetitions_buy = int_cntr_buys
-                    obj_LineBuySellStatus_Nested.repetitions_sell = int_cntr_sells
+        for str_symbol, lst_group in self.dict_groups.items():
+            int_cntr_buys, int_cntr_sells = self.dict_counts[str_symbol]
+            for obj_LineBuySellStatus in lst_group:
+                obj_LineBuySellStatus.repetitions_buy = int_cntr_buys
+                obj_LineBuySellStatus.repetitions_sell = int_cntr_sells
 
 class cls_ListLineMarketIndicators:
     def __init__(self):  # attributes
@@ -1586,30 +1847,63 @@ class cls_ListLineMarketIndicators:
             func_display_info(80, 'Both', [str(obj_LineMarketIndicators.symbol)])
 
     def load(self):
+        # Streaming feed: wait for new 1 min bars (after the first cycle); RSI is updated for symbols with new bars
+        dict_FeedBars, dict_FeedLastPrice = {}, {}
+        if (obj_FeedClient is not None):
+            if any((obj_LineMarketIndicators.need_load_from_file == 'No') for obj_LineMarketIndicators in self.List):
+                obj_FeedClient.wait(float_feed_wait)
+            dict_FeedBars, dict_FeedLastPrice = obj_FeedClient.take()
+
         DateTimeNow_UnixEpoch_TDAFormat = int(round(time.time() * 1000, 0))
         func_display_info(80, 'Both', ['DateTimeNow_UnixEpoch_TDAFormat: ' + str(DateTimeNow_UnixEpoch_TDAFormat)])
 
+        dict_LastPrice, dict_LastPrice_UnixEpoch_TDAFormat = {}, {}
+        for str_symbol, (LastPrice_UnixEpoch_TDAFormat, LastPrice) in dict_FeedLastPrice.items():
+            dict_LastPrice[str_symbol] = LastPrice
+            dict_LastPrice_UnixEpoch_TDAFormat[str_symbol] = LastPrice_UnixEpoch_TDAFormat
+        lst_Symb = [obj_LineMarketIndicators.symbol for obj_LineMarketIndicators in self.List if (obj_LineMarketIndicators.symbol not in dict_LastPrice)]
+        if (len(lst_Symb) > 0):
+            dict_LastPrice.update(api_GetLastPrices(lst_Symb))  # Quotes of all symbols (not on the feed yet)
+            LastPrice_UnixEpoch_TDAFormat = int(round(time.time() * 1000, 0))
+            for str_symbol in lst_Symb:
+                dict_LastPrice_UnixEpoch_TDAFormat[str_symbol] = LastPrice_UnixEpoch_TDAFormat
+
+        lst_lst_history_requests = []
         for obj_LineMarketIndicators in self.List:
             obj_LineMarketIndicators.load_from_file(DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.load_from_online(DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('week', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('day', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('4hr', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('1hr', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('30min', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_rsi('15min', DateTimeNow_UnixEpoch_TDAFormat)
-            obj_LineMarketIndicators.calc_last_price(api_GetLastPrice(obj_LineMarketIndicators.symbol))
+            obj_LineMarketIndicators.add_prices(dict_FeedBars.get(obj_LineMarketIndicators.symbol, []))  # Before planning; 1 min prices requested only if the feed missed them
+            lst_lst_history_requests.append(obj_LineMarketIndicators.plan_history(DateTimeNow_UnixEpoch_TDAFormat))
+        lst_HistoricalPrices = func_get_historical_prices([tup_request for lst_history_requests in lst_lst_history_requests for tup_request in lst_history_requests])
+
+        int_first = 0
+        for obj_LineMarketIndicators, lst_history_requests in zip(self.List, lst_lst_history_requests):
+            obj_LineMarketIndicators.load_from_online(DateTimeNow_UnixEpoch_TDAFormat, lst_HistoricalPrices[int_first:(int_first + len(lst_history_requests))],
+                                                      dict_LastPrice[obj_LineMarketIndicators.symbol], dict_LastPrice_UnixEpoch_TDAFormat[obj_LineMarketIndicators.symbol])
+            int_first = int_first + len(lst_history_requests)
+            if ((obj_FeedClient is None) or (len(lst_history_requests) > 0) or (obj_LineMarketIndicators.symbol in dict_FeedBars)):
+                obj_LineMarketIndicators.calc_rsi(DateTimeNow_UnixEpoch_TDAFormat)
+            obj_LineMarketIndicators.calc_last_price(dict_LastPrice[obj_LineMarketIndicators.symbol])
 
     def print(self):
         func_display_info(20, 'Both', ['Symb     Wk   Day   4hr   1hr   30m   15m    Last'])
         for obj_LineMarketIndicators in self.List:
             func_display_info(20, 'Both', [obj_LineMarketIndicators.print()])
 
+    def rsi_matrix(self):
+        # Current RSI of the symbols: a row by symbol (dict_rows) and a column by lst_rsi_columns
+        arr_rsi = np.array([[getattr(obj_LineMarketIndicators, 'rsi_' + str_column) for str_column in lst_rsi_columns] for obj_LineMarketIndicators in self.List], dtype='<f8')
+        dict_rows = {obj_LineMarketIndicators.symbol: int_row for int_row, obj_LineMarketIndicators in enumerate(self.List)}
+        return (arr_rsi.reshape(len(self.List), len(lst_rsi_columns)), dict_rows)
+
     def save(self):
-        for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List:  # Save Stock Prices file before exit
-            if (len(obj_LineMarketIndicators.list_prices) > 0):
+        for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List:  # Save new Stock Prices to file
+            if (len(obj_LineMarketIndicators.arr_dates) > 0):
                 obj_LineMarketIndicators.save()
 
+    def wait_compaction(self):
+        for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List:  # Wait for Stock Prices files being compacted before exit
+            obj_LineMarketIndicators.wait_compaction()
+
 class cls_ListLineOrderStatus:
     def __init__(self):  # attributes
         self.List = []
@@ -1681,188 +1975,650 @@ class cls_ListLineOrderStatus:
             outF.write("\n")
         time.sleep(float_time_delay_io)
 
-def func_calc_rsi(ListValues):
-    # ListValues has Oldest record first, len(ListValues) is the number of records to process
-    ListGain = []
-    ListLoss = []
-    ListAvgGain = []
-    ListAvgLoss = []
-    ListRS = []
-    ListRSI = []
-    SumGain = 0.0
-    SumLoss = 0.0
-
-#   if (len(ListValues) < 15):  #  modified interation limit to allow new stock IPOs, e.g. COIN
-    if (len(ListValues) < 15):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['* * * ERROR * * * missing historical records to calculate RSI in func_calc_rsi.'])
-        func_display_info(-1, 'Both', ['-' * 128])
-
-    # Record Zero is set to 0
-    ListGain.append(0.0)
-    ListLoss.append(0.0)
-    ListAvgGain.append(0.0)
-    ListAvgLoss.append(0.0)
-    ListRS.append(0.0)
-    ListRSI.append(0.0)
-
-    # Calculate Gain and Loss for all records; pointer; record + 1
-    for cntr in range(1, len(ListValues)):  # Process from 1 to (len(ListValues) - 1)
-        Change = (ListValues[cntr] - ListValues[cntr - 1])
-        if (Change > 0):
-            ListGain.append(Change)
-            ListLoss.append(0.0)
+class cls_OrderIndex:
+    # Orders by (symbol, period, type): ladder of the orders sorted by seq, and ladder positions of the active orders with buy price.
+    # The prior order buy price of an order is the buy price of the closest active order before it in its ladder.
+    def __init__(self):  # attributes
+        self.dict_indicators = {}  # Symbol: cls_LineMarketIndicators
+        self.dict_ladders    = {}  # (symbol, period, type): [cls_LineOrderStatus] sorted by seq
+        self.dict_positions  = {}  # id(cls_LineOrderStatus): ((symbol, period, type), position in ladder)
+        self.dict_priced     = {}  # (symbol, period, type): [positions in ladder of active orders with buy price], sorted
+        self.arr_indicator_row = np.zeros(0, dtype='<i8')               # Orders in List order: row of the symbol in the RSI matrix; -1 none
+        self.arr_trigger_buy   = np.zeros((0, len(lst_rsi_columns)))    # Orders in List order: triggers by column of lst_rsi_columns
+        self.arr_trigger_sell  = np.zeros((0, len(lst_rsi_columns)))
+        self.arr_buy           = np.zeros(0, dtype=bool)                # Orders in List order: RSI triggers of Buy / Sell met (evaluate)
+        self.arr_sell          = np.zeros(0, dtype=bool)
+
+    def build(self, obj_ListLineOrderStatus, obj_ListLineMarketIndicators):
+        self.dict_indicators = {obj_LineMarketIndicators.symbol: obj_LineMarketIndicators for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List}
+        self.dict_ladders, self.dict_positions, self.dict_priced = {}, {}, {}
+        for obj_LineOrderStatus in sorted(obj_ListLineOrderStatus.List, key=attrgetter("seq")):
+            tup_key = (obj_LineOrderStatus.symbol, obj_LineOrderStatus.period, obj_LineOrderStatus.type)
+            lst_ladder = self.dict_ladders.setdefault(tup_key, [])
+            self.dict_positions[id(obj_LineOrderStatus)] = (tup_key, len(lst_ladder))
+            lst_ladder.append(obj_LineOrderStatus)
+            self.dict_priced.setdefault(tup_key, [])
+            self.update(obj_LineOrderStatus)
+        dict_rows = {obj_LineMarketIndicators.symbol: int_row for int_row, obj_LineMarketIndicators in enumerate(obj_ListLineMarketIndicators.List)}
+        self.arr_indicator_row = np.array([dict_rows.get(obj_LineOrderStatus.symbol, -1) for obj_LineOrderStatus in obj_ListLineOrderStatus.List], dtype='<i8')
+        self.arr_trigger_buy, self.arr_trigger_sell = func_trigger_columns(obj_ListLineOrderStatus.List)
+
+    def evaluate(self, arr_rsi):
+        # RSI triggers of all orders against the RSI matrix of the symbols (rsi_matrix)
+        self.arr_buy, self.arr_sell = func_eval_triggers(self.arr_trigger_buy, self.arr_trigger_sell, arr_rsi, self.arr_indicator_row)
+
+    def indicators(self, str_symbol):
+        return (self.dict_indicators.get(str_symbol))
+
+    def prior_order_buy_price(self, obj_LineOrderStatus):
+        tup_key, int_position = self.dict_positions[id(obj_LineOrderStatus)]
+        lst_priced = self.dict_priced[tup_key]
+        int_prior = bisect.bisect_left(lst_priced, int_position)
+        if (int_prior == 0):
+            return (0.0)
+        return (self.dict_ladders[tup_key][lst_priced[int_prior - 1]].order_buy_price)
+
+    def update(self, obj_LineOrderStatus):
+        # After status changes of the order (place_order, update_order_status, reset_order)
+        tup_key, int_position = self.dict_positions[id(obj_LineOrderStatus)]
+        lst_priced = self.dict_priced[tup_key]
+        int_found = bisect.bisect_left(lst_priced, int_position)
+        bool_indexed = ((int_found < len(lst_priced)) and (lst_priced[int_found] == int_position))
+        bool_priced = ((obj_LineOrderStatus.order_buy_status.strip() != '') and (obj_LineOrderStatus.order_buy_price != 0.0))
+        if (bool_priced and not bool_indexed):
+            lst_priced.insert(int_found, int_position)
+        elif (bool_indexed and not bool_priced):
+            del lst_priced[int_found]
+
+class cls_OrderSnapshot:
+    # Orders of each account (and their child orders) by orderId: an orders list request by account and cycle, on first use.
+    # Orders not in the snapshot (placed after it or entered before int_days days) are requested one by one.
+    def __init__(self, int_days):  # attributes
+        self.days          = int_days
+        self.dict_accounts = {}  # Account: {orderId: order}
+        self.int_requests  = 0
+        self.int_hits      = 0
+        self.int_misses    = 0
+
+    def add(self, dict_orders, lst_orders):
+        for dict_order in lst_orders:
+            dict_orders[dict_order['orderId']] = dict_order
+            self.add(dict_orders, dict_order.get('childOrderStrategies', []))
+
+    def clear(self):
+        # New cycle
+        self.dict_accounts = {}
+
+    def get(self, str_account, int_order_id):
+        if (str_account not in self.dict_accounts):
+            self.int_requests = self.int_requests + 1
+            self.dict_accounts[str_account] = {}
+            lst_orders = api_GetOrders(str_account, self.days)
+            if (lst_orders is not None):
+                self.add(self.dict_accounts[str_account], lst_orders)
+        dict_order = self.dict_accounts[str_account].get(int(int_order_id))
+        if (dict_order is None):
+            self.int_misses = self.int_misses + 1
         else:
-            ListGain.append(0.0)
-            ListLoss.append((Change * (-1)))
+            self.int_hits = self.int_hits + 1
+        return (dict_order)
 
-    if ((len(ListGain) != len(ListValues)) or (len(ListLoss) != len(ListValues))):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['* * * ERROR * * * Number of records use in calculation do NOT match (mark1) in func_calc_rsi: ' + str(len(ListGain)) + ' and ' + str(len(ListLoss)) + ' vs. ' + str(len(ListValues))])
-        func_display_info(-1, 'Both', ['-' * 128])
+    def put(self, str_account, dict_order):
+        # Order just requested; kept for the status requests of this cycle
+        if (str_account in self.dict_accounts):
+            self.add(self.dict_accounts[str_account], [dict_order])
 
-    # Processing records from 1 to 14. Record 0 has initial value of 0. Minimum records required are 15.
-    for cntr in range(1, 15):
-        SumGain = SumGain + ListGain[cntr]
-        SumLoss = SumLoss + ListLoss[cntr]
+    def print(self):
+        return ('order snapshots: ' + str(self.int_requests) + ' hits: ' + str(self.int_hits) + ' misses: ' + str(self.int_misses))
+
+class cls_RateLimiter:
+    # Token bucket for API requests of all threads: bursts up to int_burst requests, refilled at float_rate requests by second.
+    # A request takes a token; when none is left it waits until its token is refilled.
+    def __init__(self, float_rate, int_burst):  # attributes
+        self.rate       = float_rate
+        self.burst      = int_burst
+        self.tokens     = float(int_burst)
+        self.time_last  = time.monotonic()
+        self.lock       = threading.Lock()
+        self.int_requests   = 0      # Requests
+        self.int_throttled  = 0      # Requests that waited
+        self.float_throttled = 0.0   # Seconds waited
+
+    def acquire(self):
+        with self.lock:
+            float_now = time.monotonic()
+            self.tokens = min(float(self.burst), self.tokens + ((float_now - self.time_last) * self.rate)) - 1
+            self.time_last = float_now
+            float_wait = max((-self.tokens) / self.rate, 0.0)  # Negative tokens are reserved by waiting requests
+            self.int_requests = self.int_requests + 1
+            if (float_wait > 0):
+                self.int_throttled = self.int_throttled + 1
+                self.float_throttled = self.float_throttled + float_wait
+        if (float_wait > 0):
+            time.sleep(float_wait)
 
-    # Initialize 13 records [0 to 13].  Pending to fill record 14.
-    for cntr in range(1, 14):
-        ListAvgGain.append(0.0)
-        ListAvgLoss.append(0.0)
-        ListRS.append(0.0)
-        ListRSI.append(0.0)
+    def print(self):
+        return ('API requests: ' + str(self.int_requests) + ' throttled: ' + str(self.int_throttled) + ' seconds throttled: ' + str(round(self.float_throttled, 1)))
+
+class cls_RsiState:
+    # Wilder RSI state of closed bars for one symbol and Period. A bar is closed once a price of 1min (or longer) Range exists in a
+    # later bar; last prices (Range 0) do not close bars. Closed bars are added in O(1); open bars are kept apart for the RSI.
+    def __init__(self, Period):  # attributes
+        self.period         = Period
+        self.need_recompute = 'Yes'   # Set to calculate all bars again
+        self.key_last       = -1      # Key of last closed bar
+        self.date_last      = 0       # Date of last price in last closed bar
+        self.int_records    = 0       # Prices up to date_last; a different number means the history changed
+        self.int_closes     = 0       # Closed bars added
+        self.close_last     = 0.0     # Close of last bar added
+        self.lst_closes     = []      # First 15 closes; Average Gain/Loss start on 15th close
+        self.lst_closes_open = []     # Closes of open bars, oldest first; newest price last
+        self.avg_gain       = 0.0
+        self.avg_loss       = 0.0
+
+    def add_bars(self, arr_keys, arr_dates, arr_closes, key_open):
+        # Bars oldest first; returns False if a bar closed already received prices
+        int_first = int(np.searchsorted(arr_dates, self.date_last, side='right'))  # Bars newer than last closed bar
+        if ((int_first < len(arr_keys)) and (arr_keys[int_first] <= self.key_last)):
+            return (False)
+        if (key_open is None):  # No price of 1min (or longer) Range; all bars open
+            int_open = int_first
+        else:
+            int_open = int(np.searchsorted(arr_keys, key_open, side='left'))
+        if (int_open > int_first):
+            self.add_closes(arr_closes[int_first:int_open])
+            self.key_last  = int(arr_keys[int_open - 1])
+            self.date_last = int(arr_dates[int_open - 1])
+        self.lst_closes_open = arr_closes[max(int_open, int_first):].tolist()
+        return (True)
+
+    def add_close(self, float_close):
+        self.int_closes = self.int_closes + 1
+        if (self.int_closes <= 15):
+            self.lst_closes.append(float_close)
+            if (self.int_closes == 15):
+                arr_avg_gain, arr_avg_loss = func_calc_rsi_state_batch([self.lst_closes])
+                self.avg_gain = float(arr_avg_gain[0])
+                self.avg_loss = float(arr_avg_loss[0])
+        else:
+            Change = float_close - self.close_last
+            if (Change > 0):
+                self.avg_gain = ((self.avg_gain * 13) + Change) / 14
+                self.avg_loss = ((self.avg_loss * 13) + 0.0) / 14
+            else:
+                self.avg_gain = ((self.avg_gain * 13) + 0.0) / 14
+                self.avg_loss = ((self.avg_loss * 13) + (Change * (-1))) / 14
+        self.close_last = float_close
+
+    def add_closes(self, arr_closes):
+        if ((self.int_closes == 0) and (len(arr_closes) >= 15)):  # All bars; Average Gain/Loss in one vectorized step
+            int_lookback = func_rsi_lookback(self.period)
+            if ((int_lookback > 0) and (len(arr_closes) > int_lookback)):
+                arr_closes = arr_closes[-int_lookback:]
+            arr_avg_gain, arr_avg_loss = func_calc_rsi_state_batch([arr_closes])
+            self.int_closes = len(arr_closes)
+            self.lst_closes = arr_closes[:15].tolist()
+            self.close_last = float(arr_closes[-1])
+            self.avg_gain = float(arr_avg_gain[0])
+            self.avg_loss = float(arr_avg_loss[0])
+        else:
+            for float_close in arr_closes.tolist():
+                self.add_close(float_close)
+
+    def count_newer(self, arr_dates):
+        # Prices (sorted newest first) newer than last closed bar; all prices when bars are calculated again
+        if ((self.need_recompute == 'Yes') or
+            (self.int_records != (len(arr_dates) - int(np.searchsorted(-arr_dates, -self.date_last, side='left'))))):
+            func_display_info(60, 'Both', ['Calculate RSI of all bars: ' + self.period])
+            self.reset()
+            return (len(arr_dates))
+        return (int(np.searchsorted(-arr_dates, -self.date_last, side='left')))
+
+    def reset(self):
+        self.need_recompute = 'No'
+        self.key_last       = -1
+        self.date_last      = 0
+        self.int_records    = 0
+        self.int_closes     = 0
+        self.close_last     = 0.0
+        self.lst_closes     = []
+        self.lst_closes_open = []
+        self.avg_gain       = 0.0
+        self.avg_loss       = 0.0
+
+class cls_SessionCalendar:
+    # Local days from day_first on: start of day (Unix Epoch in TDA format), weekday, trading day and market sessions.
+    # Sessions default to preMarket 6 AM, regularMarket 8:30 AM, postMarket 3 PM to 7 PM on weekdays (NY time less 60 minutes);
+    # api_GetMarketHours records the actual sessions of the day, closed days have none. Dates outside the days extend them.
+    def __init__(self):  # attributes
+        self.day_first        = 0                             # Ordinal of first day
+        self.arr_day_start    = np.zeros(0, dtype='<i8')      # Start of each day, and end of last day
+        self.arr_offset       = np.zeros(0, dtype='<i8')      # Local time offset at noon
+        self.arr_weekday      = np.zeros(0, dtype='<i8')      # Monday is 0
+        self.arr_trading_day  = np.zeros(0, dtype='<i8')      # Weekdays since ordinal 1; Saturday and Sunday are Friday
+        self.arr_sessions     = np.zeros((0, 6), dtype='<i8') # preMarket, regularMarket, postMarket start and end; 0 if closed
+        self.dict_market_hours = {}                           # Sessions from api_GetMarketHours by ordinal
+
+    def day_start(self, int_date):
+        int_index = int(self.index(np.array([int_date], dtype='<i8'))[0])
+        return (int(self.arr_day_start[int_index]))
+
+    def extend(self, int_date_first, int_date_last):
+        if ((len(self.arr_day_start) > 1) and (self.arr_day_start[0] <= int_date_first) and (int_date_last < self.arr_day_start[-1])):
+            return ()
+        if (len(self.arr_day_start) > 1):
+            int_date_first = min(int_date_first, int(self.arr_day_start[0]))
+            int_date_last  = max(int_date_last, int(self.arr_day_start[-1]) - 1)
+        int_day_first = datetime.fromtimestamp(int_date_first / 1000).toordinal() - 7  # A week of margin each side
+        int_day_last  = datetime.fromtimestamp(int_date_last / 1000).toordinal() + 7
+        arr_day = np.arange(int_day_first, int_day_last + 2, dtype='<i8')
+        self.day_first       = int_day_first
+        self.arr_day_start   = np.array([int(round(time.mktime(datetime.fromordinal(int_day).timetuple()) * 1000, 0)) for int_day in arr_day.tolist()], dtype='<i8')
+        self.arr_offset      = np.array([time.localtime(int_day_start // 1000 + (12 * 60 * 60)).tm_gmtoff for int_day_start in self.arr_day_start[:-1].tolist()], dtype='<i8') * 1000
+        self.arr_weekday     = (arr_day[:-1] - 1) % 7
+        self.arr_trading_day = ((arr_day[:-1] - self.arr_weekday) // 7) * 5 + np.minimum(self.arr_weekday, 4)
+        arr_midnight = (arr_day[:-1] - 719163) * (24 * 60 * 60 * 1000) - self.arr_offset  # Wall clock midnight; ordinal 719163 is 1970-01-01
+        self.arr_sessions = np.zeros((len(arr_day) - 1, 6), dtype='<i8')
+        for int_session, int_hours in enumerate([6, 8.5, 8.5, 15, 15, 19]):
+            self.arr_sessions[:, int_session] = np.where(self.arr_weekday < 5, arr_midnight + int(int_hours * 60 * 60 * 1000), 0)
+        for int_day, lst_sessions in self.dict_market_hours.items():
+            self.arr_sessions[int_day - self.day_first] = lst_sessions
+        func_display_info(60, 'Both', ['Session calendar: ' + str(datetime.fromordinal(int_day_first).date()) + ' to ' + str(datetime.fromordinal(int_day_last).date())])
+
+    def index(self, arr_dates):
+        # Day of each date by binary search; arr_dates sorted newest first
+        if (len(arr_dates) > 0):
+            self.extend(int(arr_dates[-1]), int(arr_dates[0]))
+        return (np.searchsorted(self.arr_day_start, arr_dates, side='right') - 1)
+
+    def sessions(self, int_date):
+        # preMarket, regularMarket, postMarket flags of a date
+        int_index = int(self.index(np.array([int_date], dtype='<i8'))[0])
+        arr_sessions = self.arr_sessions[int_index]
+        return (bool((arr_sessions[0] <= int_date <= arr_sessions[1]) and (arr_sessions[0] > 0)),
+                bool((arr_sessions[2] <= int_date <= arr_sessions[3]) and (arr_sessions[2] > 0)),
+                bool((arr_sessions[4] <= int_date <= arr_sessions[5]) and (arr_sessions[4] > 0)))
+
+    def set_market_hours(self, int_date, lst_sessions):
+        # lst_sessions: preMarket, regularMarket, postMarket start and end; empty when the market is closed
+        int_index = int(self.index(np.array([int_date], dtype='<i8'))[0])
+        if (len(lst_sessions) == 0):
+            lst_sessions = [0, 0, 0, 0, 0, 0]
+        self.dict_market_hours[self.day_first + int_index] = lst_sessions
+        self.arr_sessions[int_index] = lst_sessions
+
+    def time_of_day(self, arr_dates, arr_index):
+        # Milliseconds since wall clock midnight
+        return ((arr_dates + self.arr_offset[arr_index]) % (24 * 60 * 60 * 1000))
+
+    def weekday(self, int_date):
+        int_index = int(self.index(np.array([int_date], dtype='<i8'))[0])
+        return (int(self.arr_weekday[int_index]))
+
+class cls_SessionState:
+    # Market hours of the next int_days trading days, requested ahead and cached in str_file. The session flags
+    # (preMarket, regularMarket, postMarket) are switched by a timer at each session start and end, so checks only read them.
+    # Hours are requested again (on the next check) after midnight for the new day ahead.
+    def __init__(self, str_file, int_days):  # attributes
+        self.str_file = str_file
+        self.int_days = int_days
+        self.tup_sessions = (False, False, False)  # preMarket, regularMarket, postMarket now
+        self.lst_transitions = []                  # (date, session flags from that date) sorted by date
+        self.int_date_refresh = 0                  # Start of next day; hours are requested again
+        self.need_refresh = 'Yes'
+        self.lock = threading.Lock()
+        self.obj_timer = None
 
-    if (len(ListRSI) != 14):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['* * * ERROR * * * number of records use in calculation do NOT match (mark2) in func_calc_rsi: ' + str(len(ListGain)) + ' ' + str(len(ListValues))])
-        func_display_info(-1, 'Both', ['-' * 128])
+    def load(self):
+        # Cached hours by ordinal of the day; empty or missing file requests all days again
+        if (os.path.isfile(self.str_file)):
+            try:
+                with open(self.str_file, 'r') as inF:
+                    dict_market_hours = json.load(inF)
+            except ValueError:
+                func_display_info(0, 'Both', ['* * * ERROR * * * Invalid file ' + self.str_file + ' in cls_SessionState; market hours requested again'])
+                dict_market_hours = {}
+            for str_day, lst_sessions in dict_market_hours.items():
+                obj_SessionCalendar.set_market_hours(func_ny_time_to_epoch(datetime.fromordinal(int(str_day)) + timedelta(hours=12)), lst_sessions)
+
+    def refresh(self):
+        # Hours of the trading days not cached yet, then transitions of these days from now on
+        with self.lock:
+            int_day_today = (datetime.today() + timedelta(minutes=60)).toordinal()  # current NY day
+            lst_days = [int_day for int_day in range(int_day_today, int_day_today + (2 * self.int_days) + 7) if (((int_day - 1) % 7) < 5)][0:self.int_days]
+            bool_saved = True
+            for int_day in lst_days:
+                if (int_day not in obj_SessionCalendar.dict_market_hours):
+                    api_GetMarketHours(datetime.fromordinal(int_day) + timedelta(hours=12))  # Noon NY time
+                    bool_saved = False
+            if not (bool_saved):
+                self.save(int_day_today)
+            int_now = int(round(time.time() * 1000, 0))
+            arr_index = obj_SessionCalendar.index(np.array([func_ny_time_to_epoch(datetime.fromordinal(lst_days[-1] + 1)), int_now], dtype='<i8'))
+            arr_sessions = obj_SessionCalendar.arr_sessions[arr_index[1]:(arr_index[0] + 1)]
+            arr_dates = np.concatenate((arr_sessions[:, 0::2].ravel(), arr_sessions[:, 1::2].ravel() + 1,                  # Sessions start, and end (inclusive)
+                                        obj_SessionCalendar.arr_day_start[(arr_index[1] + 1):(arr_index[0] + 2)]))     # Midnight
+            arr_dates = np.unique(arr_dates[(arr_dates > int_now) & (arr_dates != 1)])
+            self.lst_transitions = [(int_date, obj_SessionCalendar.sessions(int_date)) for int_date in arr_dates.tolist()]
+            self.tup_sessions = obj_SessionCalendar.sessions(int_now)
+            self.int_date_refresh = int(obj_SessionCalendar.arr_day_start[arr_index[1] + 1])
+            self.need_refresh = 'No'
+            func_display_info(20, 'Both', ['Market sessions: preMarket, regularMarket, postMarket ' + str(self.tup_sessions) + ' transitions: ' + str(len(self.lst_transitions))])
+            self.schedule()
+
+    def save(self, int_day_today):
+        # Hours from a week ago on; temporary file replaces str_file
+        dict_market_hours = dict([(str(int_day), [int(int_date) for int_date in lst_sessions]) for int_day, lst_sessions in sorted(obj_SessionCalendar.dict_market_hours.items())
+                                  if (int_day >= int_day_today - 7)])
+        with open(self.str_file + '.tmp', 'w') as outF:
+            json.dump(dict_market_hours, outF)
+        os.replace(self.str_file + '.tmp', self.str_file)
+
+    def schedule(self):
+        if (self.obj_timer is not None):
+            self.obj_timer.cancel()
+        self.obj_timer = None
+        if (len(self.lst_transitions) > 0):
+            self.obj_timer = threading.Timer(max((self.lst_transitions[0][0] - time.time() * 1000) / 1000, 0) + 0.001, self.update)
+            self.obj_timer.daemon = True
+            self.obj_timer.start()
+
+    def stop(self):
+        with self.lock:
+            if (self.obj_timer is not None):
+                self.obj_timer.cancel()
+
+    def update(self):
+        # Timer: session flags of the transitions due
+        with self.lock:
+            int_now = int(round(time.time() * 1000, 0))
+            while ((len(self.lst_transitions) > 0) and (self.lst_transitions[0][0] <= int_now)):
+                self.tup_sessions = self.lst_transitions.pop(0)[1]
+            if ((int_now >= self.int_date_refresh) or (len(self.lst_transitions) == 0)):
+                self.need_refresh = 'Yes'
+            func_display_info(20, 'Both', ['Market sessions: preMarket, regularMarket, postMarket ' + str(self.tup_sessions)])
+            self.schedule()
+
+class cls_TokenManager:
+    # Token Access and Token Refresh in memory with their expiry. A background thread requests them ahead of expiry
+    # (Token Access 5 minutes, Token Refresh 10 days) and saves Trade_Config.ini; API requests only compare the expiry.
+    # The thread retries failed requests; only API requests of the main thread exit on them. io_read_file_Config is changed under lock,
+    # once the main thread has read it (start).
+    def __init__(self):  # attributes
+        global str_token_access, str_token_refresh
+        str_token_access  = io_read_file_Config.get("Access", "str_token_access")
+        str_token_refresh = io_read_file_Config.get("Access", "str_token_refresh")
+        self.dt_access_expiry  = (datetime.strptime(io_read_file_Config.get("Access", "str_token_access_datetime_request"), "%Y%m%d %H:%M:%S") +
+                                  timedelta(minutes=int_token_access_time_limit))
+        self.dt_refresh_expiry = (datetime.strptime(io_read_file_Config.get("Access", "str_token_refresh_datetime_request"), "%Y%m%d %H:%M:%S") +
+                                  timedelta(minutes=int_token_refresh_time_limit))
+        self.lock         = threading.Lock()
+        self.event_stop   = threading.Event()
+        self.obj_thread   = None
+        func_display_info(50, 'Both', ['Token Access expiry: ' + str(self.dt_access_expiry) + ' Token Refresh expiry: ' + str(self.dt_refresh_expiry)])
+
+    def check(self):
+        # Token Access is requested here only if the background thread did not renew it; 2 minutes is time margin.
+        # Only the main thread exits on errors; requests of other threads (func_get_historical_prices) fail and are retried.
+        if (datetime.now() + timedelta(minutes=2) > self.dt_access_expiry):
+            self.refresh(timedelta(minutes=2), timedelta(days=10), threading.current_thread() is threading.main_thread())
+
+    def refresh(self, td_access_margin, td_refresh_margin, bool_exit_on_error=True):
+        # 'Ok' when the tokens are valid, 'No OK' if a token request failed and not bool_exit_on_error
+        with self.lock:
+            dt_now = datetime.now()
+            if (dt_now + td_refresh_margin > self.dt_refresh_expiry):  # Token Refresh is good for 90 days
+                if (api_GetTokenAuthorization('TokenRefresh', bool_exit_on_error) != 'Ok'):
+                    return ('No OK')
+                func_display_info(50, 'Both', ['New str_token_refresh >>>' + str_token_refresh + '<<<'])
+                self.dt_refresh_expiry = dt_now + timedelta(minutes=int_token_refresh_time_limit)
+                io_read_file_Config.set("Access", "str_token_refresh_datetime_request", dt_now.strftime("%Y%m%d %H:%M:%S"))
+                io_read_file_Config.set("Access", "str_token_refresh", str_token_refresh)
+                self.save()
+            if (dt_now + td_access_margin > self.dt_access_expiry):    # Token Access is good for 30 minutes
+                if (api_GetTokenAuthorization('TokenAccess', bool_exit_on_error) != 'Ok'):
+                    return ('No OK')
+                func_display_info(50, 'Both', ['New str_token_access >>>' + str_token_access + '<<<'])
+                self.dt_access_expiry = dt_now + timedelta(minutes=int_token_access_time_limit)
+                io_read_file_Config.set("Access", "str_token_access_datetime_request", dt_now.strftime("%Y%m%d %H:%M:%S"))
+                io_read_file_Config.set("Access", "str_token_access", str_token_access)
+                self.save()
+        return ('Ok')
+
+    def run(self):
+        # Errors are retried by the background thread; API requests renew Token Access if it expires, and exit if they cannot
+        while not (self.event_stop.is_set()):
+            try:
+                if (self.refresh(timedelta(minutes=5), timedelta(days=10), False) == 'Ok'):
+                    float_wait = (min(self.dt_access_expiry - timedelta(minutes=5), self.dt_refresh_expiry - timedelta(days=10)) - datetime.now()).total_seconds()
+                else:
+                    func_display_info(0, 'Both', ['* * * ERROR * * * Unable to renew tokens in cls_TokenManager; retried in 60 seconds'])
+                    float_wait = 60
+            except Exception as e:
+                func_display_info(0, 'Both', ['* * * ERROR * * * Unable to renew tokens in cls_TokenManager: ' + str(e)])
+                float_wait = 60
+            self.event_stop.wait(max(float_wait, 1))
 
-    # Filing record 14 [0 to 14].
-    ListAvgGain.append(SumGain / 14)
-    ListAvgLoss.append(SumLoss / 14)
-    # print(str(ListAvgGain) + " " + str(ListAvgLoss))
-    # print(str(ListAvgGain[14]) + " " + str(ListAvgLoss[14]))
-    if (SumLoss == 0):
-        ListRS.append(999999999)
+    def save(self):
+        # Write a temporary file and replace Trade_Config.ini, so a crash never leaves it half written
+        str_file = str_path_dir_Config + "\Trade_Config.ini"
+        with open(str_file + '.tmp', 'w') as configfile:
+            io_read_file_Config.write(configfile)
+            configfile.flush()
+            os.fsync(configfile.fileno())
+        os.replace(str_file + '.tmp', str_file)
+
+    def start(self):
+        self.obj_thread = threading.Thread(target=self.run, name='TokenManager', daemon=True)
+        self.obj_thread.start()
+
+    def stop(self):
+        self.event_stop.set()
+
+def func_aggregate_prices(arr_dates, arr_prices, arr_frequency, Range):
+    # Closes of Range (15 or 1440) built from finer prices, 1 min (and 15 min for daily), with the close times of
+    # api_GetHistoricalPrices: begin of 15 min plus 14 min; begin of day plus 15 hours, so the daily close is the last price
+    # of regularMarket. Only periods ended before the newest finer price. Returns dates and prices, oldest first.
+    arr_finer = np.flatnonzero((arr_frequency >= 1) & (arr_frequency < Range))
+    if (len(arr_finer) == 0):
+        return (np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<f8'))
+    arr_finer = arr_finer[np.argsort(arr_dates[arr_finer], kind='stable')]
+    arr_begin = arr_dates[arr_finer] - np.where(arr_frequency[arr_finer] == 1, dict_history_close_offset[1], dict_history_close_offset[15])
+    if (Range == 15):
+        arr_period = arr_begin - (arr_begin % (15 * 60 * 1000))
+        arr_end    = arr_period + (15 * 60 * 1000)
     else:
-        ListRS.append(ListAvgGain[14] / ListAvgLoss[14])
-    ListRSI.append(100.0 - (100.0 / (1 + ListRS[14])))
-
-    # print('ListRSI[14]: ' + str(ListRSI[14]))
-
-    # Record 14 completed. Processing additional records.
-    if (len(ListValues) > 15):
-        for cntr in range(15, len(ListValues)):
-            # print('cntr: ' + str(cntr))
-            ListAvgGain.append(((ListAvgGain[cntr - 1] * 13) + ListGain[cntr]) / 14)
-            ListAvgLoss.append(((ListAvgLoss[cntr - 1] * 13) + ListLoss[cntr]) / 14)
-            if (ListAvgLoss[cntr] == 0):
-                ListRS.append(999999999)
-            else:
-                ListRS.append(ListAvgGain[cntr] / ListAvgLoss[cntr])
-            ListRSI.append(100.0000000000 - (100.0000000000 / (1 + ListRS[cntr])))
+        arr_day    = obj_SessionCalendar.index(arr_begin[::-1])[::-1]  # Index first; may extend the calendar
+        arr_period = obj_SessionCalendar.arr_day_start[arr_day]
+        arr_end    = arr_period + dict_history_close_offset[1440]
+    arr_regular = np.flatnonzero((arr_begin < arr_end) & (arr_end <= arr_begin[-1]))  # Prices of ended periods; daily up to close of regularMarket
+    if (len(arr_regular) == 0):
+        return (np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<f8'))
+    arr_period = arr_period[arr_regular]
+    arr_close  = arr_regular[np.flatnonzero(np.concatenate((arr_period[1:] != arr_period[:-1], [True])))]  # Last price of each period
+    return (arr_period[np.searchsorted(arr_regular, arr_close)] + dict_history_close_offset[Range], arr_prices[arr_finer[arr_close]])
+
+def func_append_prices_segment(str_file, lst_prices):
+    # Append packed records; a crash while writing only leaves a partial last record, ignored when loading
+    arr_records = np.zeros(len(lst_prices), dtype=dtype_prices_record)
+    arr_records['date']      = [objPrice[0] for objPrice in lst_prices]
+    arr_records['price']     = [objPrice[1] for objPrice in lst_prices]
+    arr_records['frequency'] = [objPrice[2] for objPrice in lst_prices]
+    with open(str_file, 'ab') as outF:
+        outF.write(arr_records.tobytes())
+        outF.flush()
+        os.fsync(outF.fileno())
 
-    if (len(ListRSI) != len(ListValues)):
-        func_display_info(0, 'Both', ['-' * 128])
-        func_display_info(0, 'Both', ['* * * ERROR * * * number of records use in calculation do NOT match (mark3) in func_calc_rsi: ' + str(len(ListGain)) + ' ' + str(len(ListValues))])
-        func_display_info(-1, 'Both', ['-' * 128])
-
-    # print('ListRSI[max]: ' + str(ListRSI[len(ListValues)-1]))
+def func_calc_rsi(ListValues):
+    # ListValues has Oldest record first, len(ListValues) is the number of records to process
+    float_rsi = func_calc_rsi_batch([ListValues])[0]
     func_display_info(50, 'Both', ['Total Records: ' + str(len(ListValues))])
-
-    # print('Chart Values - Begin')
-    # for cntr in range(14, TotalRecords):
-    #    print(str(ListRSI[cntr]))
-    # print('Chart Values - End')
-
-    func_display_info(90, 'Both', [
-        '          ListValues             ListGain             ListLoss          ListAvgGain          ListAvgLoss               ListRS              ListRSI'])
-    for cntr in range(0, len(ListValues)):
-        func_display_info(90, 'Both', [str("{:20.14f}".format(ListValues[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListGain[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListLoss[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListAvgGain[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListAvgLoss[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListRS[cntr])) + ' ' +
-                                       str("{:20.14f}".format(ListRSI[cntr]))])
-    func_display_info(80, 'Both', ['RSI: ' + str(ListRSI[len(ListValues) - 1])])
-
-    return (ListRSI[len(ListValues) - 1])
+    func_display_info(80, 'Both', ['RSI: ' + str(float_rsi)])
+    return (float_rsi)
+
+def func_calc_rsi_batch(lst_ListValues):
+    # RSI of last record for each list of values; each list has Oldest record first
+    arr_avg_gain, arr_avg_loss = func_calc_rsi_state_batch(lst_ListValues)
+    return (func_calc_rsi_from_state(arr_avg_gain, arr_avg_loss).tolist())
+
+def func_calc_rsi_from_state(avg_gain, avg_loss):
+    # RS is 999999999 when there is no loss
+    arr_avg_gain = np.asarray(avg_gain, dtype=np.float64)
+    arr_avg_loss = np.asarray(avg_loss, dtype=np.float64)
+    arr_rs = np.full(arr_avg_gain.shape, 999999999.0)
+    np.divide(arr_avg_gain, arr_avg_loss, out=arr_rs, where=(arr_avg_loss != 0))
+    return (100.0 - (100.0 / (1 + arr_rs)))
+
+def func_calc_rsi_open_bars(lst_rsi_states):
+    # RSI of each state with its open bars added; states are not modified
+    lst_avg_gain = []
+    lst_avg_loss = []
+    for obj_RsiState in lst_rsi_states:
+        obj_RsiState_Open = copy.copy(obj_RsiState)
+        obj_RsiState_Open.lst_closes = list(obj_RsiState.lst_closes)
+        for float_close in obj_RsiState.lst_closes_open:
+            obj_RsiState_Open.add_close(float_close)
+        func_display_info(70, 'Both', ['Period: ' + obj_RsiState.period + ' Closed bars: ' + str(obj_RsiState.int_closes) + ' Open bars: ' + str(len(obj_RsiState.lst_closes_open))])
+        if (obj_RsiState_Open.int_closes < 15):  # Minimum records required are 15
+            func_display_info(0, 'Both', ['-' * 128])
+            func_display_info(0, 'Both', ['* * * ERROR * * * missing historical records to calculate RSI in func_calc_rsi_open_bars: ' + obj_RsiState.period])
+            func_display_info(-1, 'Both', ['-' * 128])
+        lst_avg_gain.append(obj_RsiState_Open.avg_gain)
+        lst_avg_loss.append(obj_RsiState_Open.avg_loss)
+    return (func_calc_rsi_from_state(lst_avg_gain, lst_avg_loss).tolist())
+
+def func_calc_rsi_state_batch(lst_ListValues):
+    # Wilder smoothing, 14 periods: Average Gain/Loss of last record for each list of values.
+    # Record 14 is the simple average of changes 1 to 14; then Avg(n) = (Avg(n - 1) * 13 + Change(n)) / 14,
+    # that is Avg(n) = a^(n - 14) * Avg(14) + Sum(a^(n - k) * Change(k) / 14) for k 15 to n, a = 13 / 14.
+    # Lists are aligned by last record so the weights a^(n - k) are the same for all lists.
+    int_lists = len(lst_ListValues)
+    int_max_values = 0
+    for ListValues in lst_ListValues:
+        if (len(ListValues) < 15):  # Minimum records required are 15
+            func_display_info(0, 'Both', ['-' * 128])
+            func_display_info(0, 'Both', ['* * * ERROR * * * missing historical records to calculate RSI in func_calc_rsi.'])
+            func_display_info(-1, 'Both', ['-' * 128])
+        int_max_values = max(int_max_values, len(ListValues))
+
+    arr_values = np.zeros((int_lists, int_max_values), dtype=np.float64)  # Aligned by last record; unused values are 0
+    arr_first = np.zeros(int_lists, dtype=np.int64)                        # Column of first record
+    for int_cntr, ListValues in enumerate(lst_ListValues):
+        arr_first[int_cntr] = int_max_values - len(ListValues)
+        arr_values[int_cntr, arr_first[int_cntr]:] = ListValues
+
+    arr_change = np.diff(arr_values, axis=1)          # Change in column j is record j + 1 minus record j
+    arr_gain = np.where(arr_change > 0, arr_change, 0.0)
+    arr_loss = np.where(arr_change > 0, 0.0, -arr_change)
+    arr_column = np.arange(int_max_values - 1)
+    arr_first_avg = (arr_column[np.newaxis, :] >= arr_first[:, np.newaxis]) & (arr_column[np.newaxis, :] < (arr_first[:, np.newaxis] + 14))  # Changes 1 to 14
+    arr_smoothed  = (arr_column[np.newaxis, :] >= (arr_first[:, np.newaxis] + 14))                                                         # Changes 15 to n
+
+    arr_weights = np.power(13.0 / 14.0, np.arange(int_max_values - 2, -1, -1, dtype=np.float64)) / 14  # a^(n - k) / 14
+    arr_decay = np.power(13.0 / 14.0, (int_max_values - 1) - (arr_first + 14))                         # a^(n - 14)
+    arr_avg_gain = (arr_decay * (np.where(arr_first_avg, arr_gain, 0.0).sum(axis=1) / 14)) + (np.where(arr_smoothed, arr_gain, 0.0) @ arr_weights)
+    arr_avg_loss = (arr_decay * (np.where(arr_first_avg, arr_loss, 0.0).sum(axis=1) / 14)) + (np.where(arr_smoothed, arr_loss, 0.0) @ arr_weights)
+    return (arr_avg_gain, arr_avg_loss)
 
 def func_check_market_hours():
-    global bool_isOpen, dt_preMarket_start, dt_preMarket_end, dt_regularMarket_start, dt_regularMarket_end, dt_postMarket_start, dt_postMarket_end
-    global dt_trading_timestamp, bool_preMarket, bool_regularMarket, bool_postMarket
+    global bool_preMarket, bool_regularMarket, bool_postMarket
 
-    if (bool_isOpen):  # Market open
-        dt_trading_timestamp = datetime.today() + timedelta(minutes=60)  # current NY time
-        if ((dt_trading_timestamp >= dt_preMarket_start) and (
-                dt_trading_timestamp <= dt_preMarket_end)):  # Check if current NY time is in preMarket
-            bool_preMarket = True
-        else:
-            bool_preMarket = False
-        if ((dt_trading_timestamp >= dt_regularMarket_start) and (
-                dt_trading_timestamp <= dt_regularMarket_end)):  # Check if current NY time is in regularMarket
-            bool_regularMarket = True
-        else:
-            bool_regularMarket = False
-        if ((dt_trading_timestamp >= dt_postMarket_start) and (
-                dt_trading_timestamp <= dt_postMarket_end)):  # Check if current NY time is in postMarket
-            bool_postMarket = True
-        else:
-            bool_postMarket = False
-    else:  # Market close
-        bool_preMarket = False
-        bool_regularMarket = False
-        bool_postMarket = False
+    if (obj_SessionState.need_refresh == 'Yes'):  # New day; request hours of the day ahead
+        obj_SessionState.refresh()
+    bool_preMarket, bool_regularMarket, bool_postMarket = obj_SessionState.tup_sessions
     return ()
 
 def func_check_token():
-    global int_token_access_time_limit, int_token_refresh_time_limit, str_token_access, str_token_refresh
-
-    time.sleep(float_time_delay_process)  # Delay given to each API Request call
-
-    str_token_access_datetime_request = io_read_file_Config.get("Access", "str_token_access_datetime_request")
-    dt_token_access_datetime_request = datetime.strptime(str_token_access_datetime_request, "%Y%m%d %H:%M:%S")
-    func_display_info(50, 'Both', ['str_token_access_datetime_request >>>' + str_token_access_datetime_request + '<<<'])
-
-    str_token_refresh_datetime_request = io_read_file_Config.get("Access", "str_token_refresh_datetime_request")
-    dt_token_refresh_datetime_request = datetime.strptime(str_token_refresh_datetime_request, "%Y%m%d %H:%M:%S")
-    func_display_info(50, 'Both', ['str_token_refresh_datetime_request >>>' + str_token_refresh_datetime_request + '<<<'])
-
-    str_token_access = io_read_file_Config.get("Access", "str_token_access")
-    func_display_info(50, 'Both', ['str_token_access >>>' + str_token_access + '<<<'])
-
-    str_token_refresh = io_read_file_Config.get("Access", "str_token_refresh")
-    func_display_info(50, 'Both', ['str_token_refresh >>>' + str_token_refresh + '<<<'])
-
-    # Request str_token_access, if expired; it is good for 30 minutes; 2 minutes is time margin
-    if ((dt_token_access_datetime_request + timedelta(minutes=int_token_access_time_limit)) < (datetime.now() + timedelta(minutes=2))):
-        api_GetTokenAuthorization('TokenAccess')
-        func_display_info(50, 'Both', ['New str_token_access >>>' + str_token_access + '<<<'])
+    obj_RateLimiter.acquire()  # Wait for budget of API requests
+    obj_TokenManager.check()   # Token Access valid; refreshed in background ahead of expiry
+
+def func_clean_mixed_ranges(lst_frequency, arr_keep, int_end):
+    # Flag (arr_keep False) records of Range > 1 found as 1 to 3 records out of sequence of another Range, e.g. 15min between 1min
+    # PriorPriorPriorPrior PPPP ==   1    1   1
+    # PriorPriorPrior      PPP  !=  15    1   1
+    # PriorPrior           PP   !=  15   15   1
+    # Prior                P    !=  15   15  15  <-- delete when different
+    # Current                        1    1   1
+    int_pppp = int_ppp = int_pp = int_p = -1
+    for int_cur in range(0, int_end):
+        if not (arr_keep[int_cur]):
+            continue
+        int_range = lst_frequency[int_cur]
+        if (int_p == -1):
+            int_pppp = int_ppp = int_pp = int_p = int_cur
+        if (lst_frequency[int_pppp] == int_range):
+            if ((lst_frequency[int_ppp] != int_range) and (lst_frequency[int_pp] != int_range) and (lst_frequency[int_p] != int_range)):  # 3 out of sequence
+                if (lst_frequency[int_p] > 1):  # skip for Ranges 0 or 1 only
+                    arr_keep[int_p] = False
+                    int_p = int_cur
+                if (lst_frequency[int_pp] > 1):
+                    arr_keep[int_pp] = False
+                    int_pp = int_cur
+                if (lst_frequency[int_ppp] > 1):
+                    arr_keep[int_ppp] = False
+                    int_ppp = int_cur
+        if (lst_frequency[int_ppp] == int_range):
+            if ((lst_frequency[int_pp] != int_range) and (lst_frequency[int_p] != int_range)):  # 2 out of sequence
+                if (lst_frequency[int_p] > 1):
+                    arr_keep[int_p] = False
+                    int_p = int_cur
+                if (lst_frequency[int_pp] > 1):
+                    arr_keep[int_pp] = False
+                    int_pp = int_cur
+        if (lst_frequency[int_pp] == int_range):
+            if (lst_frequency[int_p] != int_range):  # 1 out of sequence
+                if (lst_frequency[int_p] > 1):
+                    arr_keep[int_p] = False
+                    int_p = int_cur
+        int_pppp = int_ppp
+        int_ppp = int_pp
+        int_pp = int_p
+        int_p = int_cur
+
+def func_compact_prices(str_file, arr_dates, arr_prices, arr_frequency, lst_segments):
+    # Runs in background thread: rewrite binary file, then delete segments already included
+    try:
+        func_save_prices_binary(str_file, arr_dates, arr_prices, arr_frequency)
+        for int_generation, str_file_segment in lst_segments:
+            os.remove(str_file_segment)
+    except OSError as e:  # Segments are kept; compaction is tried again next run
+        func_display_info(0, 'Both', ['-' * 128])
+        func_display_info(0, 'Both', [str(e)])
+        func_display_info(0, 'Both', ['* * * ERROR * * * Unable to compact file ' + str_file + ' in func_compact_prices'])
+        func_display_info(0, 'Both', ['-' * 128])
 
-        # Save Token Access information in Trade_Config.ini file
-        dt_token_access_datetime_request = datetime.now()
-        str_token_access_datetime_request = dt_token_access_datetime_request.strftime("%Y%m%d %H:%M:%S")
-        io_read_file_Config.set("Access", "str_token_access_datetime_request", str_token_access_datetime_request)
-        io_read_file_Config.set("Access", "str_token_access", str_token_access)
-        with open(str_path_dir_Config + "\Trade_Config.ini", 'w') as configfile:
-            io_read_file_Config.write(configfile)
-        time.sleep(float_time_delay_io)  # Delay given to write file
-
-    # Request str_token_refresh, if expired; it is good for 90 days; 10 days is time margin
-    if ((dt_token_refresh_datetime_request + timedelta(minutes=int_token_refresh_time_limit)) < (datetime.now() + timedelta(days=10))):
-        api_GetTokenAuthorization('TokenRefresh')
-        func_display_info(50, 'Both', ['New str_token_refresh >>>' + str_token_refresh + '<<<'])
-
-        # Save Token Refresh information in Trade_Config.ini file
-        dt_token_refresh_datetime_request = datetime.now()
-        str_token_refresh_datetime_request = dt_token_refresh_datetime_request.strftime("%Y%m%d %H:%M:%S")
-        io_read_file_Config.set("Access", "str_token_refresh_datetime_request", str_token_refresh_datetime_request)
-        io_read_file_Config.set("Access", "str_token_refresh", str_token_refresh)
-        with open(str_path_dir_Config + "\Trade_Config.ini", 'w') as configfile:
-            io_read_file_Config.write(configfile)
-        time.sleep(float_time_delay_io * 2)  # Delay given to write file
+def func_convert_prices_files(str_path_dir):
+    # One-shot conversion of old text files Stock_<SYMB>.txt to binary files Stock_<SYMB>.bin; text files are kept as backup
+    for str_file_name in sorted(os.listdir(str_path_dir)):
+        if (str_file_name.startswith('Stock_') and str_file_name.endswith('.txt')):
+            str_file_txt = str_path_dir + '\\' + str_file_name
+            str_file_bin = str_file_txt[:-4] + '.bin'
+            if not (os.path.isfile(str_file_bin)):
+                func_display_info(20, 'Both', ['Convert file Historical Prices ' + str_file_name])
+                arr_dates, arr_prices, arr_frequency = func_load_prices_text(str_file_txt)
+                func_save_prices_binary(str_file_bin, arr_dates, arr_prices, arr_frequency)
+                os.utime(str_file_bin, (os.path.getatime(str_file_txt), os.path.getmtime(str_file_txt)))  # Keep Last Update of the text file
+
+def func_decode_price_history(bytes_content, Range):
+    # Response of pricehistory to records of dtype_prices_record: datetime (begin of period) plus close time of Range, close, Range.
+    # Only datetime and close are read; the JSON tree is decoded only if the candles do not hold one of each.
+    obj_match_empty = re_candle_empty.search(bytes_content)
+    lst_datetime = re_candle_datetime.findall(bytes_content)
+    lst_close    = re_candle_close.findall(bytes_content)
+    if ((obj_match_empty is not None) and (len(lst_datetime) == len(lst_close)) and (len(lst_datetime) == bytes_content.count(b'{') - 1)):
+        bool_empty = (obj_match_empty.group(1) == b'true')
+        arr_datetime = np.array(lst_datetime, dtype='S20').astype('<i8')
+        arr_close    = np.array(lst_close, dtype='S32').astype('<f8')
+    else:
+        data = json.loads(bytes_content)
+        bool_empty = data['empty']
+        arr_datetime = np.array([p['datetime'] for p in data.get('candles', [])], dtype='<i8')
+        arr_close    = np.array([p['close'] for p in data.get('candles', [])], dtype='<f8')
+    arr_records = np.empty(len(arr_datetime), dtype=dtype_prices_record)
+    arr_records['date']      = arr_datetime + dict_history_close_offset[Range]  # Default is begin-of-period; add close time of Range
+    arr_records['price']     = arr_close
+    arr_records['frequency'] = Range
+    return (bool_empty, arr_records)
 
 def func_display_info(int_debug_value, strPrintLocation, ListLine):
     global int_debug, str_valid_ListLineOrderStatus
@@ -1879,14 +2635,311 @@ def func_display_info(int_debug_value, strPrintLocation, ListLine):
             if (str_valid_ListLineOrderStatus == 'YesValid'):
                 obj_ListLineOrderStatus.save()
             obj_ListLineMarketIndicators.save()
+            obj_ListLineMarketIndicators.wait_compaction()
             func_display_info(0, 'Both', ['Ended With Error!'])
             sys.exit(-1)  # Error message
 
+def func_eval_triggers(arr_trigger_buy, arr_trigger_sell, arr_rsi, arr_row):
+    # Rows of triggers against the RSI of their symbol (row of arr_rsi; -1 none): Buy when all triggers are above the RSI, Sell when all are below
+    arr_found = (arr_row >= 0)
+    if (len(arr_rsi) == 0):
+        return (np.zeros(len(arr_row), dtype=bool), np.zeros(len(arr_row), dtype=bool))
+    arr_rsi_rows = arr_rsi[np.where(arr_found, arr_row, 0)]
+    arr_buy  = arr_found & np.all(arr_trigger_buy  > arr_rsi_rows, axis=1)
+    arr_sell = arr_found & np.all(arr_trigger_sell < arr_rsi_rows, axis=1)
+    return (arr_buy, arr_sell)
+
+def func_find_gaps(arr_dates, int_start, int_end, int_gap):
+    # Ranges from int_start to int_end with no date (sorted oldest first) for more than int_gap
+    arr_points = np.concatenate(([int_start], arr_dates, [int_end]))
+    return ([(int(arr_points[int_point]), int(arr_points[int_point + 1])) for int_point in np.flatnonzero(np.diff(arr_points) > int_gap).tolist()])
+
 def func_get_account(str_account_desc):
     for tup_account in tup_accounts:
         if tup_account[1] == str_account_desc:
            return(tup_account[0])
 
+def func_get_historical_prices(lst_history_requests):
+    # api_GetHistoricalPrices of each request (tuple of its arguments) on int_history_workers threads; results in request order.
+    # Closed windows are served from and saved to the history cache. Threads do not exit: when a request exhausts its retries,
+    # requests not started are cancelled and the main thread exits once the running ones end.
+    int_date_today = obj_SessionCalendar.day_start(int(round(time.time() * 1000, 0)))
+    lst_HistoricalPrices = [None] * len(lst_history_requests)
+    for int_request, tup_request in enumerate(lst_history_requests):
+        if (obj_HistoryCache.is_closed(tup_request, int_date_today)):
+            lst_HistoricalPrices[int_request] = obj_HistoryCache.get(tup_request)
+    lst_requests_online = [int_request for int_request, HistoricalPrices in enumerate(lst_HistoricalPrices) if HistoricalPrices is None]
+
+    if (len(lst_requests_online) <= 1):
+        lst_HistoricalPrices_online = [api_GetHistoricalPrices(*lst_history_requests[int_request]) for int_request in lst_requests_online]
+    else:
+        lst_HistoricalPrices_online = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=int_history_workers) as obj_executor:
+            lst_futures = [obj_executor.submit(api_GetHistoricalPrices, *lst_history_requests[int_request], bool_exit_on_error=False) for int_request in lst_requests_online]
+            for obj_future in lst_futures:
+                lst_HistoricalPrices_online.append(obj_future.result())
+                if (lst_HistoricalPrices_online[-1] is None):  # Retries exhausted
+                    for obj_future_pending in lst_futures:
+                        obj_future_pending.cancel()
+                    break
+        if (any((HistoricalPrices is None) for HistoricalPrices in lst_HistoricalPrices_online)):
+            func_display_info(0, 'Both', ['-' * 128])
+            func_display_info(0, 'Both', ['* * * ERROR * * * Unable to get History Prices in func_get_historical_prices'])
+            func_display_info(-1, 'Both', ['-' * 128])
+
+    bool_cache_changed = False
+    for int_request, HistoricalPrices in zip(lst_requests_online, lst_HistoricalPrices_online):
+        lst_HistoricalPrices[int_request] = HistoricalPrices
+        if ((len(HistoricalPrices) > 0) and obj_HistoryCache.is_closed(lst_history_requests[int_request], int_date_today)):
+            obj_HistoryCache.put(lst_history_requests[int_request], HistoricalPrices)
+            bool_cache_changed = True
+    if (bool_cache_changed):
+        obj_HistoryCache.evict()
+    return (lst_HistoricalPrices)
+
+def func_list_prices_segments(str_path_dir, str_symbol):
+    # Segment files Stock_<SYMB>.<generation>.seg sorted by generation, oldest first
+    lst_segments = []
+    str_prefix = 'Stock_' + str_symbol + '.'
+    for str_file_name in os.listdir(str_path_dir):
+        if (str_file_name.startswith(str_prefix) and str_file_name.endswith('.seg') and
+            str_file_name[len(str_prefix):-4].isdigit()):
+            lst_segments.append((int(str_file_name[len(str_prefix):-4]), str_path_dir + '\\' + str_file_name))
+    return (sorted(lst_segments))
+
+def func_load_prices_binary(str_file):
+    # Memory-map the columns of a binary price file; arrays are read-only views of the file (zero-copy).
+    # Readers of price files raise ValueError on files they cannot read; also used by Main_Feed.py and Main_Emulator.py
+    int_offset = dtype_prices_header.itemsize
+    if (os.path.getsize(str_file) < int_offset):  # Empty files cannot be memory-mapped
+        raise ValueError('Missing header in file ' + str_file + ' in func_load_prices_binary')
+    arr_file = np.memmap(str_file, dtype=np.uint8, mode='r')
+    arr_header = arr_file[0:int_offset].view(dtype_prices_header)[0]
+    int_records = int(arr_header['records'])
+    if ((arr_header['magic'] != str_prices_file_magic) or
+        (arr_header['version'] != int_prices_file_version) or
+        (len(arr_file) != (int_offset + (int_records * (8 + 8 + 2))))):  # Wrong format or truncated file
+        raise ValueError('Invalid format in file ' + str_file + ' in func_load_prices_binary')
+    arr_dates     = arr_file[int_offset:int_offset + (int_records * 8)].view('<i8')
+    int_offset    = int_offset + (int_records * 8)
+    arr_prices    = arr_file[int_offset:int_offset + (int_records * 8)].view('<f8')
+    int_offset    = int_offset + (int_records * 8)
+    arr_frequency = arr_file[int_offset:int_offset + (int_records * 2)].view('<i2')
+    return (arr_dates, arr_prices, arr_frequency)
+
+def func_load_prices_segment(str_file):
+    with open(str_file, 'rb') as inF:
+        bytes_records = inF.read()
+    int_records = len(bytes_records) // dtype_prices_record.itemsize  # Ignore partial last record
+    arr_records = np.frombuffer(bytes_records, dtype=dtype_prices_record, count=int_records)
+    return (np.ascontiguousarray(arr_records['date']), np.ascontiguousarray(arr_records['price']), np.ascontiguousarray(arr_records['frequency']))
+
+def func_load_prices_text(str_file):
+    # Fallback reader for old fixed-width files: date (15), price (15), frequency (10)
+    if (os.path.getsize(str_file) == 0):
+        arr_records = np.zeros(0, dtype=dtype_prices_record)
+    else:
+        arr_records = np.loadtxt(str_file, dtype=dtype_prices_record, ndmin=1)  # ValueError if a line is not a price record
+    return (np.ascontiguousarray(arr_records['date']), np.ascontiguousarray(arr_records['price']), np.ascontiguousarray(arr_records['frequency']))
+
+def func_normalize_prices(arr_dates, arr_prices, arr_frequency, lst_prices_new, bool_all):
+    # Merge new prices into prices sorted newest first. Only records as old as the oldest new price are sorted and cleansed,
+    # unless bool_all is set (prices not cleansed yet, e.g. loaded from segment files or older prices added)
+    arr_new_dates     = np.array([objPrice[0] for objPrice in lst_prices_new], dtype='<i8')
+    arr_new_prices    = np.array([objPrice[1] for objPrice in lst_prices_new], dtype='<f8')
+    arr_new_frequency = np.array([objPrice[2] for objPrice in lst_prices_new], dtype='<i2')
+    if (bool_all):
+        int_head = len(arr_dates)
+    elif (len(arr_new_dates) == 0):
+        return (arr_dates, arr_prices, arr_frequency)
+    else:
+        int_head = int(np.searchsorted(-arr_dates, -arr_new_dates.min(), side='right'))  # Records newer than or as old as the oldest new price
+
+    arr_head_dates     = np.concatenate((arr_dates[:int_head], arr_new_dates))
+    arr_head_prices    = np.concatenate((arr_prices[:int_head], arr_new_prices))
+    arr_head_frequency = np.concatenate((arr_frequency[:int_head], arr_new_frequency))
+
+    # Delete records with price 0
+    arr_nonzero = (arr_head_prices != 0)
+
+    # Sort records; newest records first (date, price, Range)
+    arr_order = np.lexsort((arr_head_frequency[arr_nonzero], arr_head_prices[arr_nonzero], arr_head_dates[arr_nonzero]))[::-1]
+    arr_head_dates     = arr_head_dates[arr_nonzero][arr_order]
+    arr_head_prices    = arr_head_prices[arr_nonzero][arr_order]
+    arr_head_frequency = arr_head_frequency[arr_nonzero][arr_order]
+
+    # Remove duplicate records; equal to prior record after sorting
+    arr_unique = np.ones(len(arr_head_dates), dtype=bool)
+    arr_unique[1:] = ((arr_head_dates[1:]     != arr_head_dates[:-1]) |
+                      (arr_head_prices[1:]    != arr_head_prices[:-1]) |
+                      (arr_head_frequency[1:] != arr_head_frequency[:-1]))
+
+    # Older records were cleansed already
+    arr_dates     = np.concatenate((arr_head_dates[arr_unique],     arr_dates[int_head:]))
+    arr_prices    = np.concatenate((arr_head_prices[arr_unique],    arr_prices[int_head:]))
+    arr_frequency = np.concatenate((arr_head_frequency[arr_unique], arr_frequency[int_head:]))
+
+    # Delete mixed Range records, two passes; older records are included up to 4 records to cleanse boundary
+    int_end = min(len(arr_dates), int(np.count_nonzero(arr_unique)) + 4)
+    arr_keep = np.ones(len(arr_dates), dtype=bool)
+    lst_frequency = arr_frequency[:int_end].tolist()
+    func_clean_mixed_ranges(lst_frequency, arr_keep, int_end)
+    func_clean_mixed_ranges(lst_frequency, arr_keep, int_end)
+    if not (arr_keep.all()):
+        arr_dates, arr_prices, arr_frequency = arr_dates[arr_keep], arr_prices[arr_keep], arr_frequency[arr_keep]
+    return (arr_dates, arr_prices, arr_frequency)
+
+def func_ny_time_to_epoch(dt_ny):
+    # NY time (local time plus 60 minutes) to Unix Epoch in TDA format
+    return (int(round(time.mktime((dt_ny - timedelta(minutes=60)).timetuple()) * 1000, 0)))
+
+def func_place_order(OrderType, BuySell, obj_LineOrderStatus):
+    # api_PlaceOrder and the number of the new order: from the Location of the response; the orders of the day are listed and matched
+    # (api_GetOrderByPath) only without it. Conditional orders also return the number of the Sell child order.
+    float_time_start = time.time()
+    str_account = func_get_account(obj_LineOrderStatus.acct_desc)
+    OrderStatus, OrderNumber = api_PlaceOrder(OrderType, BuySell, obj_LineOrderStatus)
+    str_source = 'Location'
+    if ((OrderNumber is not None) and (OrderType == 'Conditional')):
+        dict_order = api_GetOrder(str_account, OrderNumber)
+        if ((dict_order is not None) and (len(dict_order.get('childOrderStrategies', [])) > 0)):
+            OrderNumber = (OrderNumber, dict_order['childOrderStrategies'][0]['orderId'])
+            obj_OrderSnapshot.put(str_account, dict_order)
+        else:
+            OrderNumber = None
+    if (OrderNumber is None):
+        str_source = 'Orders of the day'
+        OrderNumber = api_GetOrderByPath(OrderType, BuySell, obj_LineOrderStatus)
+    func_display_info(20, 'Both', ['Order Number: ' + obj_LineOrderStatus.symbol + ' ' + OrderType + ' ' + BuySell + ' ' + str(OrderNumber) + ' from ' + str_source +
+                                   ' in ' + str(round((time.time() - float_time_start) * 1000)) + ' ms'])
+    return (OrderStatus, OrderNumber)
+
+def func_resample_prices(arr_dates, arr_prices, arr_frequency):
+    # Bars of all RSI Periods in one pass over prices sorted newest first. Returns by Period the bars oldest first
+    # (keys, date of close, close) and the key of the bar with the newest price of 1min (or longer) Range, None if there is none.
+    # Week and day bars are calendar periods. Intraday bars count trading time only, 6 AM to 7 PM on weekdays,
+    # so a bar ending at 6 AM continues at 7 PM prior day, and Monday continues on Friday.
+    dict_bars = {}
+    if (len(arr_dates) == 0):
+        for Period in lst_rsi_periods:
+            dict_bars[Period] = (np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<i8'), np.zeros(0, dtype='<f8'), None)
+        return (dict_bars)
+
+    arr_index    = obj_SessionCalendar.index(arr_dates)
+    arr_day      = obj_SessionCalendar.day_first + arr_index                               # Proleptic Gregorian ordinal, as date.toordinal()
+    arr_weekday  = obj_SessionCalendar.arr_weekday[arr_index]
+    arr_time     = np.clip(obj_SessionCalendar.time_of_day(arr_dates, arr_index) - (6 * 60 * 60 * 1000), 0, (13 * 60 * 60 * 1000))  # Before 6 AM is 6 AM; after 7 PM is 7 PM
+    arr_time     = np.where(arr_weekday > 4, (13 * 60 * 60 * 1000), arr_time)             # Saturday and Sunday are end of Friday
+    arr_trading  = obj_SessionCalendar.arr_trading_day[arr_index] * (13 * 60 * 60 * 1000) + arr_time
+    arr_bars     = np.flatnonzero(arr_frequency != 0)
+
+    for Period in lst_rsi_periods:
+        if (Period == 'week'):
+            arr_keys = (arr_day - arr_weekday) // 7
+        elif (Period == 'day'):
+            arr_keys = arr_day
+        else:
+            arr_keys = arr_trading // dict_rsi_period_delta[Period]
+        arr_close = np.flatnonzero(np.concatenate(([True], arr_keys[1:] != arr_keys[:-1])))[::-1]  # Newest price of each bar; oldest bar first
+        if (len(arr_bars) > 0):
+            key_open = int(arr_keys[arr_bars[0]])
+        else:
+            key_open = None
+        dict_bars[Period] = (arr_keys[arr_close], arr_dates[arr_close], arr_prices[arr_close], key_open)
+    return (dict_bars)
+
+def func_resample_prices_lookback(arr_dates, arr_prices, arr_frequency, int_count):
+    # func_resample_prices of the newest prices only (at least int_count): the close of a bar is its newest price, so a window
+    # holding more than func_rsi_lookback(Period) closed bars of every Period gives the same closes used by RSI as all prices.
+    # The window grows until it does; all prices when a Period has no lookback.
+    lst_lookback = [func_rsi_lookback(Period) for Period in lst_rsi_periods]
+    int_count = min(len(arr_dates), max(int_count, 1024))
+    if (min(lst_lookback) == 0):
+        int_count = len(arr_dates)
+    while True:
+        dict_bars = func_resample_prices(arr_dates[:int_count], arr_prices[:int_count], arr_frequency[:int_count])
+        if (int_count == len(arr_dates)):
+            return (dict_bars)
+        float_growth = 1.0  # Window needed over window used, by the Period furthest from its lookback
+        for Period, int_lookback in zip(lst_rsi_periods, lst_lookback):
+            arr_keys, arr_dates_bars, arr_closes, key_open = dict_bars[Period]
+            int_closed = int(np.searchsorted(arr_keys, key_open, side='left')) if (key_open is not None) else 0
+            if (int_closed <= int_lookback):
+                float_growth = max(float_growth, (int_lookback + 2) / max(int_closed, 1))
+        if (float_growth == 1.0):
+            func_display_info(60, 'Both', ['Prices resampled for lookback: ' + str(int_count) + ' of ' + str(len(arr_dates))])
+            return (dict_bars)
+        int_count = min(len(arr_dates), int(int_count * min(max(float_growth * 1.1, 2.0), 64.0)))
+
+def func_rsi_lookback(Period):
+    # Closes used when RSI is calculated again, 0 for all: 15 to start Average Gain/Loss plus warm-up bars. Start values
+    # weigh (13/14)^warm-up in Average Gain/Loss, so the warm-up keeps RSI about float_rsi_tolerance points from RSI of all bars.
+    if (Period in dict_rsi_lookback):
+        return (max(int(dict_rsi_lookback[Period]), 15))
+    if (float_rsi_tolerance <= 0):
+        return (0)
+    return (15 + int(np.ceil(np.log(float_rsi_tolerance / 100) / np.log(13 / 14))))
+
+def func_sample_chain(arr_dates, arr_prices, Period, DateMark, int_values):
+    # Prices of Period sampled back from the newest price at or before DateMark (str_rsi_sampling Chain): each price is the newest
+    # one at least a Period before the prior price. Intraday Periods skip 7 PM to 6 AM and weekends, local time.
+    # arr_dates sorted newest first; equal dates take the highest price. Returns up to int_values prices (0 for all), oldest first.
+    if (Period == 'week'):
+        TimeDelta = (7 * 24 * 60 * 60 * 1000)
+    elif (Period == 'day'):
+        TimeDelta = (24 * 60 * 60 * 1000)
+    else:
+        TimeDelta = dict_rsi_period_delta[Period]
+    arr_dates_negative = -arr_dates
+    ListValues = []
+    int_start = 0
+    while ((int_values == 0) or (len(ListValues) < int_values)):
+        int_index = int_start + int(np.searchsorted(arr_dates_negative[int_start:], -DateMark, side='left'))  # Newest price at or before DateMark
+        if (int_index >= len(arr_dates)):
+            break
+        int_end = int(np.searchsorted(arr_dates_negative, arr_dates_negative[int_index], side='right'))
+        ListValues.append(float(arr_prices[int_index:int_end].max()))
+        int_start = int_end
+        MovingDate = int(arr_dates[int_index])
+        if ((Period == 'week') or (Period == 'day')):
+            DateMark = MovingDate - TimeDelta  # Prior stock price reading skips weekends and holidays
+            continue
+        dt_moving = datetime.fromtimestamp(MovingDate / 1000)
+        DateAt6AM_UnixEpoch_TDAFormat = time.mktime(datetime(dt_moving.year, dt_moving.month, dt_moving.day, 6, 0).timetuple()) * 1000
+        DateAt7PM_UnixEpoch_TDAFormat = DateAt6AM_UnixEpoch_TDAFormat - (11 * 60 * 60 * 1000)  # 7 PM prior day
+        if ((MovingDate - DateAt6AM_UnixEpoch_TDAFormat) < TimeDelta):  # No space for delta; continue before the dead zone
+            MovingDate = DateAt7PM_UnixEpoch_TDAFormat - (TimeDelta - (MovingDate - DateAt6AM_UnixEpoch_TDAFormat))
+        else:
+            MovingDate = MovingDate - TimeDelta
+        if (datetime.fromtimestamp(MovingDate / 1000).weekday() == 6):
+            MovingDate = MovingDate - (2 * 24 * 60 * 60 * 1000)  # if Sunday, subtract 2 days
+        if (datetime.fromtimestamp(MovingDate / 1000).weekday() == 5):
+            MovingDate = MovingDate - (1 * 24 * 60 * 60 * 1000)  # if Saturday, subtract 1 day
+        DateMark = MovingDate
+    ListValues.reverse()  # Oldest prices first
+    return (ListValues)
+
+def func_save_prices_binary(str_file, lst_dates, lst_prices, lst_frequency):
+    # Write to temporary file and replace; a crash while writing never leaves a partial Stock file
+    arr_header = np.zeros(1, dtype=dtype_prices_header)
+    arr_header['magic']   = str_prices_file_magic
+    arr_header['version'] = int_prices_file_version
+    arr_header['records'] = len(lst_dates)
+    with open(str_file + '.tmp', 'wb') as outF:
+        outF.write(arr_header.tobytes())
+        outF.write(np.asarray(lst_dates,     dtype='<i8').tobytes())
+        outF.write(np.asarray(lst_prices,    dtype='<f8').tobytes())
+        outF.write(np.asarray(lst_frequency, dtype='<i2').tobytes())
+        outF.flush()
+        os.fsync(outF.fileno())
+    os.replace(str_file + '.tmp', str_file)
+
+def func_trigger_columns(lst_lines):
+    # RSI triggers of order or BuySell lines: a row by line and a column by lst_rsi_columns
+    arr_trigger_buy  = np.array([[getattr(obj_Line, 'trigger_buy_rsi_'  + str_column) for str_column in lst_rsi_columns] for obj_Line in lst_lines], dtype='<f8')
+    arr_trigger_sell = np.array([[getattr(obj_Line, 'trigger_sell_rsi_' + str_column) for str_column in lst_rsi_columns] for obj_Line in lst_lines], dtype='<f8')
+    return (arr_trigger_buy.reshape(len(lst_lines), len(lst_rsi_columns)), arr_trigger_sell.reshape(len(lst_lines), len(lst_rsi_columns)))
+
 if __name__ == "__main__":
     # sys.exit()  # Exit
 
@@ -1895,6 +2948,7 @@ if __name__ == "__main__":
     obj_ListLineOrderStatus       = cls_ListLineOrderStatus()
     obj_ListLineMarketIndicators  = cls_ListLineMarketIndicators()
     obj_ListLineBuySellStatus     = cls_ListLineBuySellStatus()
+    obj_SessionCalendar           = cls_SessionCalendar()
     str_valid_ListLineOrderStatus = "NoValid"
 
     # set path of working directories and files
@@ -1928,6 +2982,61 @@ if __name__ == "__main__":
     float_time_delay_process = float(str_time_delay_process)
     func_display_info(50, "Both", ["str_time_delay_process >>>" + str_time_delay_process + "<<<"])
 
+    #global int_prices_compact_percent
+    str_prices_compact_percent = io_read_file_Config.get("App Config", "str_prices_compact_percent", fallback="20")
+    int_prices_compact_percent = int(str_prices_compact_percent)
+    func_display_info(50, "Both", ["str_prices_compact_percent >>>" + str_prices_compact_percent + "<<<"])
+
+    #global float_rsi_tolerance
+    str_rsi_tolerance = io_read_file_Config.get("App Config", "str_rsi_tolerance", fallback="0.01")
+    float_rsi_tolerance = float(str_rsi_tolerance)
+    func_display_info(50, "Both", ["str_rsi_tolerance >>>" + str_rsi_tolerance + "<<<"])
+
+    #global dict_rsi_lookback
+    dict_rsi_lookback = json.loads(io_read_file_Config.get("App Config", "dict_rsi_lookback", fallback="{}"))
+    func_display_info(50, "Both", ["dict_rsi_lookback >>>" + str(dict_rsi_lookback) + "<<<"])
+
+    #global str_rsi_sampling  # Bars changes RSI by up to a few points; trigger levels were set with Chain
+    str_rsi_sampling = io_read_file_Config.get("App Config", "str_rsi_sampling", fallback="Chain")
+    func_display_info(50, "Both", ["str_rsi_sampling >>>" + str_rsi_sampling + "<<<"])
+
+    #global int_history_workers
+    str_history_workers = io_read_file_Config.get("App Config", "str_history_workers", fallback="4")
+    int_history_workers = int(str_history_workers)
+    func_display_info(50, "Both", ["str_history_workers >>>" + str_history_workers + "<<<"])
+
+    #global str_api_url
+    str_api_url = io_read_file_Config.get("App Config", "str_api_url", fallback="https://api.tdameritrade.com/v1")
+    func_display_info(50, "Both", ["str_api_url >>>" + str_api_url + "<<<"])
+
+    #global obj_BrokerClient
+    str_api_timeout = io_read_file_Config.get("App Config", "str_api_timeout", fallback="60")
+    func_display_info(50, "Both", ["str_api_timeout >>>" + str_api_timeout + "<<<"])
+    str_api_connections = io_read_file_Config.get("App Config", "str_api_connections", fallback="8")
+    func_display_info(50, "Both", ["str_api_connections >>>" + str_api_connections + "<<<"])
+    obj_BrokerClient = cls_BrokerClient(float(str_api_timeout), int(str_api_connections))
+
+    #global obj_RateLimiter  # Without limits, one request each str_time_delay_process seconds as before
+    str_api_requests_per_minute = io_read_file_Config.get("App Config", "str_api_requests_per_minute", fallback=str(60 / float_time_delay_process))
+    func_display_info(50, "Both", ["str_api_requests_per_minute >>>" + str_api_requests_per_minute + "<<<"])
+    str_api_burst = io_read_file_Config.get("App Config", "str_api_burst", fallback="1")
+    func_display_info(50, "Both", ["str_api_burst >>>" + str_api_burst + "<<<"])
+    obj_RateLimiter = cls_RateLimiter(float(str_api_requests_per_minute) / 60, int(str_api_burst))
+
+    #global obj_FeedClient, float_feed_wait  # Streaming price feed; otherwise prices are requested every cycle
+    str_feed = io_read_file_Config.get("App Config", "str_feed", fallback="No")
+    func_display_info(50, "Both", ["str_feed >>>" + str_feed + "<<<"])
+    str_feed_host = io_read_file_Config.get("App Config", "str_feed_host", fallback="localhost")
+    func_display_info(50, "Both", ["str_feed_host >>>" + str_feed_host + "<<<"])
+    str_feed_port = io_read_file_Config.get("App Config", "str_feed_port", fallback="8765")
+    func_display_info(50, "Both", ["str_feed_port >>>" + str_feed_port + "<<<"])
+    str_feed_wait = io_read_file_Config.get("App Config", "str_feed_wait", fallback="60")
+    float_feed_wait = float(str_feed_wait)
+    func_display_info(50, "Both", ["str_feed_wait >>>" + str_feed_wait + "<<<"])
+    obj_FeedClient = None
+    if (str_feed == 'Yes'):
+        obj_FeedClient = cls_FeedClient(str_feed_host, int(str_feed_port))
+
     #global int_max_retries
     str_max_retries = io_read_file_Config.get("App Config", "str_max_retries")
     int_max_retries = int(str_max_retries)
@@ -1947,6 +3056,9 @@ if __name__ == "__main__":
     str_consumer_key = io_read_file_Config.get("App Config", "str_consumer_key")
     func_display_info(50, "Both", ["str_consumer_key >>>" + str_consumer_key + "<<<"])
 
+    #global obj_TokenManager, str_token_access, str_token_refresh
+    obj_TokenManager = cls_TokenManager()
+
     tup_accounts = io_read_file_Config.items("Account Alias")
     del tup_accounts[0]  # delete format field
     func_display_info(50, "Both", tup_accounts)
@@ -1969,6 +3081,20 @@ if __name__ == "__main__":
         func_display_info(-1, "Both", ["-" * 128])
     func_display_info(50, 'Both', ['. . . Verify Necessary Files Exist'])
 
+    func_convert_prices_files(str_path_dir_Data)  # Convert old text Stock files to binary Stock files, once
+
+    #global obj_HistoryCache
+    str_cache_max_mb = io_read_file_Config.get("App Config", "str_cache_max_mb", fallback="256")
+    func_display_info(50, "Both", ["str_cache_max_mb >>>" + str_cache_max_mb + "<<<"])
+    str_cache_max_days = io_read_file_Config.get("App Config", "str_cache_max_days", fallback="90")
+    func_display_info(50, "Both", ["str_cache_max_days >>>" + str_cache_max_days + "<<<"])
+    obj_HistoryCache = cls_HistoryCache(str_path_dir_Data + "\Cache", int(str_cache_max_mb) * 1024 * 1024, int(str_cache_max_days))
+
+    #global obj_OrderSnapshot
+    str_order_snapshot_days = io_read_file_Config.get("App Config", "str_order_snapshot_days", fallback="60")
+    func_display_info(50, "Both", ["str_order_snapshot_days >>>" + str_order_snapshot_days + "<<<"])
+    obj_OrderSnapshot = cls_OrderSnapshot(int(str_order_snapshot_days))
+
     #global lst_stock_regularMarketOnly_OTC_list  # list of stocks with restrictions to place single limit orders (only allowed during regularMarket)
     lst_stock_regularMarketOnly_OTC = io_read_file_Config.get("TD Ameritrade", "lst_stock_regularMarketOnly_OTC")
     func_display_info(50, "Both", ["lst_stock_regularMarketOnly_OTC >>>" + lst_stock_regularMarketOnly_OTC + "<<<"])
@@ -1979,50 +3105,60 @@ if __name__ == "__main__":
     obj_ListLineOrderStatus.load()
     obj_ListLineMarketIndicators.initial_load(obj_ListLineOrderStatus)
     obj_ListLineBuySellStatus.initial_load(obj_ListLineOrderStatus)
+    #global obj_OrderIndex
+    obj_OrderIndex = cls_OrderIndex()
+    obj_OrderIndex.build(obj_ListLineOrderStatus, obj_ListLineMarketIndicators)
     str_valid_ListLineOrderStatus = 'YesValid'
+    if (obj_FeedClient is not None):
+        obj_FeedClient.start([obj_LineMarketIndicators.symbol for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List])
 
     #global bool_isOpen, dt_preMarket_start, dt_preMarket_end, dt_regularMarket_start, dt_regularMarket_end, dt_postMarket_start, dt_postMarket_end
     #global dt_trading_timestamp, bool_preMarket, bool_regularMarket, bool_postMarket
     dt_trading_timestamp = datetime.today() + timedelta(minutes=60)
-    api_GetMarketHours(dt_trading_timestamp)
+    #global obj_SessionState
+    str_market_hours_days = io_read_file_Config.get("App Config", "str_market_hours_days", fallback="5")
+    func_display_info(50, "Both", ["str_market_hours_days >>>" + str_market_hours_days + "<<<"])
+    obj_SessionState = cls_SessionState(str_path_dir_Config + "\MarketHours.json", int(str_market_hours_days))
+    obj_SessionState.load()
+    obj_SessionState.refresh()
+    obj_TokenManager.start()  # Trade_Config.ini is read; from here tokens are renewed in background
 
     while not (os.path.isfile(str_path_dir_Config + '\Trade_Exit.txt') or (dt_trading_timestamp > dt_trading_timestamp.replace(hour=23, minute=45, second=0, microsecond=0))):  # Main loop * * * Begin of Loop * * *  # If file Exit exists or near to midnight, then Exit loop.
 
         dt_trading_timestamp = datetime.today() + timedelta(minutes=60)
-        func_display_info(20, 'Both', ['dt_trading_timestamp: ' + str(dt_trading_timestamp) + ' str_user_id: ' + str_user_id + ' str_time_delay_process: ' + str_time_delay_process])
+        func_display_info(20, 'Both', ['dt_trading_timestamp: ' + str(dt_trading_timestamp) + ' str_user_id: ' + str_user_id + ' ' + obj_RateLimiter.print()])
 
         obj_ListLineMarketIndicators.load()
+        obj_ListLineMarketIndicators.save()  # Append new Stock Prices every cycle; exit only saves the last cycle
         obj_ListLineMarketIndicators.print()
         obj_ListLineBuySellStatus.update_market_indicators(obj_ListLineMarketIndicators)
         obj_ListLineBuySellStatus.update_repetitions()
         obj_ListLineBuySellStatus.print()
 
-        for obj_LineOrderStatus in obj_ListLineOrderStatus.List:
+        obj_OrderIndex.evaluate(obj_ListLineMarketIndicators.rsi_matrix()[0])
+        obj_OrderSnapshot.clear()
+        for int_order, obj_LineOrderStatus in enumerate(obj_ListLineOrderStatus.List):
             func_display_info(40, 'Both', ['Processing Order for: ' + obj_LineOrderStatus.symbol + ' ' + obj_LineOrderStatus.type + ' ' + obj_LineOrderStatus.period + ' ' + str(obj_LineOrderStatus.seq)])
-            for obj_LineMarketIndicators in obj_ListLineMarketIndicators.List:
-                if  (obj_LineOrderStatus.symbol == obj_LineMarketIndicators.symbol):
+            obj_LineMarketIndicators = obj_OrderIndex.indicators(obj_LineOrderStatus.symbol)
+            if (obj_LineMarketIndicators is not None):
+                if (obj_OrderIndex.arr_buy[int_order] or obj_OrderIndex.arr_sell[int_order]):  # Prices are checked only for orders with RSI triggers met
                     if (obj_LineOrderStatus.seq == 1):
                         float_prior_order_buy_price = 0.0
                     else:
-                        float_prior_order_buy_price = 0.0                                                             # Find Prior Order - with same Order Type - to get Buy Price
-                        Trackfloat_prior_order_buy_price = False
-                        for obj_LineOrderStatus_float_prior_order_buy_price in reversed(obj_ListLineOrderStatus.List):
-                            if ((Trackfloat_prior_order_buy_price) and (float_prior_order_buy_price == 0.0)):
-                               if ((obj_LineOrderStatus.symbol   == obj_LineOrderStatus_float_prior_order_buy_price.symbol  ) and  # Orders with same Symbol
-                                   (obj_LineOrderStatus.period == obj_LineOrderStatus_float_prior_order_buy_price.period) and  # Orders with same Period
-                                   (obj_LineOrderStatus.type   == obj_LineOrderStatus_float_prior_order_buy_price.type   )):   # Order with same Type
-                                   if (obj_LineOrderStatus_float_prior_order_buy_price.order_buy_status.strip() != ''):          # Prior Order is active
-                                       float_prior_order_buy_price = obj_LineOrderStatus_float_prior_order_buy_price.order_buy_price
-                            if (obj_LineOrderStatus_float_prior_order_buy_price == obj_LineOrderStatus):                # Found current Order; start tracking
-                               Trackfloat_prior_order_buy_price = True
-                    #DisplayInfo(50, 'Both', ['Symbol - Prior Order Buy Price: ' + obj_LineOrderStatus.symbol + ' ' + str(float_prior_order_buy_price)])
+                        float_prior_order_buy_price = obj_OrderIndex.prior_order_buy_price(obj_LineOrderStatus)  # Prior active Order - with same Order Type - to get Buy Price
                     func_display_info(50, 'Both', ['Symbol - Prior Order Buy Price: ' + obj_LineOrderStatus.symbol + ' ' + obj_LineOrderStatus.period + ' ' + obj_LineOrderStatus.type + ' ' + str(obj_LineOrderStatus.seq) + ' ' + str(float_prior_order_buy_price)])
-                    obj_LineOrderStatus.place_order(float_prior_order_buy_price, obj_LineMarketIndicators)
-                    obj_LineOrderStatus.update_order_status()
-                    obj_LineOrderStatus.reset_order()
-
+                    obj_LineOrderStatus.place_order(float_prior_order_buy_price, obj_LineMarketIndicators, bool(obj_OrderIndex.arr_buy[int_order]), bool(obj_OrderIndex.arr_sell[int_order]))
+                obj_LineOrderStatus.update_order_status()
+                obj_LineOrderStatus.reset_order()
+                obj_OrderIndex.update(obj_LineOrderStatus)
+        func_display_info(40, 'Both', ['Order statuses: ' + obj_OrderSnapshot.print()])
+
+    if (obj_FeedClient is not None):
+        obj_FeedClient.stop()
+    obj_SessionState.stop()
     obj_ListLineOrderStatus.save()  # Save Order Status file before exit
     obj_ListLineMarketIndicators.save()
+    obj_ListLineMarketIndicators.wait_compaction()
     if (os.path.isfile(str_path_dir_Config + "\Trade_Exit.txt")):
         os.rename(str_path_dir_Config + "\Trade_Exit.txt", str_path_dir_Config + "\Trade_ExitNO.txt")  # Ready to start the process again
     func_display_info(0, 'Both', ['The End'])